@@ -1,10 +1,16 @@
+from typing import Optional
+
 import pulumi
 import pulumi_aws as aws
 
 # =========================
 # Streaming layer
 # =========================
-from components.streaming.kinesis import create_eeg_event_stream
+from components.streaming.kinesis import (
+    create_eeg_event_stream,
+    create_eeg_stream_consumer,
+    load_stream_settings,
+)
 
 # =========================
 # Storage layer
@@ -33,13 +39,24 @@ from components.compute.lambda_kinesis_consumer import (
 # =========================
 from components.streaming.kinesis_event_mapping import (
     create_kinesis_lambda_event_mapping,
+    load_event_mapping_settings,
 )
 
 # ============================================================
 # Glue + Athena (EEG Events Analytics)
 # ============================================================
 from components.analytics.glue_database import create_glue_database
-from components.analytics.glue_table import create_glue_table
+from components.analytics.glue_table import (
+    create_glue_table,
+    create_parquet_glue_table,
+)
+from components.compute.lambda_events_compactor import (
+    EventsCompactorLambdaArgs,
+    create_events_compactor_lambda,
+)
+from components.security.iam_events_compactor_role import (
+    create_events_compactor_role,
+)
 from components.analytics.athena import create_athena_workgroup
 
 
@@ -57,7 +74,16 @@ from components.security.iam import create_lambda_execution_role
 # ============================================================
 # 1. Create Kinesis Data Stream for EEG events
 # ============================================================
-eeg_event_stream: aws.kinesis.Stream = create_eeg_event_stream()
+# Throughput knobs come from the stack config (Pulumi.<stack>.yaml)
+stream_settings = load_stream_settings()
+eeg_event_stream: aws.kinesis.Stream = create_eeg_event_stream(stream_settings)
+
+# Optional enhanced fan-out consumer for the Lambda
+eeg_stream_consumer = (
+    create_eeg_stream_consumer(stream=eeg_event_stream)
+    if stream_settings.enhanced_fan_out
+    else None
+)
 
 # ============================================================
 # 2. Create S3 buckets
@@ -94,6 +120,8 @@ kinesis_consumer_lambda: aws.lambda_.Function = create_kinesis_consumer_lambda(
 kinesis_lambda_mapping = create_kinesis_lambda_event_mapping(
     kinesis_stream_arn=eeg_event_stream.arn,
     lambda_function_arn=kinesis_consumer_lambda.arn,
+    settings=load_event_mapping_settings(),
+    stream_consumer_arn=eeg_stream_consumer.arn if eeg_stream_consumer else None,
 )
 
 # ============================================================
@@ -108,7 +136,40 @@ glue_table: aws.glue.CatalogTable = create_glue_table(
     data_lake_bucket_name=data_lake_bucket.bucket,
 )
 
-# 3. Athena WorkGroup
+# 3. Parquet event lake (compaction job; it registers the partitions).
+# The compactor imports pyarrow from a Lambda layer: without the layer
+# it would fail every run, so the lake is only deployed when it is set.
+stack_config = pulumi.Config()
+pyarrow_layer_arn = stack_config.get("compactionPyarrowLayerArn")
+
+events_compactor_lambda: Optional[aws.lambda_.Function] = None
+glue_parquet_table: Optional[aws.glue.CatalogTable] = None
+
+if pyarrow_layer_arn:
+    glue_parquet_table = create_parquet_glue_table(
+        database_name=glue_database.name,
+        data_lake_bucket_name=data_lake_bucket.bucket,
+    )
+
+    events_compactor_lambda = create_events_compactor_lambda(
+        EventsCompactorLambdaArgs(
+            role_arn=create_events_compactor_role(
+                data_lake_bucket=data_lake_bucket,
+                glue_table=glue_parquet_table,
+            ).arn,
+            data_lake_bucket_name=data_lake_bucket.bucket,
+            glue_database_name=glue_database.name,
+            glue_table_name=glue_parquet_table.name,
+            pyarrow_layer_arn=pyarrow_layer_arn,
+        )
+    )
+else:
+    pulumi.log.warn(
+        "compactionPyarrowLayerArn is not set: the events compactor and the "
+        "eeg_window_events_parquet table are not deployed"
+    )
+
+# 4. Athena WorkGroup
 athena_workgroup: aws.athena.Workgroup = create_athena_workgroup(
     results_bucket_name=athena_results_bucket.bucket,
 )
@@ -156,3 +217,7 @@ pulumi.export("kinesis_consumer_lambda_name", kinesis_consumer_lambda.name)
 pulumi.export("kinesis_consumer_lambda_arn", kinesis_consumer_lambda.arn)
 
 pulumi.export("kinesis_lambda_event_mapping_id", kinesis_lambda_mapping.id)
+if events_compactor_lambda is not None:
+    pulumi.export("events_compactor_lambda_name", events_compactor_lambda.name)
+if eeg_stream_consumer is not None:
+    pulumi.export("eeg_kinesis_stream_consumer_arn", eeg_stream_consumer.arn)
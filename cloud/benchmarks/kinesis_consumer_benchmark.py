@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+kinesis_consumer_benchmark.py
+
+Banco de pruebas local del Lambda consumidor de Kinesis
+(cloud/lambda_src/kinesis_consumer/handler.py).
+
+Responsabilidades:
+- Generar un lote sintético de Kinesis (registros agregados, varios
+  pacientes y sesiones) con el mismo formato que produce el fog
+- Sustituir los clientes S3 y DynamoDB del handler por stubs en memoria
+  (estilo moto), con latencia simulada opcional
+- Ejecutar el handler repetidamente y reportar coste por lote,
+  por registro y por evento (p50 / p95)
+- (--replay-check) Reproducir entregas fuera de orden y repetidas
+  (reintento parcial de PutRecords en el fog, reintentos del Lambda)
+  contra stubs con estado y comprobar que cada ventana se cuenta y se
+  guarda exactamente una vez
+
+NO realiza:
+- Llamadas a AWS
+
+Uso:
+    python cloud/benchmarks/kinesis_consumer_benchmark.py --records 100 --events-per-record 20
+    python cloud/benchmarks/kinesis_consumer_benchmark.py --replay-check
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from botocore.exceptions import ClientError
+
+HANDLER_DIR: Path = Path(__file__).resolve().parents[1] / "lambda_src" / "kinesis_consumer"
+
+# event_schema.py is packaged next to handler.py (see
+# components/compute/lambda_kinesis_consumer.py)
+EVENT_SCHEMA_DIR: Path = Path(__file__).resolve().parents[2] / "fog" / "pipeline"
+
+
+# ============================================================
+# In-memory AWS stubs
+# ============================================================
+
+class StubS3Client:
+    """
+    put_object only; keeps object sizes in memory.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.objects: Dict[str, int] = {}
+        self.calls: int = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs: Any) -> Dict[str, Any]:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            self.calls += 1
+            self.objects[f"{Bucket}/{Key}"] = len(Body)
+        return {"ETag": '"stub"'}
+
+
+class StubDynamoDBClient:
+    """
+    update_item with ADD on numeric attributes.
+
+    batch_get_item never reports committed windows, so every iteration
+    of the same batch does the full work instead of being deduplicated.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.items: Dict[str, Dict[str, int]] = {}
+        self.calls: int = 0
+        self._lock = threading.Lock()
+
+    def batch_get_item(self, RequestItems: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            self.calls += 1
+        return {"Responses": {table: [] for table in RequestItems}, "UnprocessedKeys": {}}
+
+    def update_item(
+        self,
+        TableName: str,
+        Key: Dict[str, Dict[str, str]],
+        ExpressionAttributeValues: Dict[str, Dict[str, str]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+        item_key = f"{Key['pk']['S']}#{Key['sk']['S']}"
+        with self._lock:
+            self.calls += 1
+            item = self.items.setdefault(item_key, {"windows_total": 0, "suspected_windows": 0})
+            item["windows_total"] += int(ExpressionAttributeValues[":total"]["N"])
+            item["suspected_windows"] += int(ExpressionAttributeValues[":sus"]["N"])
+        return {}
+
+
+class RecordingS3Client(StubS3Client):
+    """
+    StubS3Client that also keeps the (session_id, window_index) pairs
+    of every events object (the last write of each key wins).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.windows: Dict[str, List[Tuple[str, int]]] = {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs: Any) -> Dict[str, Any]:
+        if Key.endswith(".jsonl.gz"):
+            events = [json.loads(line) for line in gzip.decompress(Body).splitlines()]
+            self.windows[Key] = [(e["session_id"], e["window_index"]) for e in events]
+        return super().put_object(Bucket, Key, Body, **kwargs)
+
+
+class StatefulDynamoDBClient:
+    """
+    batch_get_item and conditional update_item on committed_windows,
+    as issued by the consumer (enough to replay redeliveries).
+
+    The first `fail_updates` update_item calls raise a throttling
+    error, to exercise partial batch failures.
+    """
+
+    def __init__(self, fail_updates: int = 0) -> None:
+        self.items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.fail_updates = fail_updates
+        self._lock = threading.Lock()
+
+    def batch_get_item(self, RequestItems: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        responses: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for table, request in RequestItems.items():
+                found = responses.setdefault(table, [])
+                for key in request["Keys"]:
+                    item = self.items.get((key["pk"]["S"], key["sk"]["S"]))
+                    if item is not None:
+                        found.append(
+                            {
+                                "pk": key["pk"],
+                                "sk": key["sk"],
+                                "committed_windows": {"S": item["committed_windows"]},
+                            }
+                        )
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def update_item(
+        self,
+        TableName: str,
+        Key: Dict[str, Dict[str, str]],
+        ExpressionAttributeValues: Dict[str, Dict[str, str]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        values = ExpressionAttributeValues
+        with self._lock:
+            if self.fail_updates > 0:
+                self.fail_updates -= 1
+                raise ClientError(
+                    {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+                    "UpdateItem",
+                )
+
+            item = self.items.get((Key["pk"]["S"], Key["sk"]["S"]))
+            stored = None if item is None else item["committed_windows"]
+            expected = values.get(":expected", {}).get("S")
+            if stored != expected:
+                raise ClientError(
+                    {"Error": {"Code": "ConditionalCheckFailedException"}},
+                    "UpdateItem",
+                )
+
+            if item is None:
+                item = self.items.setdefault(
+                    (Key["pk"]["S"], Key["sk"]["S"]),
+                    {"windows_total": 0, "suspected_windows": 0},
+                )
+            item["committed_windows"] = values[":ranges"]["S"]
+            item["windows_total"] += int(values[":total"]["N"])
+            item["suspected_windows"] += int(values[":sus"]["N"])
+        return {}
+
+
+# ============================================================
+# Handler and synthetic records
+# ============================================================
+
+def load_handler(log_level: str = "WARNING") -> Any:
+    """
+    Import the consumer handler with its AWS clients replaced later
+    by stubs (boto3 clients are built at import time).
+    """
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["LOG_LEVEL"] = log_level
+    for path in (EVENT_SCHEMA_DIR, HANDLER_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    handler_module = importlib.import_module("handler")
+
+    # Log records still get formatted at DEBUG, but not written
+    logging.getLogger().handlers = [logging.NullHandler()]
+    return handler_module
+
+
+def build_window_event(patient: int, window_index: int, timestamp: str) -> Dict[str, Any]:
+    """
+    EEG window event as built by fog/pipeline/event_builder.py.
+    """
+    return {
+        "event_version": 2,
+        "event_type": "eeg_window",
+        "suspected": window_index % 7 == 0,
+        "timestamp_utc": timestamp,
+        "room_id": f"room_{patient % 2}",
+        "patient_id": f"patient_{patient}",
+        "session_id": str(uuid.UUID(int=patient)),
+        "window_index": window_index,
+        "score": (window_index % 100) / 100.0,
+        "partition_key": f"patient_{patient}",
+    }
+
+
+def encode_record(
+    handler_module: Any,
+    sequence_number: int,
+    partition_key: str,
+    events: List[Dict[str, Any]],
+    codec: str = "binary",
+) -> Dict[str, Any]:
+    """
+    Kinesis Lambda record carrying an aggregated (length-prefixed)
+    payload, as sent by the fog.
+    """
+    encode_event = handler_module.event_schema.encode_event
+    # Shipped next to handler.py, importable once load_handler() ran
+    encode_aggregate = importlib.import_module("aggregation").encode_aggregate
+    payloads = [encode_event(event, codec) for event in events]
+    data = encode_aggregate(payloads, "length")
+    return {
+        "eventSource": "aws:kinesis",
+        "kinesis": {
+            "partitionKey": partition_key,
+            "sequenceNumber": f"{49600000000000000000000000000 + sequence_number}",
+            "data": base64.b64encode(data).decode("ascii"),
+        },
+    }
+
+
+def build_kinesis_batch(
+    handler_module: Any,
+    n_records: int,
+    events_per_record: int,
+    n_sessions: int,
+    codec: str = "binary",
+) -> Dict[str, Any]:
+    """
+    Kinesis Lambda event with aggregated records, as sent by the fog.
+    """
+    records: List[Dict[str, Any]] = []
+    timestamp: str = datetime.utcnow().isoformat()
+    window_index: Dict[int, int] = {}
+
+    for r in range(n_records):
+        session: int = r % n_sessions
+        events: List[Dict[str, Any]] = []
+
+        for _ in range(events_per_record):
+            index = window_index.get(session, 0)
+            window_index[session] = index + 1
+            events.append(build_window_event(session, index, timestamp))
+
+        records.append(
+            encode_record(handler_module, r, f"patient_{session}", events, codec)
+        )
+
+    return {"Records": records}
+
+
+# ============================================================
+# Out-of-order replay check
+# ============================================================
+
+def deliver(handler_module: Any, records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Invoke the handler like Lambda does: on a partial failure, replay
+    the batch from the first failed record until nothing fails.
+    Returns the sequence numbers that had to be replayed.
+    """
+    replayed: List[str] = []
+    while records:
+        response = handler_module.handler({"Records": records}, None)
+        failed = [f["itemIdentifier"] for f in response["batchItemFailures"]]
+        if not failed:
+            break
+        first = min(failed)
+        replayed.append(first)
+        records = [r for r in records if r["kinesis"]["sequenceNumber"] >= first]
+    return replayed
+
+
+def check_out_of_order_replay(
+    handler_module: Any,
+    n_records: int = 10,
+    events_per_record: int = 3,
+    codec: str = "binary",
+) -> bool:
+    """
+    One session whose record 3 was rejected by PutRecords and resent
+    by the fog after records 4..9 (send_records retries only the failed
+    records), plus Lambda redeliveries and a throttled update.
+
+    Every window must be counted once in DynamoDB and stored once in S3.
+    """
+    s3 = RecordingS3Client()
+    dynamodb = StatefulDynamoDBClient(fail_updates=1)
+    handler_module.s3_client = s3
+    handler_module.dynamodb_client = dynamodb
+
+    timestamp: str = datetime.utcnow().isoformat()
+    records = [
+        encode_record(
+            handler_module,
+            r,
+            "patient_0",
+            [
+                build_window_event(0, r * events_per_record + i, timestamp)
+                for i in range(events_per_record)
+            ],
+            codec,
+        )
+        for r in range(n_records)
+    ]
+    # Stream order after the fog's partial retry: 0-2, 4-9, then 3
+    resent = encode_record(
+        handler_module,
+        n_records,
+        "patient_0",
+        [build_window_event(0, 3 * events_per_record + i, timestamp) for i in range(events_per_record)],
+        codec,
+    )
+    stream = records[:3] + records[4:] + [resent]
+
+    replayed = deliver(handler_module, stream[:5])       # first batch
+    replayed += deliver(handler_module, stream[5:])      # includes the late record
+    replayed += deliver(handler_module, stream[:5])      # redelivery of a processed batch
+    replayed += deliver(handler_module, stream[3:])      # overlapping redelivery
+
+    n_windows: int = n_records * events_per_record
+    expected_suspected: int = sum(1 for w in range(n_windows) if w % 7 == 0)
+    item = dynamodb.items[("patient_0", str(uuid.UUID(int=0)))]
+    stored = sorted(w for windows in s3.windows.values() for _, w in windows)
+
+    ok = (
+        item["windows_total"] == n_windows
+        and item["suspected_windows"] == expected_suspected
+        and stored == list(range(n_windows))
+    )
+    print(
+        f"[CHECK] out-of-order replay: windows_total={item['windows_total']}/{n_windows} "
+        f"suspected={item['suspected_windows']}/{expected_suspected} "
+        f"s3 windows={len(stored)} (unique {len(set(stored))}) "
+        f"committed={item['committed_windows']} "
+        f"lambda replays={len(replayed)} -> {'OK' if ok else 'FAILED'}"
+    )
+    return ok
+
+
+# ============================================================
+# Benchmark
+# ============================================================
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay a synthetic Kinesis batch against the consumer Lambda"
+    )
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--events-per-record", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=0.0)
+    parser.add_argument("--codec", choices=("binary", "json"), default="binary",
+                        help="Event wire format (fog/pipeline/event_schema.py)")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="Handler LOG_LEVEL (DEBUG shows the cost of per-event logs)")
+    parser.add_argument("--replay-check", action="store_true",
+                        help="Check exactly-once counting under out-of-order redelivery, then exit")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    handler_module = load_handler(args.log_level)
+
+    if args.replay_check:
+        sys.exit(0 if check_out_of_order_replay(handler_module, codec=args.codec) else 1)
+
+    s3 = StubS3Client(args.s3_latency_ms / 1000.0)
+    dynamodb = StubDynamoDBClient(args.dynamodb_latency_ms / 1000.0)
+    handler_module.s3_client = s3
+    handler_module.dynamodb_client = dynamodb
+
+    batch = build_kinesis_batch(
+        handler_module, args.records, args.events_per_record, args.sessions,
+        args.codec,
+    )
+    n_events: int = args.records * args.events_per_record
+
+    for _ in range(args.warmup):
+        handler_module.handler(batch, None)
+
+    latencies: List[float] = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        handler_module.handler(batch, None)
+        latencies.append(time.perf_counter() - start)
+
+    p50 = _percentile(latencies, 0.50)
+    p95 = _percentile(latencies, 0.95)
+
+    print(
+        f"[BENCH] records={args.records} events={n_events} "
+        f"sessions={args.sessions} codec={args.codec} log_level={args.log_level}"
+    )
+    print(f"[BENCH] per batch   p50={p50 * 1e3:.2f} ms  p95={p95 * 1e3:.2f} ms")
+    print(f"[BENCH] per record  p50={p50 / args.records * 1e6:.1f} us")
+    print(f"[BENCH] per event   p50={p50 / n_events * 1e6:.1f} us")
+    print(
+        f"[BENCH] AWS calls per batch: "
+        f"s3={s3.calls // (args.warmup + args.iterations)} "
+        f"dynamodb={dynamodb.calls // (args.warmup + args.iterations)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+kinesis_load_test.py
+
+Prueba de carga local para elegir los parámetros del event source
+mapping Kinesis → Lambda (Pulumi.<stack>.yaml: consumerBatchSize,
+consumerMaxBatchingWindowSeconds, consumerParallelizationFactor,
+kinesisStreamMode / kinesisShardCount, kinesisEnhancedFanOut).
+
+Responsabilidades:
+- Generar un flujo sintético de eventos del fog (N pacientes, ritmo de
+  ventanas, eventos agregados por registro) durante un tiempo simulado
+- Repartir los registros en shards (hash MD5 de la partition key, como
+  Kinesis) y, dentro de cada shard, en lotes concurrentes según el
+  factor de paralelización (mismo paciente → mismo lote, en orden)
+- Formar los lotes como el event source mapping (se cierra al llenar
+  batch size o al vencer la ventana de batching) e invocar el handler
+  real con stubs en memoria de S3 y DynamoDB
+- Reportar invocaciones, registros por invocación, latencia extremo a
+  extremo (p50 / p95) y coste estimado de Lambda por millón de eventos
+
+El tiempo es simulado: el coste de CPU del handler se mide de verdad y
+se escala a la CPU que Lambda asigna a la memoria configurada
+(1769 MB = 1 vCPU); la latencia de S3 / DynamoDB es un parámetro.
+
+NO realiza:
+- Llamadas a AWS
+- Estimación del coste de Kinesis (shards, enhanced fan-out), S3 o DynamoDB
+
+Uso:
+    python cloud/benchmarks/kinesis_load_test.py --patients 32 --duration 120
+    python cloud/benchmarks/kinesis_load_test.py --batch-sizes 100 --parallelization-factors 1 2 --enhanced-fan-out
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from kinesis_consumer_benchmark import (
+    StubDynamoDBClient,
+    StubS3Client,
+    build_window_event,
+    encode_record,
+    load_handler,
+)
+
+# ============================================================
+# Lambda / Kinesis model
+# ============================================================
+
+# Lambda allocates one full vCPU at 1769 MB, proportionally below
+LAMBDA_VCPU_MB: int = 1769
+LAMBDA_PRICE_PER_REQUEST: float = 0.20 / 1_000_000
+LAMBDA_PRICE_PER_GB_SECOND: float = 0.0000166667
+
+# Shared-throughput iterators: Lambda polls each shard about once a second
+STANDARD_POLL_SECONDS: float = 1.0
+# Enhanced fan-out pushes records over HTTP/2
+EFO_PROPAGATION_SECONDS: float = 0.07
+
+ON_DEMAND_INITIAL_SHARDS: int = 4
+
+
+@dataclass(frozen=True)
+class SimRecord:
+    arrival: float
+    key_hash: int
+    n_events: int
+    record: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class LoadTestResult:
+    batch_size: int
+    batching_window: int
+    parallelization_factor: int
+    invocations: int
+    records_per_invocation: float
+    p50_latency: float
+    p95_latency: float
+    cost_per_million_events: float
+
+
+# ============================================================
+# Synthetic stream
+# ============================================================
+
+def generate_records(
+    handler_module: Any,
+    patients: int,
+    windows_per_second: float,
+    events_per_record: int,
+    duration_seconds: float,
+) -> List[SimRecord]:
+    """
+    Records of every patient over the simulated duration, by arrival.
+
+    Each patient emits one record (events_per_record windows) every
+    events_per_record / windows_per_second seconds, staggered so that
+    patients do not publish in lockstep.
+    """
+    interval: float = events_per_record / windows_per_second
+    timestamp: str = datetime.utcnow().isoformat()
+    pending: List[Tuple[float, int, List[Dict[str, Any]]]] = []
+
+    for patient in range(patients):
+        arrival: float = interval * patient / patients
+        window_index: int = 0
+        while arrival < duration_seconds:
+            events = [
+                build_window_event(patient, window_index + i, timestamp)
+                for i in range(events_per_record)
+            ]
+            pending.append((arrival, patient, events))
+            window_index += events_per_record
+            arrival += interval
+
+    pending.sort(key=lambda item: item[0])
+
+    records: List[SimRecord] = []
+    for sequence_number, (arrival, patient, events) in enumerate(pending):
+        partition_key: str = f"patient_{patient}"
+        records.append(
+            SimRecord(
+                arrival=arrival,
+                key_hash=int(hashlib.md5(partition_key.encode("utf-8")).hexdigest(), 16),
+                n_events=len(events),
+                record=encode_record(handler_module, sequence_number, partition_key, events),
+            )
+        )
+
+    return records
+
+
+# ============================================================
+# Event source mapping simulation
+# ============================================================
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _invoke(
+    handler_module: Any,
+    batch: List[SimRecord],
+    memory_mb: int,
+    s3_latency: float,
+    dynamodb_latency: float,
+    invoke_overhead: float,
+) -> float:
+    """
+    Run the real handler on a batch; return its modeled duration.
+    """
+    start = time.perf_counter()
+    result = handler_module.handler({"Records": [r.record for r in batch]}, None)
+    cpu_seconds: float = time.perf_counter() - start
+
+    # S3 writes are sequential; UpdateItems run DYNAMO_MAX_WORKERS at a
+    # time after one BatchGetItem
+    dynamodb_rounds: int = 1 + math.ceil(
+        result["dynamodb_updates"] / handler_module.DYNAMO_MAX_WORKERS
+    )
+    return (
+        invoke_overhead
+        + cpu_seconds * max(1.0, LAMBDA_VCPU_MB / memory_mb)
+        + s3_latency * result["s3_objects"]
+        + dynamodb_latency * dynamodb_rounds
+    )
+
+
+def simulate(
+    handler_module: Any,
+    records: List[SimRecord],
+    batch_size: int,
+    batching_window: int,
+    parallelization_factor: int,
+    shards: int,
+    enhanced_fan_out: bool,
+    memory_mb: int,
+    s3_latency: float,
+    dynamodb_latency: float,
+    invoke_overhead: float,
+) -> LoadTestResult:
+    """
+    Replay the records through one event source mapping configuration.
+
+    Every (shard, lane) is an ordered queue processed one batch at a
+    time: a batch opens when the lane is free and a record is visible,
+    and closes when batch_size records are visible or the batching
+    window expires.
+    """
+    lanes: Dict[Tuple[int, int], List[SimRecord]] = {}
+    for record in records:
+        shard: int = (record.key_hash * shards) >> 128
+        lane: int = record.key_hash % parallelization_factor
+        lanes.setdefault((shard, lane), []).append(record)
+
+    latencies: List[float] = []
+    invocations: int = 0
+    gb_seconds: float = 0.0
+
+    for queue in lanes.values():
+        if enhanced_fan_out:
+            visible = [r.arrival + EFO_PROPAGATION_SECONDS for r in queue]
+        else:
+            visible = [
+                math.ceil(r.arrival / STANDARD_POLL_SECONDS) * STANDARD_POLL_SECONDS
+                for r in queue
+            ]
+
+        free: float = 0.0
+        i: int = 0
+        while i < len(queue):
+            opened: float = max(free, visible[i])
+            closes: float = opened
+            if batching_window > 0:
+                last_needed: int = i + batch_size - 1
+                closes = opened + batching_window
+                if last_needed < len(queue):
+                    closes = min(closes, max(opened, visible[last_needed]))
+
+            j: int = i
+            while j < len(queue) and j - i < batch_size and visible[j] <= closes:
+                j += 1
+
+            batch = queue[i:j]
+            duration = _invoke(
+                handler_module, batch, memory_mb, s3_latency, dynamodb_latency, invoke_overhead
+            )
+            finished: float = closes + duration
+
+            for r in batch:
+                latencies.extend([finished - r.arrival] * r.n_events)
+
+            invocations += 1
+            gb_seconds += math.ceil(duration * 1000) / 1000 * memory_mb / 1024
+            free = finished
+            i = j
+
+    n_events: int = len(latencies)
+    cost: float = invocations * LAMBDA_PRICE_PER_REQUEST + gb_seconds * LAMBDA_PRICE_PER_GB_SECOND
+
+    return LoadTestResult(
+        batch_size=batch_size,
+        batching_window=batching_window,
+        parallelization_factor=parallelization_factor,
+        invocations=invocations,
+        records_per_invocation=len(records) / max(1, invocations),
+        p50_latency=_percentile(latencies, 0.50),
+        p95_latency=_percentile(latencies, 0.95),
+        cost_per_million_events=cost / max(1, n_events) * 1_000_000,
+    )
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pick Kinesis → Lambda event source settings with a local load test"
+    )
+    parser.add_argument("--patients", type=int, default=32)
+    parser.add_argument("--windows-per-second", type=float, default=1.0,
+                        help="Windows per patient per second (1.0: 4 s windows, 1 s hop)")
+    parser.add_argument("--events-per-record", type=int, default=1,
+                        help="Windows aggregated per Kinesis record by the fog")
+    parser.add_argument("--duration", type=float, default=120.0,
+                        help="Simulated seconds of traffic")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[5, 25, 100, 500])
+    parser.add_argument("--batching-windows", type=int, nargs="+", default=[0, 1, 5])
+    parser.add_argument("--parallelization-factors", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--stream-mode", choices=["PROVISIONED", "ON_DEMAND"],
+                        default="PROVISIONED")
+    parser.add_argument("--shards", type=int, default=None,
+                        help=f"Default: 1 (PROVISIONED), {ON_DEMAND_INITIAL_SHARDS} (ON_DEMAND)")
+    parser.add_argument("--enhanced-fan-out", action="store_true")
+    parser.add_argument("--memory-mb", type=int, default=256)
+    parser.add_argument("--s3-latency-ms", type=float, default=30.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=8.0)
+    parser.add_argument("--invoke-overhead-ms", type=float, default=5.0)
+    parser.add_argument("--latency-budget", type=float, default=5.0,
+                        help="p95 end-to-end seconds allowed when recommending")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    shards: int = args.shards or (
+        ON_DEMAND_INITIAL_SHARDS if args.stream_mode == "ON_DEMAND" else 1
+    )
+
+    handler_module = load_handler()
+    handler_module.s3_client = StubS3Client()
+    handler_module.dynamodb_client = StubDynamoDBClient()
+
+    records = generate_records(
+        handler_module,
+        args.patients,
+        args.windows_per_second,
+        args.events_per_record,
+        args.duration,
+    )
+    n_events: int = sum(r.n_events for r in records)
+    print(
+        f"[LOAD] {len(records)} records / {n_events} events over {args.duration:.0f} s "
+        f"({n_events / args.duration:.1f} events/s), {args.stream_mode} x{shards} shards, "
+        f"{'enhanced fan-out' if args.enhanced_fan_out else 'shared throughput'}, "
+        f"{args.memory_mb} MB"
+    )
+    print(
+        f"{'batch':>6} {'window':>6} {'pf':>3} {'invocations':>12} {'rec/inv':>8} "
+        f"{'p50 s':>7} {'p95 s':>7} {'$/1M events':>12}"
+    )
+
+    results: List[LoadTestResult] = []
+    for batch_size in args.batch_sizes:
+        for batching_window in args.batching_windows:
+            for factor in args.parallelization_factors:
+                result = simulate(
+                    handler_module,
+                    records,
+                    batch_size=batch_size,
+                    batching_window=batching_window,
+                    parallelization_factor=factor,
+                    shards=shards,
+                    enhanced_fan_out=args.enhanced_fan_out,
+                    memory_mb=args.memory_mb,
+                    s3_latency=args.s3_latency_ms / 1000.0,
+                    dynamodb_latency=args.dynamodb_latency_ms / 1000.0,
+                    invoke_overhead=args.invoke_overhead_ms / 1000.0,
+                )
+                results.append(result)
+                print(
+                    f"{batch_size:>6} {batching_window:>6} {factor:>3} "
+                    f"{result.invocations:>12} {result.records_per_invocation:>8.1f} "
+                    f"{result.p50_latency:>7.2f} {result.p95_latency:>7.2f} "
+                    f"{result.cost_per_million_events:>12.4f}"
+                )
+
+    within_budget = [r for r in results if r.p95_latency <= args.latency_budget]
+    best: Optional[LoadTestResult] = min(
+        within_budget, key=lambda r: r.cost_per_million_events, default=None
+    )
+    if best is None:
+        print(f"[LOAD] No configuration meets p95 <= {args.latency_budget:.1f} s")
+        return
+
+    print(
+        f"[LOAD] Cheapest with p95 <= {args.latency_budget:.1f} s: "
+        f"consumerBatchSize={best.batch_size} "
+        f"consumerMaxBatchingWindowSeconds={best.batching_window} "
+        f"consumerParallelizationFactor={best.parallelization_factor}"
+    )
+
+
+if __name__ == "__main__":
+    main()
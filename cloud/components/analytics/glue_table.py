@@ -10,6 +10,10 @@ import pulumi_aws as aws
 # ============================================================
 
 GLUE_TABLE_NAME: Final[str] = "eeg_window_events"
+PARQUET_TABLE_NAME: Final[str] = "eeg_window_events_parquet"
+
+# Written by the events compactor Lambda (lambda_src/events_compactor)
+PARQUET_PREFIX: Final[str] = "events_parquet"
 
 # ============================================================
 # Glue Table
@@ -22,6 +26,10 @@ def create_glue_table(
 ) -> aws.glue.CatalogTable:
     """
     Creates a Glue Catalog Table over EEG window-level JSON events stored in S3.
+
+    The consumer Lambda writes one gzip-compressed JSONL object per
+    (date, patient, session) and batch; Athena decompresses *.gz
+    transparently.
     """
 
     table: aws.glue.CatalogTable = aws.glue.CatalogTable(
@@ -31,6 +39,7 @@ def create_glue_table(
         table_type="EXTERNAL_TABLE",
         parameters={
             "classification": "json",
+            "compressionType": "gzip",
         },
         storage_descriptor=aws.glue.CatalogTableStorageDescriptorArgs(
             location=data_lake_bucket_name.apply(
@@ -51,8 +60,11 @@ def create_glue_table(
                 {"name": "session_id", "type": "string"},
                 {"name": "window_index", "type": "int"},
                 {"name": "score", "type": "double"},
+                {"name": "smoothed_score", "type": "double"},
                 {"name": "suspected", "type": "boolean"},
-                {"name": "timestamp", "type": "string"},
+                # ISO-8601 with "T" separator, not a Hive timestamp literal
+                {"name": "timestamp_utc", "type": "string"},
+                {"name": "event_version", "type": "int"},
             ],
         ),
     )
@@ -60,3 +72,78 @@ def create_glue_table(
     pulumi.export("glue_table_name", table.name)
 
     return table
+
+
+def create_parquet_glue_table(
+    *,
+    database_name: pulumi.Input[str],
+    data_lake_bucket_name: pulumi.Input[str],
+) -> aws.glue.CatalogTable:
+    """
+    Creates a Glue Catalog Table over the compacted Parquet (Snappy)
+    events, partitioned by dt and patient_id.
+
+    Partitions are registered in the catalog by the compactor Lambda
+    (BatchCreatePartition) when it writes them, so no crawler, no MSCK
+    REPAIR and no list of known patients: a new patient is queryable
+    after its first compaction. Queries filtering on dt / patient_id
+    only read the matching prefixes, and only the referenced columns.
+
+    Parameters
+    ----------
+    database_name : pulumi.Input[str]
+        Glue database.
+    data_lake_bucket_name : pulumi.Input[str]
+        Data lake bucket holding events_parquet/.
+
+    Returns
+    -------
+    aws.glue.CatalogTable
+        The created table.
+    """
+
+    location: pulumi.Output[str] = pulumi.Output.from_input(
+        data_lake_bucket_name
+    ).apply(lambda b: f"s3://{b}/{PARQUET_PREFIX}/")
+
+    table: aws.glue.CatalogTable = aws.glue.CatalogTable(
+        resource_name="eegSeizureEventsParquetTable",
+        database_name=database_name,
+        name=PARQUET_TABLE_NAME,
+        table_type="EXTERNAL_TABLE",
+        parameters={
+            "classification": "parquet",
+            "parquet.compression": "SNAPPY",
+            "EXTERNAL": "TRUE",
+        },
+        partition_keys=[
+            {"name": "dt", "type": "string"},
+            {"name": "patient_id", "type": "string"},
+        ],
+        storage_descriptor=aws.glue.CatalogTableStorageDescriptorArgs(
+            location=location,
+            input_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+            output_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+            ser_de_info={
+                "serializationLibrary": "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+                "parameters": {
+                    "serialization.format": "1",
+                },
+            },
+            columns=[
+                {"name": "event_type", "type": "string"},
+                {"name": "room_id", "type": "string"},
+                {"name": "session_id", "type": "string"},
+                {"name": "window_index", "type": "int"},
+                {"name": "score", "type": "double"},
+                {"name": "smoothed_score", "type": "double"},
+                {"name": "suspected", "type": "boolean"},
+                {"name": "timestamp_utc", "type": "timestamp"},
+                {"name": "event_version", "type": "int"},
+            ],
+        ),
+    )
+
+    pulumi.export("glue_parquet_table_name", table.name)
+
+    return table
@@ -17,10 +17,10 @@ ORDER BY suspected_windows DESC;
 --- ¿Cuántas sesiones activas por día?
 /*
 SELECT
-    DATE(substr(timestamp, 1, 10)) AS event_date,
+    DATE(substr(timestamp_utc, 1, 10)) AS event_date,
     COUNT(DISTINCT session_id) AS active_sessions
 FROM eeg_seizure_events_db.eeg_window_events
-GROUP BY DATE(substr(timestamp, 1, 10))
+GROUP BY DATE(substr(timestamp_utc, 1, 10))
 ORDER BY event_date;
 
 
@@ -43,12 +43,12 @@ ORDER BY suspected_events DESC;
 --- detectar patrones temporales (pre-ictales).
 /*
 SELECT
-    substr(timestamp, 1, 13) AS hour_bucket,
+    substr(timestamp_utc, 1, 13) AS hour_bucket,
     AVG(score) AS avg_score,
     MAX(score) AS max_score
 FROM eeg_seizure_events_db.eeg_window_events
 WHERE suspected = true
-GROUP BY substr(timestamp, 1, 13)
+GROUP BY substr(timestamp_utc, 1, 13)
 ORDER BY hour_bucket;
 */
 
@@ -79,3 +79,47 @@ FROM eeg_seizure_events_db.eeg_window_events
 GROUP BY patient_id, session_id
 ORDER BY max_score DESC;
 
+
+
+--- ============================================================
+--- Lago Parquet (eeg_window_events_parquet)
+--- Particiones dt / patient_id registradas por el compactor en Glue:
+--- filtrar por ellas hace que Athena solo lea esos prefijos, y
+--- Parquet solo las columnas usadas.
+--- ============================================================
+
+--- Ventanas sospechosas por paciente en la última semana
+/*
+SELECT
+    patient_id,
+    COUNT(*) AS suspected_windows
+FROM eeg_seizure_events_db.eeg_window_events_parquet
+WHERE dt >= date_format(current_date - INTERVAL '7' DAY, '%Y-%m-%d')
+  AND suspected = true
+GROUP BY patient_id
+ORDER BY suspected_windows DESC;
+*/
+
+--- Sesiones activas por día
+/*
+SELECT
+    dt,
+    COUNT(DISTINCT session_id) AS active_sessions
+FROM eeg_seizure_events_db.eeg_window_events_parquet
+WHERE dt BETWEEN '2026-01-01' AND '2026-01-31'
+GROUP BY dt
+ORDER BY dt;
+*/
+
+--- Evolución horaria del score de un paciente en un día
+/*
+SELECT
+    date_trunc('hour', timestamp_utc) AS hour_bucket,
+    AVG(score) AS avg_score,
+    MAX(score) AS max_score
+FROM eeg_seizure_events_db.eeg_window_events_parquet
+WHERE dt = '2026-01-15'
+  AND patient_id = 'aaaaadsz'
+GROUP BY date_trunc('hour', timestamp_utc)
+ORDER BY hour_bucket;
+*/
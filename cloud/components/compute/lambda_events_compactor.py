@@ -0,0 +1,89 @@
+# components/compute/lambda_events_compactor.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Final
+
+import pulumi
+import pulumi_aws as aws
+
+LAMBDA_NAME: Final[str] = "eeg-seizure-events-compactor"
+LAMBDA_HANDLER: Final[str] = "handler.handler"
+LAMBDA_RUNTIME: Final[str] = "python3.11"
+
+# Compacts yesterday and today; today's Parquet lags at most one period
+COMPACTION_SCHEDULE: Final[str] = "rate(1 hour)"
+
+
+@dataclass(frozen=True)
+class EventsCompactorLambdaArgs:
+    role_arn: pulumi.Input[str]
+    data_lake_bucket_name: pulumi.Input[str]
+    # Table whose (dt, patient_id) partitions the compactor registers
+    glue_database_name: pulumi.Input[str]
+    glue_table_name: pulumi.Input[str]
+    # Layer providing pyarrow (e.g. AWS SDK for pandas, python3.11);
+    # the handler imports it at module load
+    pyarrow_layer_arn: pulumi.Input[str]
+    schedule_expression: str = COMPACTION_SCHEDULE
+
+
+def create_events_compactor_lambda(
+    args: EventsCompactorLambdaArgs,
+) -> aws.lambda_.Function:
+    """
+    Scheduled Lambda that rolls the raw JSON events into Parquet
+    (Snappy), one file per (dt, patient_id), and registers each
+    partition in the Glue table.
+    """
+
+    fn: aws.lambda_.Function = aws.lambda_.Function(
+        resource_name="eegSeizureEventsCompactorLambda",
+        name=LAMBDA_NAME,
+        role=args.role_arn,
+        runtime=LAMBDA_RUNTIME,
+        handler=LAMBDA_HANDLER,
+        timeout=300,
+        memory_size=1024,
+        code=pulumi.AssetArchive(
+            {
+                ".": pulumi.FileArchive("lambda_src/events_compactor"),
+            }
+        ),
+        layers=[args.pyarrow_layer_arn],
+        environment=aws.lambda_.FunctionEnvironmentArgs(
+            variables={
+                "DATA_LAKE_BUCKET": args.data_lake_bucket_name,
+                "GLUE_DATABASE": args.glue_database_name,
+                "GLUE_TABLE": args.glue_table_name,
+            }
+        ),
+        tags={
+            "Project": "EEGSeizureFogCloudAnalyticsPipeline",
+            "Layer": "Analytics",
+            "Purpose": "EventsCompaction",
+            "ManagedBy": "Pulumi",
+            "Environment": pulumi.get_stack(),
+        },
+    )
+
+    rule: aws.cloudwatch.EventRule = aws.cloudwatch.EventRule(
+        resource_name="eegSeizureEventsCompactorSchedule",
+        schedule_expression=args.schedule_expression,
+    )
+
+    aws.lambda_.Permission(
+        resource_name="eegSeizureEventsCompactorInvoke",
+        action="lambda:InvokeFunction",
+        function=fn.name,
+        principal="events.amazonaws.com",
+        source_arn=rule.arn,
+    )
+
+    aws.cloudwatch.EventTarget(
+        resource_name="eegSeizureEventsCompactorTarget",
+        rule=rule.name,
+        arn=fn.arn,
+    )
+
+    return fn
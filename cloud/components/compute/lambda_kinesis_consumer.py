@@ -12,6 +12,14 @@ LAMBDA_FUNCTION_NAME: Final[str] = "eeg-seizure-kinesis-consumer"
 LAMBDA_HANDLER: Final[str] = "handler.handler"
 LAMBDA_RUNTIME: Final[str] = "python3.11"
 
+# INFO: one batch_metrics line per invocation; DEBUG: every event
+LAMBDA_LOG_LEVEL: Final[str] = "INFO"
+
+# Event codec and aggregation container shared with the fog, shipped
+# next to handler.py (paths relative to cloud/, where `pulumi up` runs)
+EVENT_SCHEMA_SOURCE: Final[str] = "../fog/pipeline/event_schema.py"
+AGGREGATION_SOURCE: Final[str] = "../fog/pipeline/aggregation.py"
+
 
 def create_kinesis_consumer_lambda(
     *,
@@ -42,11 +50,16 @@ def create_kinesis_consumer_lambda(
             {
                 ".": pulumi.FileArchive(
                     "lambda_src/kinesis_consumer"
-                )
+                ),
+                "event_schema.py": pulumi.FileAsset(EVENT_SCHEMA_SOURCE),
+                "aggregation.py": pulumi.FileAsset(AGGREGATION_SOURCE),
             }
         ),
         timeout=30,
         memory_size=256,
+        environment=aws.lambda_.FunctionEnvironmentArgs(
+            variables={"LOG_LEVEL": LAMBDA_LOG_LEVEL},
+        ),
         tags={
             "Project": "EEGSeizureFogCloudAnalyticsPipeline",
             "Layer": "Compute",
@@ -0,0 +1,99 @@
+# components/security/iam_events_compactor_role.py
+from __future__ import annotations
+
+from typing import Final
+
+import pulumi
+import pulumi_aws as aws
+
+ROLE_NAME: Final[str] = "eeg-seizure-events-compactor-role"
+
+
+def create_events_compactor_role(
+    *,
+    data_lake_bucket: aws.s3.Bucket,
+    glue_table: aws.glue.CatalogTable,
+) -> aws.iam.Role:
+    """
+    IAM Role for the compactor: read events/, write events_parquet/,
+    register partitions of the Parquet Glue table.
+    """
+
+    role: aws.iam.Role = aws.iam.Role(
+        resource_name="eegSeizureEventsCompactorRole",
+        name=ROLE_NAME,
+        assume_role_policy=aws.iam.get_policy_document(
+            statements=[
+                aws.iam.GetPolicyDocumentStatementArgs(
+                    effect="Allow",
+                    principals=[
+                        aws.iam.GetPolicyDocumentStatementPrincipalArgs(
+                            type="Service",
+                            identifiers=["lambda.amazonaws.com"],
+                        )
+                    ],
+                    actions=["sts:AssumeRole"],
+                )
+            ]
+        ).json,
+        tags={
+            "Project": "EEGSeizureFogCloudAnalyticsPipeline",
+            "ManagedBy": "Pulumi",
+            "Environment": pulumi.get_stack(),
+        },
+    )
+
+    aws.iam.RolePolicyAttachment(
+        resource_name="eegSeizureEventsCompactorBasicExecution",
+        role=role.name,
+        policy_arn="arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
+    )
+
+    aws.iam.RolePolicy(
+        resource_name="eegSeizureEventsCompactorS3",
+        role=role.id,
+        policy=data_lake_bucket.arn.apply(
+            lambda arn: aws.iam.get_policy_document(
+                statements=[
+                    aws.iam.GetPolicyDocumentStatementArgs(
+                        effect="Allow",
+                        actions=["s3:ListBucket"],
+                        resources=[arn],
+                    ),
+                    aws.iam.GetPolicyDocumentStatementArgs(
+                        effect="Allow",
+                        actions=["s3:GetObject"],
+                        resources=[f"{arn}/events/*"],
+                    ),
+                    aws.iam.GetPolicyDocumentStatementArgs(
+                        effect="Allow",
+                        actions=["s3:PutObject"],
+                        resources=[f"{arn}/events_parquet/*"],
+                    ),
+                ]
+            ).json
+        ),
+    )
+
+    aws.iam.RolePolicy(
+        resource_name="eegSeizureEventsCompactorGlue",
+        role=role.id,
+        policy=glue_table.arn.apply(
+            lambda arn: aws.iam.get_policy_document(
+                statements=[
+                    aws.iam.GetPolicyDocumentStatementArgs(
+                        effect="Allow",
+                        actions=["glue:GetTable", "glue:BatchCreatePartition"],
+                        resources=[
+                            # arn:aws:glue:<region>:<account>:table/<db>/<table>
+                            arn.split(":table/")[0] + ":catalog",
+                            arn.replace(":table/", ":database/").rsplit("/", 1)[0],
+                            arn,
+                        ],
+                    ),
+                ]
+            ).json
+        ),
+    )
+
+    return role
@@ -91,22 +91,38 @@ def create_kinesis_consumer_lambda_role(
                         "kinesis:GetRecords",
                         "kinesis:GetShardIterator",
                         "kinesis:DescribeStream",
+                        "kinesis:DescribeStreamSummary",
+                        "kinesis:ListShards",
                         "kinesis:ListStreams",
                     ],
                     resources=[kinesis_stream.arn],
                 ),
+                # Kinesis enhanced fan-out (when a stream consumer is used)
+                aws.iam.GetPolicyDocumentStatementArgs(
+                    effect="Allow",
+                    actions=[
+                        "kinesis:SubscribeToShard",
+                        "kinesis:DescribeStreamConsumer",
+                    ],
+                    resources=[
+                        kinesis_stream.arn,
+                        kinesis_stream.arn.apply(lambda arn: f"{arn}/consumer/*"),
+                    ],
+                ),
                 # S3 write (data lake)
                 aws.iam.GetPolicyDocumentStatementArgs(
                     effect="Allow",
                     actions=["s3:PutObject"],
                     resources=[data_lake_bucket.arn.apply(lambda arn: f"{arn}/*")],
                 ),
-                # DynamoDB write/update (session state)
+                # DynamoDB write/update (session state) and idempotency
+                # reads (last counted window per session)
                 aws.iam.GetPolicyDocumentStatementArgs(
                     effect="Allow",
                     actions=[
                         "dynamodb:PutItem",
                         "dynamodb:UpdateItem",
+                        "dynamodb:BatchGetItem",
                     ],
                     resources=[session_state_table.arn],
                 ),
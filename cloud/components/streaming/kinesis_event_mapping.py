@@ -1,5 +1,7 @@
-from typing import Final
+from dataclasses import dataclass
+from typing import Final, List, Optional
 
+import pulumi
 import pulumi_aws as aws
 
 
@@ -7,24 +9,105 @@ import pulumi_aws as aws
 # Constants
 # ============================================================
 
-BATCH_SIZE: Final[int] = 5
+# Records per invocation; the fog already aggregates several windows
+# per record, so each record carries more than one event
+BATCH_SIZE: Final[int] = 100
+MAXIMUM_BATCHING_WINDOW_SECONDS: Final[int] = 1
+PARALLELIZATION_FACTOR: Final[int] = 1
 STARTING_POSITION: Final[str] = "LATEST"
 
+# The consumer returns batchItemFailures: Lambda resumes the shard from
+# the first failed record instead of retrying the whole batch
+FUNCTION_RESPONSE_TYPES: Final[List[str]] = ["ReportBatchItemFailures"]
+
+
+@dataclass(frozen=True)
+class KinesisEventMappingSettings:
+    """
+    Event source throughput knobs (Pulumi stack config).
+
+    parallelization_factor runs up to N concurrent batches per shard;
+    records with the same partition key (patient) stay in order, which
+    the consumer's idempotency relies on.
+    """
+
+    batch_size: int = BATCH_SIZE
+    maximum_batching_window_seconds: int = MAXIMUM_BATCHING_WINDOW_SECONDS
+    parallelization_factor: int = PARALLELIZATION_FACTOR
+    bisect_batch_on_function_error: bool = True
+    # -1: retry until the record expires from the stream
+    maximum_retry_attempts: int = -1
+
+
+def load_event_mapping_settings(
+    config: Optional[pulumi.Config] = None,
+) -> KinesisEventMappingSettings:
+    """
+    Read the event source settings from the stack configuration.
+
+    Keys (all optional): consumerBatchSize,
+    consumerMaxBatchingWindowSeconds, consumerParallelizationFactor,
+    consumerBisectOnError, consumerMaxRetryAttempts.
+    """
+    config = config or pulumi.Config()
+    defaults = KinesisEventMappingSettings()
+
+    def _int(key: str, default: int) -> int:
+        value = config.get_int(key)
+        return default if value is None else value
+
+    bisect = config.get_bool("consumerBisectOnError")
+
+    settings = KinesisEventMappingSettings(
+        batch_size=_int("consumerBatchSize", defaults.batch_size),
+        maximum_batching_window_seconds=_int(
+            "consumerMaxBatchingWindowSeconds",
+            defaults.maximum_batching_window_seconds,
+        ),
+        parallelization_factor=_int(
+            "consumerParallelizationFactor", defaults.parallelization_factor
+        ),
+        bisect_batch_on_function_error=(
+            defaults.bisect_batch_on_function_error if bisect is None else bisect
+        ),
+        maximum_retry_attempts=_int(
+            "consumerMaxRetryAttempts", defaults.maximum_retry_attempts
+        ),
+    )
+
+    if not 1 <= settings.batch_size <= 10000:
+        raise ValueError("consumerBatchSize must be in [1, 10000]")
+    if not 0 <= settings.maximum_batching_window_seconds <= 300:
+        raise ValueError("consumerMaxBatchingWindowSeconds must be in [0, 300]")
+    if not 1 <= settings.parallelization_factor <= 10:
+        raise ValueError("consumerParallelizationFactor must be in [1, 10]")
+    if not -1 <= settings.maximum_retry_attempts <= 10000:
+        raise ValueError("consumerMaxRetryAttempts must be in [-1, 10000]")
+
+    return settings
+
 
 def create_kinesis_lambda_event_mapping(
     *,
-    kinesis_stream_arn: str,
-    lambda_function_arn: str,
+    kinesis_stream_arn: pulumi.Input[str],
+    lambda_function_arn: pulumi.Input[str],
+    settings: KinesisEventMappingSettings = KinesisEventMappingSettings(),
+    stream_consumer_arn: Optional[pulumi.Input[str]] = None,
 ) -> aws.lambda_.EventSourceMapping:
     """
     Connect a Kinesis Data Stream to a Lambda function.
 
     Parameters
     ----------
-    kinesis_stream_arn : str
+    kinesis_stream_arn : pulumi.Input[str]
         ARN of the Kinesis stream.
-    lambda_function_arn : str
+    lambda_function_arn : pulumi.Input[str]
         ARN of the Lambda function.
+    settings : KinesisEventMappingSettings
+        Batch size, batching window, parallelization and retries.
+    stream_consumer_arn : Optional[pulumi.Input[str]]
+        Enhanced fan-out consumer; if given it is used as event source
+        instead of the shared-throughput stream.
 
     Returns
     -------
@@ -34,10 +117,15 @@ def create_kinesis_lambda_event_mapping(
 
     mapping: aws.lambda_.EventSourceMapping = aws.lambda_.EventSourceMapping(
         resource_name="eegSeizureKinesisEventMapping",
-        event_source_arn=kinesis_stream_arn,
+        event_source_arn=stream_consumer_arn or kinesis_stream_arn,
         function_name=lambda_function_arn,
         starting_position=STARTING_POSITION,
-        batch_size=BATCH_SIZE,
+        batch_size=settings.batch_size,
+        maximum_batching_window_in_seconds=settings.maximum_batching_window_seconds,
+        parallelization_factor=settings.parallelization_factor,
+        bisect_batch_on_function_error=settings.bisect_batch_on_function_error,
+        maximum_retry_attempts=settings.maximum_retry_attempts,
+        function_response_types=FUNCTION_RESPONSE_TYPES,
         enabled=True,
     )
 
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.config import Config
+
+# ============================================================
+# Environment / constants
+# ============================================================
+
+DATA_LAKE_BUCKET = os.environ.get("DATA_LAKE_BUCKET", "eeg-seizure-data-lake")
+
+# Raw JSON written by the Kinesis consumer:
+#   events/YYYY/MM/DD/patient=<id>/session=<id>/windows-<n>.jsonl.gz
+# (older objects: .../window=<n>.json, one event each)
+EVENTS_PREFIX = "events"
+
+# Compacted layout, one Parquet file per (day, patient):
+#   events_parquet/dt=YYYY-MM-DD/patient_id=<id>/part-00000.snappy.parquet
+PARQUET_PREFIX = "events_parquet"
+PARQUET_FILE_NAME = "part-00000.snappy.parquet"
+
+# Glue table over events_parquet/; every (dt, patient_id) written is
+# registered as a partition, so a new patient is queryable right away
+GLUE_DATABASE = os.environ.get("GLUE_DATABASE", "eeg_seizure_events_db")
+GLUE_TABLE = os.environ.get("GLUE_TABLE", "eeg_window_events_parquet")
+
+# BatchCreatePartition accepts up to 100 partitions per call
+GLUE_BATCH_CREATE_LIMIT = 100
+
+# Concurrent GetObject calls while reading a day
+DOWNLOAD_WORKERS = 16
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+_PATIENT_RE = re.compile(r"/patient=([^/]+)/")
+
+# Columns of the Parquet files (dt and patient_id are partition keys,
+# taken from the path, not stored in the file)
+EVENT_SCHEMA = pa.schema(
+    [
+        ("event_type", pa.string()),
+        ("room_id", pa.string()),
+        ("session_id", pa.string()),
+        ("window_index", pa.int32()),
+        ("score", pa.float64()),
+        ("smoothed_score", pa.float64()),
+        ("suspected", pa.bool_()),
+        ("timestamp_utc", pa.timestamp("ms")),
+        # Raw objects written before event_version existed count as 1
+        ("event_version", pa.int32()),
+    ]
+)
+
+logger = logging.getLogger()
+logger.setLevel(LOG_LEVEL)
+
+# ============================================================
+# AWS clients
+# ============================================================
+
+s3_client = boto3.client(
+    "s3",
+    config=Config(
+        max_pool_connections=DOWNLOAD_WORKERS,
+        retries={"max_attempts": 5, "mode": "standard"},
+    ),
+)
+
+glue_client = boto3.client("glue", config=Config(retries={"max_attempts": 5, "mode": "standard"}))
+
+_download_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS)
+
+
+# ============================================================
+# Read raw JSON
+# ============================================================
+
+def list_day_objects(day: date) -> Dict[str, List[str]]:
+    """
+    Raw event object keys of one day, grouped by patient.
+    """
+    prefix: str = f"{EVENTS_PREFIX}/{day:%Y/%m/%d}/"
+    by_patient: Dict[str, List[str]] = {}
+
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=DATA_LAKE_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            match = _PATIENT_RE.search(obj["Key"])
+            if match:
+                by_patient.setdefault(match.group(1), []).append(obj["Key"])
+
+    return by_patient
+
+
+def read_events(key: str) -> List[Dict[str, Any]]:
+    """
+    Events of one raw object (gzip JSONL or plain JSON lines).
+    """
+    body: bytes = s3_client.get_object(Bucket=DATA_LAKE_BUCKET, Key=key)["Body"].read()
+    if key.endswith(".gz"):
+        body = gzip.decompress(body)
+
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+# ============================================================
+# Write Parquet
+# ============================================================
+
+def _parse_timestamp(event: Dict[str, Any]) -> Optional[datetime]:
+    value = event.get("timestamp_utc")
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def build_table(events: List[Dict[str, Any]]) -> pa.Table:
+    """
+    Arrow table of a patient's day, one row per (session, window),
+    sorted by session and window index.
+
+    A window stored twice (e.g. before the consumer deduplicated
+    retries) is kept once, last copy wins.
+    """
+    unique: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for event in events:
+        unique[(str(event["session_id"]), int(event["window_index"]))] = event
+
+    rows = [unique[key] for key in sorted(unique)]
+
+    return pa.table(
+        {
+            "event_type": [row.get("event_type") for row in rows],
+            "room_id": [row.get("room_id") for row in rows],
+            "session_id": [str(row["session_id"]) for row in rows],
+            "window_index": [int(row["window_index"]) for row in rows],
+            "score": [row.get("score") for row in rows],
+            "smoothed_score": [row.get("smoothed_score") for row in rows],
+            "suspected": [bool(row.get("suspected")) for row in rows],
+            "timestamp_utc": [_parse_timestamp(row) for row in rows],
+            "event_version": [int(row.get("event_version", 1)) for row in rows],
+        },
+        schema=EVENT_SCHEMA,
+    )
+
+
+def parquet_object_key(day: date, patient_id: str) -> str:
+    """
+    Deterministic key: re-compacting a day overwrites its files.
+    """
+    return (
+        f"{PARQUET_PREFIX}/"
+        f"dt={day:%Y-%m-%d}/"
+        f"patient_id={patient_id}/"
+        f"{PARQUET_FILE_NAME}"
+    )
+
+
+def write_parquet(day: date, patient_id: str, table: pa.Table) -> str:
+    """
+    Write one Snappy-compressed Parquet file for (day, patient).
+    """
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+
+    key: str = parquet_object_key(day, patient_id)
+    s3_client.put_object(
+        Bucket=DATA_LAKE_BUCKET,
+        Key=key,
+        Body=buffer.getvalue(),
+        ContentType="application/vnd.apache.parquet",
+    )
+    return key
+
+
+# ============================================================
+# Glue partitions
+# ============================================================
+
+def register_partitions(day: date, patient_ids: List[str]) -> int:
+    """
+    Register the (dt, patient_id) partitions of a compacted day in
+    Glue; partitions that already exist are left as they are.
+
+    Returns the number of partitions created.
+    """
+    if not patient_ids:
+        return 0
+
+    descriptor: Dict[str, Any] = glue_client.get_table(
+        DatabaseName=GLUE_DATABASE, Name=GLUE_TABLE
+    )["Table"]["StorageDescriptor"]
+    location: str = descriptor["Location"].rstrip("/")
+
+    created: int = 0
+    for start in range(0, len(patient_ids), GLUE_BATCH_CREATE_LIMIT):
+        chunk = patient_ids[start:start + GLUE_BATCH_CREATE_LIMIT]
+        response = glue_client.batch_create_partition(
+            DatabaseName=GLUE_DATABASE,
+            TableName=GLUE_TABLE,
+            PartitionInputList=[
+                {
+                    "Values": [f"{day:%Y-%m-%d}", patient_id],
+                    "StorageDescriptor": {
+                        **descriptor,
+                        "Location": f"{location}/dt={day:%Y-%m-%d}/patient_id={patient_id}/",
+                    },
+                }
+                for patient_id in chunk
+            ],
+        )
+
+        errors = response.get("Errors", [])
+        for error in errors:
+            if error["ErrorDetail"]["ErrorCode"] != "AlreadyExistsException":
+                logger.warning(
+                    "Could not register partition %s: %s",
+                    error["PartitionValues"], error["ErrorDetail"],
+                )
+        created += len(chunk) - len(errors)
+
+    return created
+
+
+# ============================================================
+# Compaction
+# ============================================================
+
+def compact_day(day: date) -> Dict[str, Any]:
+    """
+    Roll every raw JSON object of `day` into one Parquet file per
+    patient. Raw objects are kept (they remain the source of truth).
+    """
+    by_patient = list_day_objects(day)
+    stats: Dict[str, Any] = {"dt": day.isoformat(), "patients": 0, "objects": 0, "rows": 0}
+
+    for patient_id, keys in sorted(by_patient.items()):
+        events: List[Dict[str, Any]] = []
+        for batch in _download_executor.map(read_events, keys):
+            events.extend(batch)
+
+        table = build_table(events)
+        write_parquet(day, patient_id, table)
+
+        stats["patients"] += 1
+        stats["objects"] += len(keys)
+        stats["rows"] += table.num_rows
+
+    stats["new_partitions"] = register_partitions(day, sorted(by_patient))
+    return stats
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled compaction Lambda.
+
+    Compacts the days in event["dates"] ("YYYY-MM-DD"), or by default
+    yesterday and today (UTC), so late events of the previous day are
+    folded in and today's partition lags at most one schedule period.
+    """
+    if event.get("dates"):
+        days = [date.fromisoformat(d) for d in event["dates"]]
+    else:
+        today = datetime.utcnow().date()
+        days = [today - timedelta(days=1), today]
+
+    results = [compact_day(day) for day in days]
+    logger.info("compaction %s", json.dumps(results, separators=(",", ":")))
+
+    return {"statusCode": 200, "days": results}
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 import base64
+import bisect
+import gzip
 import json
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import boto3
-import os
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Shared with the fog (fog/pipeline/event_schema.py and aggregation.py),
+# packaged at the root of the Lambda zip
+import event_schema
+from aggregation import decode_aggregate
 
 # ============================================================
 # Environment / constants
@@ -15,80 +29,538 @@ import os
 RAW_EVENTS_BUCKET = "eeg-seizure-data-lake"
 DYNAMO_TABLE_NAME = "eeg-seizure-session-state"
 
+# One gzip JSONL object per (date, patient, session) and Lambda batch
+EVENTS_PREFIX = "events"
+
+# Records that can never be decoded are parked here instead of being
+# retried forever (which would stall the shard)
+QUARANTINE_PREFIX = "quarantine/kinesis"
+
+# Concurrent UpdateItem calls (one per session key in the batch)
+DYNAMO_MAX_WORKERS = 8
+
+# BatchGetItem accepts up to 100 keys per call
+DYNAMO_BATCH_GET_LIMIT = 100
+DYNAMO_BATCH_GET_ATTEMPTS = 3
+
+# DEBUG logs every decoded event; keep INFO (one summary line per batch)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Aggregated records (same format as fog/pipeline/aggregation.py):
+# MAGIC + container byte (b"L" length-prefixed | b"N" newline-delimited)
+
+logger = logging.getLogger()
+logger.setLevel(LOG_LEVEL)
+
 # ============================================================
-# AWS clients
+# AWS clients (created once per container, reused while warm)
 # ============================================================
 
-s3_client = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(DYNAMO_TABLE_NAME)
+# Keep-alive connections, pool sized for the DynamoDB thread pool,
+# short timeouts so a slow call is retried instead of eating the
+# Lambda timeout.
+BOTO_CONFIG = Config(
+    max_pool_connections=DYNAMO_MAX_WORKERS * 2,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+s3_client = boto3.client("s3", config=BOTO_CONFIG)
+# Low-level client: thread-safe, unlike boto3 resources
+dynamodb_client = boto3.client("dynamodb", config=BOTO_CONFIG)
+
+# Reused across warm invocations
+_dynamo_executor = ThreadPoolExecutor(max_workers=DYNAMO_MAX_WORKERS)
 
 
 # ============================================================
 # Helper functions
 # ============================================================
 
-def decode_kinesis_record(record: Dict[str, Any]) -> Dict[str, Any]:
+# Fields the consumer needs to partition, count and deduplicate
+REQUIRED_EVENT_FIELDS = ("patient_id", "session_id", "window_index", "suspected")
+
+# Decoding errors are deterministic: retrying the record cannot fix them
+DECODE_ERRORS = (ValueError, struct.error)
+
+# Errors from an AWS call; anything else is a bug and fails the batch
+AWS_ERRORS = (BotoCoreError, ClientError)
+
+
+def validate_event(event: Any) -> None:
+    """
+    Raise ValueError if the event cannot be partitioned or counted.
+    """
+    if not isinstance(event, dict):
+        raise ValueError(f"Event is not a JSON object: {type(event).__name__}")
+
+    missing = [field for field in REQUIRED_EVENT_FIELDS if field not in event]
+    if missing:
+        raise ValueError(f"Event missing fields: {missing}")
+
+    window_index = event["window_index"]
+    if isinstance(window_index, bool) or not isinstance(window_index, int) or window_index < 0:
+        raise ValueError(f"Invalid window_index: {window_index!r}")
+
+
+def decode_kinesis_record(record: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Decode a single Kinesis record into a JSON event.
+    Decode a single Kinesis record into its events (one event, or
+    several if the record is aggregated), binary or JSON, upgraded to
+    event_schema.EVENT_VERSION.
+
+    Raises ValueError (or struct.error) if the payload is malformed,
+    has an unsupported event_version, or an event lacks the fields this
+    consumer relies on.
     """
     payload_bytes: bytes = base64.b64decode(record["kinesis"]["data"])
-    payload_str: str = payload_bytes.decode("utf-8")
-    return json.loads(payload_str)
+    events = [event_schema.decode_event(payload) for payload in decode_aggregate(payload_bytes)]
+
+    for event in events:
+        validate_event(event)
+
+    return events
+
+
+# (sequence_number, event)
+DecodedEvent = Tuple[str, Dict[str, Any]]
+
+
+def decode_records(
+    records: List[Dict[str, Any]],
+) -> Tuple[List[DecodedEvent], List[Tuple[Dict[str, Any], str]]]:
+    """
+    Decode every record on its own, so one malformed record does not
+    fail the others.
+
+    Returns
+    -------
+    decoded : List[DecodedEvent]
+        (sequence_number, event) pairs in batch order.
+    poison : List[Tuple[Dict[str, Any], str]]
+        (record, error) for records that can never be decoded.
+    """
+    debug: bool = logger.isEnabledFor(logging.DEBUG)
+    decoded: List[DecodedEvent] = []
+    poison: List[Tuple[Dict[str, Any], str]] = []
+
+    for record in records:
+        sequence_number: str = record["kinesis"]["sequenceNumber"]
+        try:
+            events = decode_kinesis_record(record)
+        except DECODE_ERRORS as exc:
+            poison.append((record, f"{type(exc).__name__}: {exc}"))
+            continue
+
+        for eeg_event in events:
+            if debug:
+                logger.debug("Decoded EEG event: %s", json.dumps(eeg_event))
+            decoded.append((sequence_number, eeg_event))
+
+    return decoded, poison
+
+
+def store_poison_record(record: Dict[str, Any], error: str) -> str:
+    """
+    Park an undecodable record in S3 (raw data + error) so the shard
+    can move past it.
+    """
+    kinesis: Dict[str, Any] = record["kinesis"]
+    key: str = f"{QUARANTINE_PREFIX}/{kinesis['sequenceNumber']}.json"
+
+    s3_client.put_object(
+        Bucket=RAW_EVENTS_BUCKET,
+        Key=key,
+        Body=json.dumps(
+            {
+                "sequence_number": kinesis["sequenceNumber"],
+                "partition_key": kinesis.get("partitionKey"),
+                "error": error,
+                "data": kinesis["data"],
+            }
+        ).encode("utf-8"),
+        ContentType="application/json",
+    )
+    logger.warning("Quarantined record %s: %s", kinesis["sequenceNumber"], error)
+    return key
+
+
+# ============================================================
+# Idempotency (session_id + window_index)
+# ============================================================
+
+# (patient_id, session_id)
+SessionKey = Tuple[str, str]
+
+
+def session_key(event: Dict[str, Any]) -> SessionKey:
+    return str(event["patient_id"]), str(event["session_id"])
+
+
+# Committed windows of a session as sorted, disjoint, inclusive ranges
+WindowRanges = Tuple[Tuple[int, int], ...]
+
+
+def parse_window_ranges(text: str) -> WindowRanges:
+    """
+    "0-57,59-63" -> ((0, 57), (59, 63)); "" -> ().
+    """
+    if not text:
+        return ()
+    ranges: List[Tuple[int, int]] = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        ranges.append((int(first), int(last)))
+    return tuple(ranges)
+
+
+def format_window_ranges(ranges: WindowRanges) -> str:
+    return ",".join(f"{first}-{last}" for first, last in ranges)
+
+
+def merge_window_ranges(
+    ranges: WindowRanges,
+    window_indices: List[int],
+) -> WindowRanges:
+    """
+    Add window indices to a set of ranges, coalescing adjacent ones
+    (windows arriving in order keep a single range per session).
+    """
+    merged: List[List[int]] = []
+    points = sorted(
+        [*ranges, *((index, index) for index in window_indices)]
+    )
+    for first, last in points:
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return tuple((first, last) for first, last in merged)
+
+
+@dataclass(frozen=True)
+class CommittedWindows:
+    """
+    Windows of a session already counted, as read from DynamoDB.
+
+    `stored` is the committed_windows attribute as read (None if the
+    item has none), used as the condition of the next update.
+    """
+
+    ranges: WindowRanges = ()
+    stored: Optional[str] = None
+
+    def __contains__(self, window_index: int) -> bool:
+        i = bisect.bisect_right(self.ranges, (window_index, float("inf"))) - 1
+        return i >= 0 and self.ranges[i][0] <= window_index <= self.ranges[i][1]
+
+
+def fetch_committed_windows(
+    keys: List[SessionKey],
+) -> Dict[SessionKey, CommittedWindows]:
+    """
+    Windows already counted per session (committed_windows).
+
+    Reads with consistent BatchGetItem calls, so a retried batch sees
+    what its previous attempt committed. Items written before
+    committed_windows existed only have last_window_index (windows
+    were counted in order): they count as 0..last_window_index.
+
+    Raises
+    ------
+    RuntimeError
+        If DynamoDB keeps returning unprocessed keys.
+    """
+    committed: Dict[SessionKey, CommittedWindows] = {
+        key: CommittedWindows() for key in keys
+    }
+
+    for start in range(0, len(keys), DYNAMO_BATCH_GET_LIMIT):
+        request: Dict[str, Any] = {
+            DYNAMO_TABLE_NAME: {
+                "Keys": [
+                    {"pk": {"S": patient_id}, "sk": {"S": session_id}}
+                    for patient_id, session_id in keys[start:start + DYNAMO_BATCH_GET_LIMIT]
+                ],
+                "ConsistentRead": True,
+                "ProjectionExpression": "pk, sk, committed_windows, last_window_index",
+            }
+        }
 
+        for attempt in range(DYNAMO_BATCH_GET_ATTEMPTS):
+            if attempt:
+                time.sleep(0.05 * 2 ** attempt)
 
-def store_event_in_s3(event: Dict[str, Any]) -> None:
-    print("[BEGIN S3] store_event_in_s3")
-    # print("event:", event)
+            response = dynamodb_client.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(DYNAMO_TABLE_NAME, []):
+                key: SessionKey = (item["pk"]["S"], item["sk"]["S"])
+                if "committed_windows" in item:
+                    stored: str = item["committed_windows"]["S"]
+                    committed[key] = CommittedWindows(parse_window_ranges(stored), stored)
+                elif "last_window_index" in item:
+                    committed[key] = CommittedWindows(
+                        ((0, int(item["last_window_index"]["N"])),)
+                    )
+
+            request = response.get("UnprocessedKeys") or {}
+            if not request:
+                break
+
+        if request:
+            raise RuntimeError("DynamoDB BatchGetItem left unprocessed keys")
+
+    return committed
+
+
+def drop_committed_events(
+    decoded: List[DecodedEvent],
+    committed: Dict[SessionKey, CommittedWindows],
+) -> Tuple[List[DecodedEvent], int]:
+    """
+    Drop events whose (session_id, window_index) was already counted,
+    by a previous attempt of this batch or earlier in this batch.
+
+    Exact per window, whatever the arrival order: the fog retries only
+    the records a PutRecords call rejected, so a window can reach the
+    stream after later windows of its session.
+
+    Returns
+    -------
+    fresh : List[DecodedEvent]
+        Events still to store and count.
+    duplicates : int
+        Number of dropped events.
+    """
+    seen: Dict[SessionKey, Set[int]] = {}
+    fresh: List[DecodedEvent] = []
+
+    for sequence_number, event in decoded:
+        key = session_key(event)
+        window_index: int = event["window_index"]
+        batch_windows = seen.setdefault(key, set())
+        if window_index in batch_windows or window_index in committed.get(key, ()):
+            continue
+        batch_windows.add(window_index)
+        fresh.append((sequence_number, event))
+
+    return fresh, len(decoded) - len(fresh)
+
+
+# ============================================================
+# S3 (raw events)
+# ============================================================
+
+# (date "YYYY/MM/DD", patient_id, session_id)
+PartitionKey = Tuple[str, str, str]
+
+
+def event_date_prefix(event: Dict[str, Any]) -> str:
+    """
+    "YYYY/MM/DD" of the event's own timestamp (not the processing
+    time), so a retried batch maps to the same partition.
+    """
+    timestamp = event.get("timestamp_utc")
+    try:
+        return datetime.fromisoformat(str(timestamp)).strftime("%Y/%m/%d")
+    except ValueError:
+        return datetime.utcnow().strftime("%Y/%m/%d")
+
+
+def group_events_by_partition(
+    decoded: List[DecodedEvent],
+) -> Dict[PartitionKey, List[DecodedEvent]]:
+    """
+    Group (sequence_number, event) pairs by (date, patient, session),
+    keeping batch order inside each group.
+    """
+    groups: Dict[PartitionKey, List[DecodedEvent]] = {}
+
+    for sequence_number, event in decoded:
+        key: PartitionKey = (event_date_prefix(event), *session_key(event))
+        groups.setdefault(key, []).append((sequence_number, event))
+
+    return groups
+
+
+def batch_object_key(
+    partition: PartitionKey,
+    items: List[DecodedEvent],
+) -> str:
     """
-    Append EEG event to S3 as JSONL.
+    Deterministic S3 key for one partition of one Lambda batch.
+
+    Named after the first window of the partition. Windows already
+    counted are dropped before writing, so a retry (whatever records it
+    starts from) rewrites the same key with the same windows, or a
+    longer run of them, instead of adding a duplicate object.
     """
-    date_prefix: str = datetime.utcnow().strftime("%Y/%m/%d")
-    key: str = (
-        f"events/"
+    date_prefix, patient_id, session_id = partition
+    first_window: int = min(event["window_index"] for _, event in items)
+
+    return (
+        f"{EVENTS_PREFIX}/"
         f"{date_prefix}/"
-        f"patient={event['patient_id']}/"
-        f"session={event['session_id']}/"
-        f"window={event['window_index']}.json"
+        f"patient={patient_id}/"
+        f"session={session_id}/"
+        f"windows-{first_window:08d}.jsonl.gz"
+    )
+
+
+def store_events_in_s3(
+    partition: PartitionKey,
+    items: List[DecodedEvent],
+) -> str:
+    """
+    Write the events of one partition as a single gzip JSONL object.
+
+    mtime=0 keeps the compressed bytes identical across retries.
+    """
+    key: str = batch_object_key(partition, items)
+    body: bytes = gzip.compress(
+        "".join(json.dumps(event) + "\n" for _, event in items).encode("utf-8"),
+        mtime=0,
     )
 
     s3_client.put_object(
         Bucket=RAW_EVENTS_BUCKET,
         Key=key,
-        Body=json.dumps(event) + "\n",
+        Body=body,
+        ContentType="application/x-ndjson",
     )
-    print(f"[END S3] Stored event in S3: s3://{RAW_EVENTS_BUCKET}/{key}")
+    logger.debug("Stored %d events in s3://%s/%s", len(items), RAW_EVENTS_BUCKET, key)
+    return key
+
+
+def store_partitions_in_s3(
+    groups: Dict[PartitionKey, List[DecodedEvent]],
+) -> Set[SessionKey]:
+    """
+    Store every partition; return the sessions with a failed write.
+    """
+    failed: Set[SessionKey] = set()
 
+    for partition, items in groups.items():
+        try:
+            store_events_in_s3(partition, items)
+        except AWS_ERRORS as exc:
+            logger.warning("S3 write failed for %s: %s", "/".join(partition), exc)
+            failed.add((partition[1], partition[2]))
 
-def update_dynamodb(event: Dict[str, Any]) -> None:
-    print("[BEGIN DYNAMODB] update_dynamodb")
-    # print("event:", event)
+    return failed
 
+
+# ============================================================
+# DynamoDB (session counters)
+# ============================================================
+
+@dataclass(frozen=True)
+class SessionCounters:
+    windows_total: int
+    suspected_windows: int
+    window_indices: Tuple[int, ...]
+
+
+def aggregate_session_counters(
+    events: List[Dict[str, Any]],
+) -> Dict[SessionKey, SessionCounters]:
+    """
+    Sum window and suspected-window counts per (patient, session),
+    with the window indices they cover.
+    """
+    counters: Dict[SessionKey, Tuple[List[int], List[int]]] = {}
+
+    for event in events:
+        counts, indices = counters.setdefault(session_key(event), ([0, 0], []))
+        counts[0] += 1
+        counts[1] += 1 if event["suspected"] else 0
+        indices.append(event["window_index"])
+
+    return {
+        key: SessionCounters(counts[0], counts[1], tuple(indices))
+        for key, (counts, indices) in counters.items()
+    }
+
+
+def update_dynamodb(
+    key: SessionKey,
+    counters: SessionCounters,
+    committed: CommittedWindows,
+) -> None:
     """
-    Update aggregated counters in DynamoDB.
+    Add the batch counts of one session in a single UpdateItem.
+
+    The windows are added to committed_windows in the same atomic
+    write, conditioned on committed_windows still being what was read
+    (optimistic concurrency): if another attempt committed windows in
+    between, the update fails and the records are retried and
+    deduplicated against the new value. last_window_index keeps the
+    highest counted window.
     """
-    # print(
-    #     "[DEBUG] Dynamo Key:",
-    #     {
-    #         "pk": event["patient_id"],
-    #         "sk": event["session_id"],
-    #     },
-    # )
-    table.update_item(
+    patient_id, session_id = key
+    ranges = merge_window_ranges(committed.ranges, list(counters.window_indices))
+
+    values: Dict[str, Dict[str, str]] = {
+        ":total": {"N": str(counters.windows_total)},
+        ":sus": {"N": str(counters.suspected_windows)},
+        ":ranges": {"S": format_window_ranges(ranges)},
+        ":last": {"N": str(ranges[-1][1])},
+    }
+    if committed.stored is None:
+        condition = "attribute_not_exists(committed_windows)"
+    else:
+        condition = "committed_windows = :expected"
+        values[":expected"] = {"S": committed.stored}
+
+    dynamodb_client.update_item(
+        TableName=DYNAMO_TABLE_NAME,
         Key={
-            "pk": event["patient_id"],
-            "sk": event["session_id"],
-        },
-        UpdateExpression="""
-            ADD windows_total :one,
-                suspected_windows :sus
-        """,
-        ExpressionAttributeValues={
-            ":one": 1,
-            ":sus": 1 if event["suspected"] else 0,
+            "pk": {"S": patient_id},
+            "sk": {"S": session_id},
         },
+        UpdateExpression=(
+            "SET committed_windows = :ranges, last_window_index = :last "
+            "ADD windows_total :total, suspected_windows :sus"
+        ),
+        ConditionExpression=condition,
+        ExpressionAttributeValues=values,
+    )
+    logger.debug(
+        "Updated patient %s, session %s (+%d windows, +%d suspected)",
+        patient_id, session_id, counters.windows_total, counters.suspected_windows,
     )
-    print(f"[END DYNAMODB] Updated DynamoDB for patient {event['patient_id']}, session {event['session_id']}")
+
+
+def update_dynamodb_counters(
+    counters: Dict[SessionKey, SessionCounters],
+    committed: Dict[SessionKey, CommittedWindows],
+) -> Set[SessionKey]:
+    """
+    Apply one ADD per session key, independent keys concurrently.
+
+    Returns the sessions whose update failed (throttling, or a
+    condition check lost to a concurrent writer); their records are
+    retried and deduplicated on the next attempt.
+    """
+    futures = {
+        key: _dynamo_executor.submit(
+            update_dynamodb, key, session_counters, committed.get(key, CommittedWindows())
+        )
+        for key, session_counters in counters.items()
+    }
+
+    failed: Set[SessionKey] = set()
+    for key, future in futures.items():
+        exc: Optional[BaseException] = future.exception()
+        if exc is None:
+            continue
+        if not isinstance(exc, AWS_ERRORS):
+            raise exc
+        logger.warning("DynamoDB update failed for %s/%s: %s", *key, exc)
+        failed.add(key)
+
+    return failed
 
 
 # ============================================================
@@ -97,25 +569,94 @@ def update_dynamodb(event: Dict[str, Any]) -> None:
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
-    Kinesis consumer Lambda.
+    Kinesis consumer Lambda (partial batch responses).
+
+    Records are isolated from each other:
+    - undecodable records are quarantined in S3, not retried;
+    - a failed S3 write or DynamoDB update only fails the records of
+      that session, reported in `batchItemFailures`, so Lambda resumes
+      the shard from the first of them;
+    - windows already counted (session_id + window_index, exact per
+      window, in any order) are dropped, so redelivered or reordered
+      records neither duplicate S3 objects nor inflate the DynamoDB
+      counters.
+
+    Logs one compact JSON metrics line per batch; per-event logs are
+    only built when LOG_LEVEL=DEBUG.
     """
+    started: float = time.perf_counter()
     records: List[Dict[str, Any]] = event.get("Records", [])
 
-    print(f"[INFO] Received {len(records)} records from Kinesis")
-    print(f"[INFO] records: {records}")
-    # print(f"[DEBUG VARIABLES] RAW_EVENTS_BUCKET={RAW_EVENTS_BUCKET}, DYNAMO_TABLE_NAME={DYNAMO_TABLE_NAME}")
+    payload_bytes: int = sum(len(record["kinesis"]["data"]) for record in records)
+    decoded, poison = decode_records(records)
+
+    failed_sequences: Set[str] = set()
+    for record, error in poison:
+        try:
+            store_poison_record(record, error)
+        except AWS_ERRORS as exc:
+            logger.warning("Could not quarantine record: %s", exc)
+            failed_sequences.add(record["kinesis"]["sequenceNumber"])
+    decoded_at: float = time.perf_counter()
+
+    try:
+        committed = fetch_committed_windows(
+            sorted({session_key(eeg_event) for _, eeg_event in decoded})
+        )
+        fresh, duplicates = drop_committed_events(decoded, committed)
+    except (*AWS_ERRORS, RuntimeError) as exc:
+        # Without the committed windows nothing can be stored safely
+        logger.warning("Could not read committed windows: %s", exc)
+        failed_sequences.update(sequence_number for sequence_number, _ in decoded)
+        committed, fresh, duplicates = {}, [], 0
+    deduped_at: float = time.perf_counter()
+
+    # One S3 object per (date, patient, session) instead of one per window
+    groups = group_events_by_partition(fresh)
+    failed_sessions: Set[SessionKey] = store_partitions_in_s3(groups)
+    stored_at: float = time.perf_counter()
+
+    # One ADD per session instead of one per window; sessions whose
+    # events were not stored are not counted either
+    counters = aggregate_session_counters(
+        [eeg_event for _, eeg_event in fresh if session_key(eeg_event) not in failed_sessions]
+    )
+    failed_sessions |= update_dynamodb_counters(counters, committed)
+    finished: float = time.perf_counter()
+
+    failed_sequences.update(
+        sequence_number
+        for sequence_number, eeg_event in fresh
+        if session_key(eeg_event) in failed_sessions
+    )
+    batch_item_failures: List[Dict[str, str]] = [
+        {"itemIdentifier": record["kinesis"]["sequenceNumber"]}
+        for record in records
+        if record["kinesis"]["sequenceNumber"] in failed_sequences
+    ]
+
+    metrics: Dict[str, Any] = {
+        "records": len(records),
+        "events": len(decoded),
+        "payload_bytes": payload_bytes,
+        "poison_records": len(poison),
+        "duplicate_events": duplicates,
+        "failed_records": len(batch_item_failures),
+        "s3_objects": len(groups),
+        "dynamodb_updates": len(counters),
+        "decode_ms": round((decoded_at - started) * 1000, 2),
+        "dedupe_ms": round((deduped_at - decoded_at) * 1000, 2),
+        "s3_ms": round((stored_at - deduped_at) * 1000, 2),
+        "dynamodb_ms": round((finished - stored_at) * 1000, 2),
+        "total_ms": round((finished - started) * 1000, 2),
+    }
+    logger.info("batch_metrics %s", json.dumps(metrics, separators=(",", ":")))
 
-    idx: int = 0
-    for record in records:
-        print("record index:", idx)
-        idx+=1
-        eeg_event: Dict[str, Any] = decode_kinesis_record(record)
-        # print("eeg_event puro: ", eeg_event)
-        print(f"[DEBUG] Decoded EEG event: {json.dumps(eeg_event)}")
-        store_event_in_s3(eeg_event)
-        update_dynamodb(eeg_event)
-    print("end handler")
     return {
         "statusCode": 200,
+        "batchItemFailures": batch_item_failures,
         "processed_records": len(records),
+        "processed_events": len(decoded),
+        "s3_objects": len(groups),
+        "dynamodb_updates": len(counters),
     }
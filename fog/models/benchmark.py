@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Microbenchmark de latencia de inferencia en CPU.
+
+Responsabilidades:
+- Cargar un modelo (o el mock por defecto) con el runtime del fog
+- Ejecutar lotes sintéticos (B, C, T) repetidamente
+- Reportar latencia por lote y por ventana (p50 / p95 / media)
+
+Uso:
+    python -m fog.models.benchmark --model fog/models/model.onnx --batch-size 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from fog.models.runtime import INTRA_OP_THREADS, init_model_runtime
+from fog.pipeline.inference import run_inference_batch
+
+
+def run_benchmark(
+    batch_size: int,
+    n_channels: int,
+    n_samples: int,
+    iterations: int,
+    warmup: int,
+) -> List[float]:
+    """
+    Time `iterations` calls to run_inference_batch.
+
+    Returns
+    -------
+    List[float]
+        Per-batch latencies in seconds.
+    """
+
+    rng = np.random.default_rng(0)
+    windows = rng.standard_normal((batch_size, n_channels, n_samples)).astype(
+        np.float32
+    )
+
+    for _ in range(warmup):
+        run_inference_batch(windows)
+
+    latencies: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_inference_batch(windows)
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure per-window inference latency on CPU"
+    )
+    parser.add_argument("--model", type=Path, default=None,
+                        help="Model artifact (.onnx / .npz); default: mock")
+    parser.add_argument("--threads", type=int, default=INTRA_OP_THREADS,
+                        help="Intra-op thread count")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--channels", type=int, default=22)
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="Samples per window (4 s @ 250 Hz = 1000)")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    model = init_model_runtime(
+        args.model,
+        intra_op_threads=args.threads,
+        warmup_shape=(1, args.channels, args.samples),
+    )
+
+    latencies = np.asarray(
+        run_benchmark(
+            batch_size=args.batch_size,
+            n_channels=args.channels,
+            n_samples=args.samples,
+            iterations=args.iterations,
+            warmup=args.warmup,
+        )
+    )
+    per_window_ms = latencies / args.batch_size * 1e3
+
+    print(
+        "\n"
+        "================ INFERENCE BENCHMARK ================\n"
+        f" Model              : {model.name}\n"
+        f" Threads (intra-op) : {args.threads}\n"
+        f" Batch shape        : ({args.batch_size}, {args.channels}, {args.samples})\n"
+        f" Iterations         : {args.iterations}\n"
+        f" Batch latency  p50 : {np.percentile(latencies, 50) * 1e3:.3f} ms\n"
+        f" Batch latency  p95 : {np.percentile(latencies, 95) * 1e3:.3f} ms\n"
+        f" Per-window     p50 : {np.percentile(per_window_ms, 50):.4f} ms\n"
+        f" Per-window     p95 : {np.percentile(per_window_ms, 95):.4f} ms\n"
+        f" Per-window    mean : {per_window_ms.mean():.4f} ms\n"
+        f" Windows / second   : {args.batch_size / latencies.mean():.0f}\n"
+        "=====================================================\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
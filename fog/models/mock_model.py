@@ -0,0 +1,57 @@
+"""
+mock_model.py
+
+Modelo mock para inferencia EEG.
+
+Responsabilidades:
+- Implementar la interfaz EEGModel (predict_batch)
+- Devolver scores aleatorios en [0, 1], uno por ventana
+
+Notas:
+- No implementa un modelo real; sirve como sustituto hasta
+  integrar uno entrenado.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class MockModel:
+    """
+    Mock EEG model: one uniform random score per window.
+    """
+
+    name: str = "mock"
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """
+        Score a batch of EEG windows.
+
+        Parameters
+        ----------
+        windows : np.ndarray
+            EEG windows with shape (batch, n_channels, n_samples).
+        rng : np.random.Generator
+            Random generator for this call.
+
+        Returns
+        -------
+        scores : np.ndarray
+            Shape (batch,), values in [0, 1].
+        """
+
+        # --------------------------------------------------
+        # Energy-based heuristic (very rough), kept for reference:
+        # energy = np.mean(windows ** 2, axis=(1, 2))
+        # normalized_energy = np.minimum(energy / 100.0, 1.0)
+        # noise = rng.uniform(0.0, 0.1, size=len(windows))
+        # scores = np.clip(normalized_energy + noise, 0.0, 1.0)
+        # --------------------------------------------------
+
+        # generación de un numero aleatorio entre 0 y 1 por ventana
+        return rng.uniform(0.0, 1.0, size=windows.shape[0])
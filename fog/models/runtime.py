@@ -0,0 +1,294 @@
+"""
+runtime.py
+
+Runtime de modelos EEG en el nodo Fog.
+
+Responsabilidades:
+- Cargar un artefacto de modelo una sola vez al iniciar el proceso
+  - ONNX (.onnx) con onnxruntime en CPU
+  - Pesos NumPy puros (.npz), sobre ventanas crudas o sobre
+    características (FEATURE_NAMES), estas últimas reutilizables entre
+    ventanas solapadas
+- Fijar explícitamente el número de hilos intra-op
+- Calentar el modelo (primera ejecución) antes de procesar ventanas
+- Registrar el modelo para que run_inference / run_inference_batch
+  lo usen con lotes (B, C, T)
+
+NO realiza:
+- Preprocesamiento de señales
+- Decisiones (umbrales)
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Final, List, Optional, Tuple
+
+import numpy as np
+
+from fog.pipeline.features import FEATURE_NAMES, extract_features
+from fog.pipeline.inference import EEGModel, get_model, set_model
+
+
+# ============================================================
+# Constants
+# ============================================================
+
+INTRA_OP_THREADS: Final[int] = 1
+WARMUP_SHAPE: Final[Tuple[int, int, int]] = (1, 22, 1000)  # 4 s @ 250 Hz
+
+
+# ============================================================
+# ONNX model
+# ============================================================
+
+class OnnxModel:
+    """
+    ONNX model executed with onnxruntime on CPU.
+
+    The graph must take a single float32 input of shape
+    (batch, n_channels, n_samples) and return either (batch,),
+    (batch, 1) probabilities or (batch, 2) class probabilities
+    (the second column is used).
+    """
+
+    name: str = "onnx"
+
+    def __init__(
+        self,
+        model_path: Path,
+        intra_op_threads: int = INTRA_OP_THREADS,
+    ) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise ImportError(
+                "onnxruntime is required to load .onnx models "
+                "(pip install -r fog/requirements-onnx.txt)"
+            ) from exc
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+
+        self._session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_name: str = self._session.get_inputs()[0].name
+        self.name = f"onnx:{model_path.name}"
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        outputs = self._session.run(
+            None,
+            {self._input_name: np.ascontiguousarray(windows, dtype=np.float32)},
+        )
+        scores = np.asarray(outputs[0])
+
+        if scores.ndim == 2 and scores.shape[1] == 2:
+            scores = scores[:, 1]
+
+        return scores.reshape(windows.shape[0])
+
+
+# ============================================================
+# NumPy model
+# ============================================================
+
+class NumpyModel:
+    """
+    Pure-NumPy multilayer perceptron loaded from a .npz weight file.
+
+    The file holds arrays W0, b0, W1, b1, ... The input of the first
+    layer is the window flattened to (batch, n_channels * n_samples);
+    hidden layers use ReLU and the last layer (one output) a sigmoid.
+
+    The matrix products run on NumPy's BLAS; its thread pool is
+    limited to `intra_op_threads` with threadpoolctl (process-wide,
+    like OMP_NUM_THREADS but applied after NumPy is loaded).
+    """
+
+    name: str = "numpy"
+
+    def __init__(
+        self,
+        model_path: Path,
+        intra_op_threads: int = INTRA_OP_THREADS,
+    ) -> None:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError as exc:
+            raise ImportError(
+                "threadpoolctl is required to set the thread count of "
+                ".npz models (pip install threadpoolctl)"
+            ) from exc
+
+        if intra_op_threads <= 0:
+            raise ValueError("intra_op_threads must be positive")
+
+        # Kept in effect for the rest of the process
+        self._thread_limits = threadpool_limits(
+            limits=intra_op_threads, user_api="blas"
+        )
+
+        with np.load(model_path) as weights:
+            n_layers: int = sum(1 for key in weights.files if key.startswith("W"))
+            if n_layers == 0:
+                raise ValueError(f"No weights (W0, b0, ...) found in {model_path}")
+
+            self._layers: List[Tuple[np.ndarray, np.ndarray]] = [
+                (
+                    np.ascontiguousarray(weights[f"W{i}"], dtype=np.float32),
+                    np.ascontiguousarray(weights[f"b{i}"], dtype=np.float32),
+                )
+                for i in range(n_layers)
+            ]
+
+        self.name = f"numpy:{model_path.name}"
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        return self._forward(windows)
+
+    def _forward(self, inputs: np.ndarray) -> np.ndarray:
+        x = np.asarray(inputs, dtype=np.float32).reshape(inputs.shape[0], -1)
+
+        for weight, bias in self._layers[:-1]:
+            x = np.maximum(x @ weight + bias, 0.0)
+
+        weight, bias = self._layers[-1]
+        logits = (x @ weight + bias).reshape(inputs.shape[0])
+
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+class NumpyFeatureModel(NumpyModel):
+    """
+    NumpyModel whose input is the window features instead of samples.
+
+    Besides the weights, the .npz file holds `feature_names` (must be
+    FEATURE_NAMES) and `sfreq`; the first layer input is the features
+    flattened to (batch, n_channels * len(FEATURE_NAMES)). Implements
+    FeatureModel, so overlapping windows are scored from features
+    computed once per hop (see inference.feature_stream).
+    """
+
+    name: str = "numpy-features"
+
+    def __init__(
+        self,
+        model_path: Path,
+        intra_op_threads: int = INTRA_OP_THREADS,
+    ) -> None:
+        super().__init__(model_path, intra_op_threads=intra_op_threads)
+
+        with np.load(model_path) as weights:
+            feature_names: Tuple[str, ...] = tuple(
+                str(name) for name in weights["feature_names"]
+            )
+            self.sfreq: int = int(weights["sfreq"])
+
+        if feature_names != FEATURE_NAMES:
+            raise ValueError(
+                f"{model_path} was trained on features {feature_names}, "
+                f"expected {FEATURE_NAMES}"
+            )
+
+        self.name = f"numpy-features:{model_path.name}"
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        return self._forward(extract_features(windows, self.sfreq))
+
+    def predict_features(
+        self,
+        features: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        return self._forward(features)
+
+
+# ============================================================
+# Loading
+# ============================================================
+
+def load_model(
+    model_path: Path,
+    intra_op_threads: int = INTRA_OP_THREADS,
+) -> EEGModel:
+    """
+    Load a model artifact according to its extension (.onnx / .npz).
+    """
+
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+
+    suffix: str = model_path.suffix.lower()
+
+    if suffix == ".onnx":
+        return OnnxModel(model_path, intra_op_threads=intra_op_threads)
+
+    if suffix == ".npz":
+        with np.load(model_path) as weights:
+            uses_features: bool = "feature_names" in weights.files
+
+        if uses_features:
+            return NumpyFeatureModel(model_path, intra_op_threads=intra_op_threads)
+        return NumpyModel(model_path, intra_op_threads=intra_op_threads)
+
+    raise ValueError(f"Unsupported model format: {model_path.suffix}")
+
+
+def warm_up(
+    model: EEGModel,
+    shape: Tuple[int, int, int] = WARMUP_SHAPE,
+) -> None:
+    """
+    Run the model once so lazy allocations happen before the first window.
+    """
+    model.predict_batch(
+        np.zeros(shape, dtype=np.float32),
+        np.random.default_rng(0),
+    )
+
+
+def init_model_runtime(
+    model_path: Optional[Path],
+    intra_op_threads: int = INTRA_OP_THREADS,
+    warmup_shape: Tuple[int, int, int] = WARMUP_SHAPE,
+) -> EEGModel:
+    """
+    Load, warm up and register the model used by the inference stage.
+
+    Call once at process start. If `model_path` is None the currently
+    registered model (MockModel by default) is kept.
+    """
+
+    if model_path is None:
+        return get_model()
+
+    model: EEGModel = load_model(model_path, intra_op_threads=intra_op_threads)
+    warm_up(model, warmup_shape)
+    set_model(model)
+
+    print(
+        f"[MODEL] Loaded {model.name} "
+        f"(intra_op_threads={intra_op_threads})"
+    )
+
+    return model
@@ -0,0 +1,120 @@
+"""
+aggregation.py
+
+Agregación de varios eventos de ventana en un único registro Kinesis
+(estilo KPL).
+
+Responsabilidades:
+- Empaquetar N payloads (mismo partition key) en un solo registro
+- Desempaquetar un registro agregado en sus payloads originales
+- Distinguir registros agregados de eventos JSON simples
+
+Formato del registro agregado:
+- MAGIC (b"EEGAGG", 6 bytes)
+- 1 byte de contenedor:
+    - b"L": repetición de [uint32 big-endian longitud][payload]
+    - b"N": payloads separados por b"\\n" (JSON de una línea)
+
+Un registro que no empieza por MAGIC es un evento simple (JSON).
+Este fichero se empaqueta tal cual en el zip del consumidor Lambda
+(cloud/lambda_src/kinesis_consumer/handler.py), que usa decode_aggregate:
+solo depende de la librería estándar.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Final, List, Literal, Sequence
+
+AGGREGATION_MAGIC: Final[bytes] = b"EEGAGG"
+CONTAINER_LENGTH_PREFIXED: Final[bytes] = b"L"
+CONTAINER_NEWLINE: Final[bytes] = b"N"
+
+# Keep aggregated records small enough for low latency and well under
+# the 1 MiB Kinesis record limit.
+AGGREGATION_MAX_BYTES: Final[int] = 50 * 1024
+
+Container = Literal["length", "newline"]
+
+_LENGTH = struct.Struct(">I")
+_HEADER_BYTES: Final[int] = len(AGGREGATION_MAGIC) + 1
+
+
+def aggregated_size(
+    payload_sizes: Sequence[int],
+    container: Container = "length",
+) -> int:
+    """
+    Size in bytes of the aggregated record for the given payload sizes.
+    """
+    if container == "length":
+        overhead = _LENGTH.size * len(payload_sizes)
+    else:
+        overhead = max(0, len(payload_sizes) - 1)
+
+    return _HEADER_BYTES + sum(payload_sizes) + overhead
+
+
+def entry_overhead(container: Container = "length") -> int:
+    """
+    Extra bytes added per payload by the container.
+    """
+    return _LENGTH.size if container == "length" else 1
+
+
+def is_aggregated(data: bytes) -> bool:
+    return data[:len(AGGREGATION_MAGIC)] == AGGREGATION_MAGIC
+
+
+def encode_aggregate(
+    payloads: Sequence[bytes],
+    container: Container = "length",
+) -> bytes:
+    """
+    Pack several payloads into one aggregated record.
+    """
+    if container == "length":
+        parts: List[bytes] = [AGGREGATION_MAGIC, CONTAINER_LENGTH_PREFIXED]
+        for payload in payloads:
+            parts.append(_LENGTH.pack(len(payload)))
+            parts.append(payload)
+        return b"".join(parts)
+
+    if container == "newline":
+        if any(b"\n" in payload for payload in payloads):
+            raise ValueError("Newline container requires single-line payloads")
+        return AGGREGATION_MAGIC + CONTAINER_NEWLINE + b"\n".join(payloads)
+
+    raise ValueError(f"Unknown aggregation container: {container}")
+
+
+def decode_aggregate(data: bytes) -> List[bytes]:
+    """
+    Unpack a record into its payloads.
+
+    Non-aggregated records are returned as a single payload.
+    """
+    if not is_aggregated(data):
+        return [data]
+
+    container: bytes = data[len(AGGREGATION_MAGIC):_HEADER_BYTES]
+    body = memoryview(data)[_HEADER_BYTES:]
+
+    if container == CONTAINER_NEWLINE:
+        return bytes(body).split(b"\n") if len(body) else []
+
+    if container == CONTAINER_LENGTH_PREFIXED:
+        payloads: List[bytes] = []
+        offset: int = 0
+        while offset < len(body):
+            if offset + _LENGTH.size > len(body):
+                raise ValueError("Truncated aggregated record")
+            (length,) = _LENGTH.unpack_from(body, offset)
+            offset += _LENGTH.size
+            if offset + length > len(body):
+                raise ValueError("Truncated aggregated record")
+            payloads.append(bytes(body[offset:offset + length]))
+            offset += length
+        return payloads
+
+    raise ValueError(f"Unknown aggregation container: {container!r}")
@@ -0,0 +1,164 @@
+"""
+batching.py
+
+Agrupación de inferencia entre sesiones concurrentes (runtime asyncio).
+
+Responsabilidades:
+- Recibir, desde varias corrutinas (una por paciente), las ventanas
+  que deben puntuarse ahora
+- Unir en un solo lote (B, C, T) las peticiones que llegan dentro de
+  una ventana corta (BATCH_DELAY_SECONDS), p. ej. todos los pacientes
+  cuyo tick de tiempo real coincide
+- Ejecutar run_inference_batch (o run_inference_features, para
+  características ya calculadas por salto) una vez por lote en un
+  executor y devolver a cada corrutina sus scores
+- Contar llamadas y ventanas (tamaño medio de lote)
+
+NO realiza:
+- Ritmo de tiempo real (PacingClock)
+- Decisiones (umbrales)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Dict, Final, List, Optional, Set, Tuple
+
+import numpy as np
+
+from fog.pipeline.inference import (
+    INFERENCE_BATCH_SIZE,
+    run_inference_batch,
+    run_inference_features,
+)
+
+
+# Time a request waits for others before its batch is run; small
+# compared with the window step (1-4 s), large enough to collect the
+# patients whose deadlines fall on the same tick
+BATCH_DELAY_SECONDS: Final[float] = 0.005
+
+_Infer = Callable[[np.ndarray], np.ndarray]
+_Request = Tuple[np.ndarray, "asyncio.Future[np.ndarray]"]
+_Pending = Tuple[_Infer, np.ndarray, "asyncio.Future[np.ndarray]"]
+
+
+class InferenceBatcher:
+    """
+    Micro-batcher for run_inference_batch across coroutines.
+
+    Parameters
+    ----------
+    executor : Executor
+        Where run_inference_batch runs (keeps the event loop free).
+    max_batch_size : int, optional
+        A batch is run as soon as it holds this many windows.
+    max_delay_seconds : float, optional
+        Longest time a request waits for the batch to fill.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_batch_size: int = INFERENCE_BATCH_SIZE,
+        max_delay_seconds: float = BATCH_DELAY_SECONDS,
+    ) -> None:
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+
+        self._pending: List[_Pending] = []
+        self._pending_windows: int = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set["asyncio.Task[None]"] = set()
+
+        self.calls: int = 0
+        self.windows: int = 0
+
+    async def score(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Scores of a (b, C, T) block of windows, computed in a shared batch.
+        """
+        if windows.ndim != 3:
+            raise ValueError("Windows must have shape (batch, n_channels, n_samples)")
+
+        return await self._submit(run_inference_batch, windows)
+
+    async def score_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Scores of a (b, C, n_features) block of window features,
+        computed in a shared batch (FeatureModel only).
+        """
+        if features.ndim != 3:
+            raise ValueError("Features must have shape (batch, n_channels, n_features)")
+
+        return await self._submit(run_inference_features, features)
+
+    async def _submit(self, infer: _Infer, inputs: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[np.ndarray]" = loop.create_future()
+
+        self._pending.append((infer, inputs, future))
+        self._pending_windows += inputs.shape[0]
+
+        if self._pending_windows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        self._pending_windows = 0
+
+        # Windows of different shapes (e.g. another montage) cannot be
+        # stacked, nor windows with features
+        groups: Dict[Tuple[_Infer, Tuple[int, ...]], List[_Request]] = {}
+        for infer, inputs, future in pending:
+            groups.setdefault((infer, inputs.shape[1:]), []).append((inputs, future))
+
+        for (infer, _), group in groups.items():
+            task = asyncio.ensure_future(self._run(infer, group))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, infer: _Infer, group: List[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        batch = np.concatenate([inputs for inputs, _ in group])
+
+        try:
+            scores = await loop.run_in_executor(self.executor, infer, batch)
+        except Exception as exc:
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.calls += 1
+        self.windows += batch.shape[0]
+
+        offset: int = 0
+        for windows, future in group:
+            n: int = windows.shape[0]
+            if not future.done():
+                future.set_result(scores[offset:offset + n])
+            offset += n
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Inference calls, windows scored and mean batch size.
+        """
+        return {
+            "calls": self.calls,
+            "windows": self.windows,
+            "mean_batch_size": self.windows / max(1, self.calls),
+        }
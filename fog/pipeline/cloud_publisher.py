@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, Final, Optional
+import atexit
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Sequence, Tuple
 
 import boto3
 from botocore.client import BaseClient
 from botocore.exceptions import BotoCoreError, ClientError
 
+from fog.pipeline.aggregation import (
+    AGGREGATION_MAX_BYTES,
+    Container,
+    encode_aggregate,
+    entry_overhead,
+)
+from fog.pipeline.event_schema import Codec, encode_event
+
 
 # ============================================================
 # Constants (explicit, no env vars for now)
@@ -17,6 +28,29 @@ CLOUD_ENABLED: Final[bool] = True
 AWS_REGION: Final[str] = "us-east-1"
 KINESIS_STREAM_NAME: Final[str] = "eeg-seizure-event-stream"
 
+# PutRecords limits (per request / per record)
+MAX_BATCH_RECORDS: Final[int] = 500
+MAX_BATCH_BYTES: Final[int] = 5 * 1024 * 1024
+MAX_RECORD_BYTES: Final[int] = 1024 * 1024
+
+LINGER_SECONDS: Final[float] = 0.5
+MAX_RETRIES: Final[int] = 5
+BACKOFF_BASE_SECONDS: Final[float] = 0.1
+BACKOFF_MAX_SECONDS: Final[float] = 5.0
+
+# Write events to the durable on-disk outbox first (fog/pipeline/outbox.py)
+# and drain it to Kinesis in the background.
+OUTBOX_ENABLED: Final[bool] = True
+
+# Pack events with the same partition key into one Kinesis record
+# (see fog/pipeline/aggregation.py)
+AGGREGATION_ENABLED: Final[bool] = True
+AGGREGATION_CONTAINER: Final[Container] = "length"
+
+# Wire format of each event (see fog/pipeline/event_schema.py). Binary
+# payloads may contain b"\n", so the newline container forces JSON.
+EVENT_CODEC: Final[Codec] = "json" if AGGREGATION_CONTAINER == "newline" else "binary"
+
 
 # ============================================================
 # Kinesis Client (lazy initialization)
@@ -40,6 +74,475 @@ def _get_kinesis_client() -> BaseClient:
     return _kinesis_client
 
 
+# ============================================================
+# Record packing and sending
+# ============================================================
+
+# Event to publish: (data, partition_key)
+Entry = Tuple[bytes, str]
+
+# Kinesis record to send: (data, partition_key, n_events)
+Record = Tuple[bytes, str, int]
+
+
+def _entry_size(entry: Entry) -> int:
+    return len(entry[0]) + len(entry[1].encode("utf-8"))
+
+
+def pack_records(
+    entries: Sequence[Entry],
+    max_records: int = MAX_BATCH_RECORDS,
+    max_bytes: int = MAX_BATCH_BYTES,
+    aggregate: bool = AGGREGATION_ENABLED,
+    aggregation_max_bytes: int = AGGREGATION_MAX_BYTES,
+    container: Container = AGGREGATION_CONTAINER,
+) -> Tuple[List[Record], int, int]:
+    """
+    Turn the leading entries into one PutRecords batch.
+
+    If `aggregate` is True, entries sharing a partition key are packed
+    into aggregated records of up to `aggregation_max_bytes`.
+
+    Returns
+    -------
+    records : List[Record]
+        Records to send.
+    consumed : int
+        Number of leading entries included in `records`.
+    consumed_bytes : int
+        Size of those entries (data + partition key).
+    """
+    if not aggregate:
+        records: List[Record] = []
+        batch_bytes: int = 0
+
+        for data, key in entries:
+            size = _entry_size((data, key))
+            if records and (
+                len(records) >= max_records
+                or batch_bytes + size > max_bytes
+            ):
+                break
+            records.append((data, key, 1))
+            batch_bytes += size
+
+        return records, len(records), batch_bytes
+
+    overhead: int = entry_overhead(container)
+    header: int = len(encode_aggregate([], container))
+
+    closed: List[Tuple[str, List[bytes]]] = []
+    open_groups: Dict[str, List[bytes]] = {}
+    open_sizes: Dict[str, int] = {}
+    batch_bytes = 0
+    consumed: int = 0
+    consumed_bytes: int = 0
+
+    for data, key in entries:
+        size = len(data) + overhead
+        group_size = open_sizes.get(key)
+
+        starts_record = (
+            group_size is None
+            or group_size + size > aggregation_max_bytes
+        )
+        added_bytes = size + (header + len(key.encode("utf-8")) if starts_record else 0)
+
+        if consumed and (
+            (starts_record and len(closed) + len(open_groups) >= max_records)
+            or batch_bytes + added_bytes > max_bytes
+        ):
+            break
+
+        if starts_record:
+            if group_size is not None:
+                closed.append((key, open_groups.pop(key)))
+            open_groups[key] = []
+            open_sizes[key] = header
+
+        open_groups[key].append(data)
+        open_sizes[key] += size
+        batch_bytes += added_bytes
+        consumed += 1
+        consumed_bytes += _entry_size((data, key))
+
+    closed.extend(open_groups.items())
+
+    aggregated: List[Record] = [
+        (
+            payloads[0]
+            if len(payloads) == 1
+            else encode_aggregate(payloads, container),
+            key,
+            len(payloads),
+        )
+        for key, payloads in closed
+    ]
+    return aggregated, consumed, consumed_bytes
+
+
+def send_records(
+    client: Any,
+    stream_name: str,
+    records: List[Record],
+    max_retries: int = MAX_RETRIES,
+    backoff_base_seconds: float = BACKOFF_BASE_SECONDS,
+    metrics: Optional[Dict[str, int]] = None,
+) -> List[Record]:
+    """
+    Send records with PutRecords, retrying only the rejected ones.
+
+    Returns
+    -------
+    List[Record]
+        Records still undelivered after `max_retries` retries.
+    """
+    if metrics is None:
+        metrics = {}
+
+    pending: List[Record] = records
+
+    for attempt in range(max_retries + 1):
+        if attempt > 0:
+            metrics["retried"] = (
+                metrics.get("retried", 0) + sum(n for _, _, n in pending)
+            )
+            time.sleep(
+                min(
+                    BACKOFF_MAX_SECONDS,
+                    backoff_base_seconds * (2 ** (attempt - 1)),
+                )
+            )
+
+        try:
+            response: Dict[str, Any] = client.put_records(
+                StreamName=stream_name,
+                Records=[
+                    {"Data": data, "PartitionKey": key}
+                    for data, key, _ in pending
+                ],
+            )
+        except (BotoCoreError, ClientError) as exc:
+            print(f"[KINESIS][ERROR] PutRecords failed: {exc}")
+            continue
+
+        metrics["batches"] = metrics.get("batches", 0) + 1
+
+        failed: List[Record] = [
+            record
+            for record, result in zip(pending, response.get("Records", []))
+            if "ErrorCode" in result
+        ]
+        metrics["records"] = metrics.get("records", 0) + len(pending) - len(failed)
+        metrics["sent"] = metrics.get("sent", 0) + (
+            sum(n for _, _, n in pending) - sum(n for _, _, n in failed)
+        )
+
+        if not failed:
+            return []
+
+        pending = failed
+
+    return pending
+
+
+# ============================================================
+# Buffered publisher
+# ============================================================
+
+class BufferedKinesisPublisher:
+    """
+    Buffer events and send them to Kinesis with PutRecords.
+
+    - publish() only appends to an in-memory buffer (never blocks on
+      the network).
+    - A background thread flushes when the buffer reaches
+      max_batch_records / max_batch_bytes or when the oldest buffered
+      event has waited linger_seconds.
+    - If `aggregate` is True, events sharing a partition key are packed
+      into one record (up to aggregation_max_bytes), so a batch of 500
+      records can carry many more events.
+    - Only the records rejected by PutRecords are retried, with
+      exponential backoff.
+    - flush() waits until everything buffered so far has been sent;
+      close() flushes and stops the thread (also registered at exit).
+
+    Any object with a boto3-compatible `put_records` method can be
+    used as `client` (e.g. fog.pipeline.kinesis_stub.LocalKinesisStub).
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        stream_name: str = KINESIS_STREAM_NAME,
+        max_batch_records: int = MAX_BATCH_RECORDS,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        linger_seconds: float = LINGER_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        backoff_base_seconds: float = BACKOFF_BASE_SECONDS,
+        aggregate: bool = AGGREGATION_ENABLED,
+        aggregation_max_bytes: int = AGGREGATION_MAX_BYTES,
+        aggregation_container: Container = AGGREGATION_CONTAINER,
+    ) -> None:
+        self._client = client
+        self.stream_name = stream_name
+        self.max_batch_records = min(max_batch_records, MAX_BATCH_RECORDS)
+        self.max_batch_bytes = min(max_batch_bytes, MAX_BATCH_BYTES)
+        self.linger_seconds = linger_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.aggregate = aggregate
+        self.aggregation_max_bytes = min(aggregation_max_bytes, MAX_RECORD_BYTES)
+        self.aggregation_container: Container = aggregation_container
+
+        self._cond = threading.Condition()
+        self._buffer: List[Entry] = []
+        self._buffer_bytes: int = 0
+        # Enqueue time (monotonic) of each buffered entry, for the linger
+        self._enqueued: List[float] = []
+        self._in_flight: int = 0
+        self._flush_requested: bool = False
+        self._closed: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Event counters, except "records" (Kinesis records sent)
+        self.metrics: Dict[str, int] = {
+            "published": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "batches": 0,
+            "records": 0,
+        }
+
+    # --------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------
+
+    def publish(
+        self,
+        data: bytes,
+        partition_key: str,
+    ) -> None:
+        """
+        Buffer one record for sending.
+        """
+        entry: Entry = (data, partition_key)
+        size: int = _entry_size(entry)
+
+        if size > MAX_RECORD_BYTES:
+            raise ValueError(f"Record too large for Kinesis: {size} bytes")
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Publisher is closed")
+
+            self._buffer.append(entry)
+            self._enqueued.append(time.monotonic())
+            self._buffer_bytes += size
+            self.metrics["published"] += 1
+
+            self._ensure_thread()
+
+            # Wake the flusher to start the linger timer or send a full batch
+            if (
+                len(self._buffer) == 1
+                or len(self._buffer) >= self.max_batch_records
+                or self._buffer_bytes >= self.max_batch_bytes
+            ):
+                self._cond.notify_all()
+
+    def flush(
+        self,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Wait until every buffered record has been sent (or dropped).
+
+        Returns False if the timeout expired first.
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(
+                lambda: not self._buffer and self._in_flight == 0,
+                timeout=timeout,
+            )
+            self._flush_requested = False
+            return done
+
+    def close(
+        self,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Flush pending records and stop the background thread.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._buffer) + self._in_flight
+
+    # --------------------------------------------------------
+    # Background flusher
+    # --------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name="kinesis-publisher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _batch_ready(self) -> bool:
+        if not self._buffer:
+            return False
+
+        return (
+            self._closed
+            or self._flush_requested
+            or len(self._buffer) >= self.max_batch_records
+            or self._buffer_bytes >= self.max_batch_bytes
+            or time.monotonic() - self._enqueued[0] >= self.linger_seconds
+        )
+
+    def _take_batch(self) -> List[Record]:
+        records, consumed, consumed_bytes = pack_records(
+            self._buffer,
+            max_records=self.max_batch_records,
+            max_bytes=self.max_batch_bytes,
+            aggregate=self.aggregate,
+            aggregation_max_bytes=self.aggregation_max_bytes,
+            container=self.aggregation_container,
+        )
+
+        # Entries left over by a records/bytes cut keep their own
+        # enqueue time: the linger runs from the oldest one still here
+        del self._buffer[:consumed]
+        del self._enqueued[:consumed]
+        self._buffer_bytes -= consumed_bytes
+        self._in_flight = consumed
+        return records
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._batch_ready():
+                    if self._closed and not self._buffer:
+                        return
+                    timeout = None
+                    if self._buffer:
+                        timeout = max(
+                            0.0,
+                            self.linger_seconds - (time.monotonic() - self._enqueued[0]),
+                        )
+                    self._cond.wait(timeout=timeout)
+
+                batch = self._take_batch()
+
+            try:
+                self._send_batch(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _send_batch(
+        self,
+        batch: List[Record],
+    ) -> None:
+        client = self._client if self._client is not None else _get_kinesis_client()
+
+        undelivered: List[Record] = send_records(
+            client,
+            self.stream_name,
+            batch,
+            max_retries=self.max_retries,
+            backoff_base_seconds=self.backoff_base_seconds,
+            metrics=self.metrics,
+        )
+
+        if undelivered:
+            dropped: int = sum(n for _, _, n in undelivered)
+            self.metrics["failed"] += dropped
+            print(
+                f"[KINESIS][ERROR] Dropped {dropped} events after "
+                f"{self.max_retries} retries"
+            )
+
+
+# ============================================================
+# Default publisher (shared by the room loop)
+# ============================================================
+
+_publisher: Optional[BufferedKinesisPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> BufferedKinesisPublisher:
+    """
+    Lazily create the process-wide buffered publisher.
+    """
+    global _publisher
+
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = BufferedKinesisPublisher()
+            atexit.register(_publisher.close)
+
+    return _publisher
+
+
+_outbox: Optional[Any] = None
+_outbox_dir: Optional[Path] = None
+
+
+def configure_outbox(directory: Path) -> None:
+    """
+    Set the directory of the process-wide outbox (before the first event).
+
+    Each process needs its own directory (e.g. one per room): the
+    outbox locks it and fails fast if another process holds it.
+    """
+    global _outbox_dir
+
+    with _publisher_lock:
+        if _outbox is not None and _outbox.directory != directory:
+            raise RuntimeError(
+                f"Outbox already open in {_outbox.directory}, cannot move it "
+                f"to {directory}"
+            )
+        _outbox_dir = directory
+
+
+def get_outbox() -> Any:
+    """
+    Lazily create the process-wide durable outbox.
+    """
+    global _outbox
+
+    # Imported here: outbox.py builds on this module
+    from fog.pipeline.outbox import OUTBOX_DIR, DurableOutbox
+
+    with _publisher_lock:
+        if _outbox is None:
+            _outbox = DurableOutbox(directory=_outbox_dir or OUTBOX_DIR)
+            _outbox.start()
+            atexit.register(_outbox.close)
+
+    return _outbox
+
+
 # ============================================================
 # Public API
 # ============================================================
@@ -48,32 +551,55 @@ def publish_event(event: Dict[str, Any]) -> None:
     """
     Publish a single EEG window event to Kinesis.
 
-    If cloud publishing is disabled, this function is a no-op.
+    With OUTBOX_ENABLED the event is appended to the durable outbox
+    and drained to Kinesis in the background (see DurableOutbox);
+    otherwise it is buffered in memory and sent in PutRecords batches
+    (see BufferedKinesisPublisher). Neither path waits on the network.
+    An event rejected by a full outbox (overflow_policy="reject") is
+    logged and counted in the outbox metrics, never raised to the room
+    loop. If cloud publishing is disabled, this function is a no-op.
     """
 
     if not CLOUD_ENABLED:
         return
 
-    client: BaseClient = _get_kinesis_client()
+    payload: bytes = encode_event(event, EVENT_CODEC)
+    partition_key: str = event.get(
+        "partition_key",
+        event.get("patient_id", "default"),
+    )
 
-    try:
-        payload: bytes = json.dumps(event).encode("utf-8")
+    if OUTBOX_ENABLED:
+        from fog.pipeline.outbox import OutboxFullError
 
-        client.put_record(
-            StreamName=KINESIS_STREAM_NAME,
-            Data=payload,
-            PartitionKey=event.get(
-                "partition_key",
-                event.get("patient_id", "default"),
-            ),
-        )
+        outbox = get_outbox()
+        try:
+            outbox.append(payload, partition_key)
+        except OutboxFullError as exc:
+            print(
+                f"[OUTBOX][WARN] {exc}: event of {partition_key} window "
+                f"{event.get('window_index')} rejected "
+                f"({outbox.metrics['rejected']} rejected so far)"
+            )
+    else:
+        get_publisher().publish(payload, partition_key)
+
+
+def flush_events(timeout: Optional[float] = None) -> bool:
+    """
+    Make every published event safe (e.g. at session end).
+
+    With the outbox, pending writes are fsynced and delivery continues in
+    the background; otherwise, block until the in-memory buffer is sent.
+    """
+
+    if not CLOUD_ENABLED:
+        return True
+
+    if _outbox is not None:
+        _outbox.sync()
 
-        # print(
-        #     f"[KINESIS] Event published | "
-        #     f"session={event.get('session_id')} "
-        #     f"window={event.get('window_index')}"
-        # )
-        print(f"\t\t[cloud_publisher] Event published")
+    if _publisher is not None:
+        return _publisher.flush(timeout=timeout)
 
-    except (BotoCoreError, ClientError) as exc:
-        print(f"[KINESIS][ERROR] Failed to publish event: {exc}")
+    return True
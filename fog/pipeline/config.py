@@ -0,0 +1,372 @@
+"""
+config.py
+
+Configuración tipada y validada del nodo Fog.
+
+Responsabilidades:
+- Leer una sola vez, al arrancar, todos los YAML de fog/config/:
+    - fog_config.yaml (ventaneo, señal, simulación, rutas)
+    - room_assignments.yaml (pacientes por cuarto)
+    - session_policy.yaml (política post-sesión)
+    - thresholds.yaml (umbral de decisión)
+- Convertirlos en dataclasses inmutables (frozen)
+- Validar tipos y rangos, fallando al inicio con un mensaje claro
+
+Los umbrales se validan aquí, pero la decisión sigue usando la caché
+con recarga en caliente de thresholds.py (sin re-parsear en el bucle).
+
+NO realiza:
+- Procesamiento de señales
+- Inferencia
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Final, Optional, Tuple
+
+import yaml
+
+from fog.pipeline.smoothing import SMOOTHING_METHODS, SmoothingMethod
+from fog.pipeline.thresholds import get_thresholds
+
+
+# ============================================================
+# Default paths
+# ============================================================
+
+CONFIG_DIR: Final[Path] = Path("fog/config")
+FOG_CONFIG_PATH: Final[Path] = CONFIG_DIR / "fog_config.yaml"
+ROOM_ASSIGNMENTS_PATH: Final[Path] = CONFIG_DIR / "room_assignments.yaml"
+SESSION_POLICY_PATH: Final[Path] = CONFIG_DIR / "session_policy.yaml"
+THRESHOLDS_PATH: Final[Path] = CONFIG_DIR / "thresholds.yaml"
+
+
+# ============================================================
+# Config sections
+# ============================================================
+
+@dataclass(frozen=True)
+class WindowConfig:
+    duration_seconds: float = 4.0
+    overlap_seconds: float = 0.0
+    # Per-stride smoothing of overlapping-window scores
+    smoothing: SmoothingMethod = "none"
+
+    @property
+    def step_seconds(self) -> float:
+        return self.duration_seconds - self.overlap_seconds
+
+
+@dataclass(frozen=True)
+class SignalConfig:
+    # None = accept the sampling rate produced by ingestion
+    expected_sampling_rate: Optional[int] = None
+
+    def check_sampling_rate(self, sfreq: int) -> None:
+        """
+        Raise ValueError if `sfreq` differs from the expected rate.
+        """
+        if (
+            self.expected_sampling_rate is not None
+            and sfreq != self.expected_sampling_rate
+        ):
+            raise ValueError(
+                f"Signal sampling rate {sfreq} Hz != expected "
+                f"{self.expected_sampling_rate} Hz (fog_config.yaml)"
+            )
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    realtime: bool = True
+    speed: float = 1.0
+    artificial_delay_seconds: float = 0.0
+
+    @property
+    def paced(self) -> bool:
+        """
+        True if windows are released on a real-time clock (one per step).
+        """
+        return self.realtime and not math.isinf(self.speed)
+
+
+@dataclass(frozen=True)
+class PathsConfig:
+    local_output_dir: Path = Path("fog/output")
+
+    @property
+    def signal_cache_dir(self) -> Path:
+        return self.local_output_dir / "cache" / "signals"
+
+    def outbox_dir(self, owner: str) -> Path:
+        # One outbox per process (room_id, or the whole fog node)
+        return self.local_output_dir / "outbox" / owner
+
+
+@dataclass(frozen=True)
+class PatientAssignment:
+    patient_id: str
+    edf_path: Path
+
+
+@dataclass(frozen=True)
+class RoomAssignment:
+    room_id: str
+    patients: Tuple[PatientAssignment, ...]
+
+
+@dataclass(frozen=True)
+class SessionPolicy:
+    min_suspicious_windows: int = 1
+
+
+@dataclass(frozen=True)
+class ThresholdsConfig:
+    path: Path
+    suspicious_threshold: float
+
+
+@dataclass(frozen=True)
+class FogConfig:
+    """
+    Whole fog node configuration, loaded once at startup.
+    """
+
+    window: WindowConfig
+    signal: SignalConfig
+    simulation: SimulationConfig
+    paths: PathsConfig
+    rooms: Tuple[RoomAssignment, ...]
+    session: SessionPolicy
+    thresholds: ThresholdsConfig
+
+    def room(self, room_id: str) -> RoomAssignment:
+        for room in self.rooms:
+            if room.room_id == room_id:
+                return room
+        raise ValueError(f"Room '{room_id}' not found in configuration")
+
+    @property
+    def room_ids(self) -> Tuple[str, ...]:
+        return tuple(room.room_id for room in self.rooms)
+
+    def with_simulation(self, **changes: Any) -> "FogConfig":
+        """
+        Copy with some simulation fields overridden (e.g. from the CLI).
+        """
+        changes = {k: v for k, v in changes.items() if v is not None}
+        simulation = replace(self.simulation, **changes)
+        _validate_simulation(simulation)
+        return replace(self, simulation=simulation)
+
+
+# ============================================================
+# YAML helpers
+# ============================================================
+
+def _read_yaml(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        raise FileNotFoundError(f"Configuration file not found: {path}")
+
+    with path.open("r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid {path.name}: expected a mapping at top level")
+
+    return data
+
+
+def _section(data: Dict[str, Any], key: str, source: str) -> Dict[str, Any]:
+    value = data.get(key) or {}
+    if not isinstance(value, dict):
+        raise ValueError(f"Invalid {source}: '{key}' must be a mapping")
+    return value
+
+
+def _number(section: Dict[str, Any], key: str, default: float, source: str) -> float:
+    value = section.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Invalid {source}: '{key}' must be a number, got {value!r}")
+    return float(value)
+
+
+# ============================================================
+# Validation
+# ============================================================
+
+def _validate_window(window: WindowConfig) -> None:
+    if window.duration_seconds <= 0:
+        raise ValueError("Invalid fog_config.yaml: window.duration_seconds must be > 0")
+    if not 0 <= window.overlap_seconds < window.duration_seconds:
+        raise ValueError(
+            "Invalid fog_config.yaml: window.overlap_seconds must be in "
+            "[0, duration_seconds)"
+        )
+    if window.smoothing not in SMOOTHING_METHODS:
+        raise ValueError(
+            f"Invalid fog_config.yaml: window.smoothing must be one of "
+            f"{SMOOTHING_METHODS}, got {window.smoothing!r}"
+        )
+
+
+def _validate_simulation(simulation: SimulationConfig) -> None:
+    if not simulation.speed > 0 or math.isnan(simulation.speed):
+        raise ValueError(
+            "Invalid fog_config.yaml: simulation.speed must be > 0 (.inf: no pacing)"
+        )
+    if simulation.artificial_delay_seconds < 0:
+        raise ValueError(
+            "Invalid fog_config.yaml: simulation.artificial_delay_seconds must be >= 0"
+        )
+
+
+# ============================================================
+# Loaders
+# ============================================================
+
+def _load_fog_section(
+    path: Path,
+) -> Tuple[WindowConfig, SignalConfig, SimulationConfig, PathsConfig]:
+    source: str = path.name
+    fog = _section(_read_yaml(path), "fog", source)
+
+    window_raw = _section(fog, "window", source)
+    window = WindowConfig(
+        duration_seconds=_number(window_raw, "duration_seconds", 4.0, source),
+        overlap_seconds=_number(window_raw, "overlap_seconds", 0.0, source),
+        smoothing=window_raw.get("smoothing", "none"),
+    )
+    _validate_window(window)
+
+    signal_raw = _section(fog, "signal", source)
+    rate = signal_raw.get("expected_sampling_rate")
+    if rate is not None and (isinstance(rate, bool) or not isinstance(rate, int) or rate <= 0):
+        raise ValueError(
+            f"Invalid {source}: signal.expected_sampling_rate must be a "
+            f"positive integer or null, got {rate!r}"
+        )
+    signal = SignalConfig(expected_sampling_rate=rate)
+
+    simulation_raw = _section(fog, "simulation", source)
+    realtime = simulation_raw.get("realtime", True)
+    if not isinstance(realtime, bool):
+        raise ValueError(f"Invalid {source}: simulation.realtime must be true/false")
+    simulation = SimulationConfig(
+        realtime=realtime,
+        speed=_number(simulation_raw, "speed", 1.0, source),
+        artificial_delay_seconds=_number(
+            simulation_raw, "artificial_delay_seconds", 0.0, source
+        ),
+    )
+    _validate_simulation(simulation)
+
+    paths_raw = _section(fog, "paths", source)
+    paths = PathsConfig(
+        local_output_dir=Path(paths_raw.get("local_output_dir", "fog/output"))
+    )
+
+    return window, signal, simulation, paths
+
+
+def _load_rooms(path: Path) -> Tuple[RoomAssignment, ...]:
+    source: str = path.name
+    rooms_raw = _read_yaml(path).get("rooms")
+
+    if not isinstance(rooms_raw, dict) or not rooms_raw:
+        raise ValueError(f"Invalid {source}: missing 'rooms' key")
+
+    rooms = []
+    for room_id, room_raw in rooms_raw.items():
+        patients_raw = (room_raw or {}).get("patients") or []
+        if not isinstance(patients_raw, list):
+            raise ValueError(f"Invalid {source}: rooms.{room_id}.patients must be a list")
+
+        patients = []
+        for patient in patients_raw:
+            if not isinstance(patient, dict) or not {"patient_id", "edf_path"} <= patient.keys():
+                raise ValueError(
+                    f"Invalid {source}: every patient in {room_id} needs "
+                    f"'patient_id' and 'edf_path'"
+                )
+            patients.append(
+                PatientAssignment(
+                    patient_id=str(patient["patient_id"]),
+                    edf_path=Path(patient["edf_path"]),
+                )
+            )
+
+        rooms.append(RoomAssignment(room_id=str(room_id), patients=tuple(patients)))
+
+    return tuple(rooms)
+
+
+def _load_session_policy(path: Path) -> SessionPolicy:
+    session = _section(_read_yaml(path), "session", path.name)
+    value = session.get("min_suspicious_windows")
+
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError("Invalid session_policy.yaml structure")
+
+    return SessionPolicy(min_suspicious_windows=value)
+
+
+def _load_thresholds(path: Path) -> ThresholdsConfig:
+    # Parsed through the shared cache, so decisions reuse this parse
+    cfg = get_thresholds(path)
+    threshold = _number(cfg["inference"], "suspicious_threshold", 0.0, path.name)
+
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(
+            "Invalid thresholds.yaml: inference.suspicious_threshold must be in [0, 1]"
+        )
+
+    return ThresholdsConfig(path=path, suspicious_threshold=threshold)
+
+
+def load_fog_config(
+    fog_config_path: Path = FOG_CONFIG_PATH,
+    room_assignments_path: Path = ROOM_ASSIGNMENTS_PATH,
+    session_policy_path: Path = SESSION_POLICY_PATH,
+    thresholds_path: Path = THRESHOLDS_PATH,
+) -> FogConfig:
+    """
+    Load and validate every fog YAML into a FogConfig.
+
+    Parameters
+    ----------
+    fog_config_path : Path
+        Path to fog_config.yaml.
+    room_assignments_path : Path
+        Path to room_assignments.yaml.
+    session_policy_path : Path
+        Path to session_policy.yaml.
+    thresholds_path : Path
+        Path to thresholds.yaml.
+
+    Returns
+    -------
+    FogConfig
+        Immutable configuration for every pipeline stage.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a configuration file is missing.
+    ValueError
+        If a value has the wrong type or is out of range.
+    """
+    window, signal, simulation, paths = _load_fog_section(fog_config_path)
+
+    return FogConfig(
+        window=window,
+        signal=signal,
+        simulation=simulation,
+        paths=paths,
+        rooms=_load_rooms(room_assignments_path),
+        session=_load_session_policy(session_policy_path),
+        thresholds=_load_thresholds(thresholds_path),
+    )
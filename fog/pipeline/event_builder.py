@@ -18,7 +18,9 @@ NO realiza:
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict, Optional
+
+from fog.pipeline.event_schema import EVENT_VERSION
 
 
 def build_window_event(
@@ -28,6 +30,7 @@ def build_window_event(
     window_index: int,
     score: float,
     suspected: bool,
+    smoothed_score: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     Build an event for a suspected EEG window.
@@ -44,14 +47,19 @@ def build_window_event(
         Index of the window within the session.
     score : float
         Probabilistic score associated with the window.
+    suspected : bool
+        Decision for the window (on the smoothed score if smoothing).
+    smoothed_score : Optional[float], optional
+        Stride-smoothed score (overlapping windows); omitted if None.
 
     Returns
     -------
     Dict[str, Any]
-        JSON-serializable event dictionary.
+        JSON-serializable event dictionary (schema in event_schema.py).
     """
 
     event: Dict[str, Any] = {
+        "event_version": EVENT_VERSION,
         "event_type": "eeg_window",
         "suspected": suspected,
         "timestamp_utc": datetime.utcnow().isoformat(),
@@ -68,4 +76,7 @@ def build_window_event(
         "partition_key": patient_id,
     }
 
+    if smoothed_score is not None:
+        event["smoothed_score"] = float(smoothed_score)
+
     return event
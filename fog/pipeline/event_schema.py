@@ -0,0 +1,335 @@
+"""
+event_schema.py
+
+Esquema versionado de los eventos de ventana EEG y su codificación,
+compartido por el fog (productor) y los Lambdas de la capa cloud
+(consumidores).
+
+Responsabilidades:
+- Definir los campos del evento y la versión del esquema (event_version)
+- Codificar cada evento en un formato binario compacto (struct) o en JSON
+- Decodificar cualquier payload soportado, negociando el formato por su
+  cabecera:
+    - binario: 1 byte BINARY_MAGIC + 1 byte event_version
+    - JSON: objeto con "event_version" (ausente = versión 1)
+- Normalizar eventos de versiones anteriores a la actual
+
+Formato binario (versión 2, big-endian):
+- BINARY_MAGIC (0xEE), event_version (uint8), flags (uint8)
+- window_index (uint32), score (float64), timestamp_utc (int64,
+  microsegundos desde epoch, UTC)
+- smoothed_score (float64), solo si flags & HAS_SMOOTHED
+- session_id: 16 bytes si flags & UUID_SESSION, si no cadena
+- cadenas (uint8 longitud + UTF-8): event_type, room_id, patient_id y
+  partition_key (solo si flags & HAS_PARTITION_KEY; si no, es patient_id)
+
+Un evento que el formato binario no puede representar exactamente
+(campos extra, cadenas largas, timestamp con zona horaria...) se
+codifica en JSON: el decodificador acepta ambos.
+
+Solo usa la biblioteca estándar: el mismo fichero se empaqueta en el
+zip del Lambda consumidor (cloud/components/compute/lambda_kinesis_consumer.py).
+
+NO realiza:
+- Agregación de varios eventos en un registro (aggregation.py)
+- Envío a Kinesis
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Final, FrozenSet, Literal, Tuple
+
+# ============================================================
+# Schema
+# ============================================================
+
+# 1: JSON without event_version (fog before the binary codec)
+# 2: adds event_version; binary codec
+EVENT_VERSION: Final[int] = 2
+SUPPORTED_VERSIONS: Final[FrozenSet[int]] = frozenset({1, 2})
+
+EVENT_FIELDS: Final[Tuple[str, ...]] = (
+    "event_version",
+    "event_type",
+    "suspected",
+    "timestamp_utc",
+    "room_id",
+    "patient_id",
+    "session_id",
+    "window_index",
+    "score",
+    "smoothed_score",
+    "partition_key",
+)
+
+Codec = Literal["binary", "json"]
+CODECS: Final[Tuple[str, ...]] = ("binary", "json")
+
+# ============================================================
+# Binary layout
+# ============================================================
+
+# First byte of a binary event; JSON events start with b"{"
+BINARY_MAGIC: Final[int] = 0xEE
+
+_SUSPECTED: Final[int] = 0x01
+_HAS_SMOOTHED: Final[int] = 0x02
+_HAS_PARTITION_KEY: Final[int] = 0x04
+_UUID_SESSION: Final[int] = 0x08
+
+# magic, version, flags, window_index, score, timestamp (us)
+_HEAD = struct.Struct(">BBBIdq")
+_FLOAT = struct.Struct(">d")
+_UINT32_MAX: Final[int] = 0xFFFFFFFF
+_MAX_STRING_BYTES: Final[int] = 255
+
+_EPOCH: Final[datetime] = datetime(1970, 1, 1)
+_MICROSECOND: Final[timedelta] = timedelta(microseconds=1)
+
+_BINARY_FIELDS: Final[FrozenSet[str]] = frozenset(EVENT_FIELDS)
+
+
+class EventFormatError(ValueError):
+    """
+    Payload is not a supported event (unknown format or version).
+    """
+
+
+@lru_cache(maxsize=4096)
+def _pack_string(value: str) -> bytes:
+    # Room / patient / session ids repeat for every window
+    data = value.encode("utf-8")
+    if len(data) > _MAX_STRING_BYTES:
+        raise OverflowError("String too long for the binary codec")
+    return bytes((len(data),)) + data
+
+
+@lru_cache(maxsize=1024)
+def _pack_session(session_id: str) -> Tuple[int, bytes]:
+    try:
+        parsed = uuid.UUID(session_id)
+    except ValueError:
+        parsed = None
+
+    if parsed is not None and str(parsed) == session_id:
+        return _UUID_SESSION, parsed.bytes
+    return 0, _pack_string(session_id)
+
+
+# ============================================================
+# Encoding
+# ============================================================
+
+def _encode_binary(event: Dict[str, Any]) -> bytes:
+    """
+    Binary encoding; raises (TypeError, ValueError, OverflowError,
+    struct.error) if the event does not fit the layout exactly.
+    """
+    if not _BINARY_FIELDS.issuperset(event):
+        raise ValueError("Event has fields outside the schema")
+
+    suspected = event["suspected"]
+    window_index = event["window_index"]
+    score = event["score"]
+    if (
+        type(suspected) is not bool
+        or type(window_index) is not int
+        or not 0 <= window_index <= _UINT32_MAX
+        or type(score) is not float
+    ):
+        raise TypeError("Event field types do not fit the binary layout")
+
+    timestamp = datetime.fromisoformat(event["timestamp_utc"])
+    if timestamp.tzinfo is not None or timestamp.isoformat() != event["timestamp_utc"]:
+        raise ValueError("Timestamp does not round-trip through the binary layout")
+
+    flags: int = _SUSPECTED if suspected else 0
+    tail = b""
+
+    smoothed = event.get("smoothed_score")
+    if smoothed is not None:
+        if type(smoothed) is not float:
+            raise TypeError("smoothed_score must be a float")
+        flags |= _HAS_SMOOTHED
+        tail = _FLOAT.pack(smoothed)
+
+    session_flag, session_bytes = _pack_session(event["session_id"])
+    flags |= session_flag
+
+    patient_id: str = event["patient_id"]
+    partition_key = event.get("partition_key", patient_id)
+    strings = (
+        _pack_string(event["event_type"])
+        + _pack_string(event["room_id"])
+        + _pack_string(patient_id)
+    )
+    if partition_key != patient_id:
+        flags |= _HAS_PARTITION_KEY
+        strings += _pack_string(partition_key)
+
+    head = _HEAD.pack(
+        BINARY_MAGIC,
+        EVENT_VERSION,
+        flags,
+        window_index,
+        score,
+        (timestamp - _EPOCH) // _MICROSECOND,
+    )
+    return head + tail + session_bytes + strings
+
+
+def _encode_json(event: Dict[str, Any]) -> bytes:
+    if "event_version" not in event:
+        event = {**event, "event_version": EVENT_VERSION}
+    return json.dumps(event, separators=(",", ":")).encode("utf-8")
+
+
+def encode_event(event: Dict[str, Any], codec: Codec = "binary") -> bytes:
+    """
+    Serialize an event for Kinesis.
+
+    Parameters
+    ----------
+    event : Dict[str, Any]
+        Event built by event_builder.py (or an older JSON event).
+    codec : {"binary", "json"}
+        Preferred encoding. "binary" falls back to JSON for events the
+        binary layout cannot represent exactly.
+
+    Returns
+    -------
+    bytes
+        Payload accepted by decode_event.
+    """
+    if codec == "binary":
+        try:
+            return _encode_binary(event)
+        except (KeyError, TypeError, ValueError, OverflowError, struct.error):
+            pass
+    elif codec != "json":
+        raise ValueError(f"Unknown event codec: {codec}")
+
+    return _encode_json(event)
+
+
+# ============================================================
+# Decoding
+# ============================================================
+
+@lru_cache(maxsize=1024)
+def _unpack_session(data: bytes) -> str:
+    return str(uuid.UUID(bytes=data))
+
+
+@lru_cache(maxsize=4096)
+def _unpack_string(data: bytes) -> str:
+    return data.decode("utf-8")
+
+
+def _read_string(payload: bytes, offset: int) -> Tuple[str, int]:
+    length = payload[offset]
+    end = offset + 1 + length
+    if end > len(payload):
+        raise EventFormatError("Truncated binary event")
+    return _unpack_string(payload[offset + 1:end]), end
+
+
+def _decode_binary(payload: bytes) -> Dict[str, Any]:
+    _, version, flags, window_index, score, micros = _HEAD.unpack_from(payload)
+    if version != EVENT_VERSION:
+        raise EventFormatError(f"Unsupported binary event_version: {version}")
+
+    offset: int = _HEAD.size
+    smoothed = None
+    if flags & _HAS_SMOOTHED:
+        (smoothed,) = _FLOAT.unpack_from(payload, offset)
+        offset += _FLOAT.size
+
+    if flags & _UUID_SESSION:
+        if offset + 16 > len(payload):
+            raise EventFormatError("Truncated binary event")
+        session_id = _unpack_session(payload[offset:offset + 16])
+        offset += 16
+    else:
+        session_id, offset = _read_string(payload, offset)
+
+    event_type, offset = _read_string(payload, offset)
+    room_id, offset = _read_string(payload, offset)
+    patient_id, offset = _read_string(payload, offset)
+    partition_key = patient_id
+    if flags & _HAS_PARTITION_KEY:
+        partition_key, offset = _read_string(payload, offset)
+
+    if offset != len(payload):
+        raise EventFormatError("Trailing bytes in binary event")
+
+    event: Dict[str, Any] = {
+        "event_version": version,
+        "event_type": event_type,
+        "suspected": bool(flags & _SUSPECTED),
+        "timestamp_utc": (_EPOCH + timedelta(microseconds=micros)).isoformat(),
+        "room_id": room_id,
+        "patient_id": patient_id,
+        "session_id": session_id,
+        "window_index": window_index,
+        "score": score,
+        "partition_key": partition_key,
+    }
+    if smoothed is not None:
+        event["smoothed_score"] = smoothed
+
+    return event
+
+
+def upgrade_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bring a decoded JSON event to the current schema version.
+
+    Raises
+    ------
+    EventFormatError
+        If event_version is not supported.
+    """
+    version = event.get("event_version", 1)
+    if version not in SUPPORTED_VERSIONS:
+        raise EventFormatError(f"Unsupported event_version: {version!r}")
+
+    if version == 1:
+        event["event_version"] = EVENT_VERSION
+
+    return event
+
+
+def decode_event(payload: bytes) -> Dict[str, Any]:
+    """
+    Deserialize a binary or JSON event, upgraded to EVENT_VERSION.
+
+    Raises
+    ------
+    EventFormatError
+        If the payload is not a supported event (a ValueError, so
+        callers can treat it as a malformed record).
+    """
+    if not payload:
+        raise EventFormatError("Empty event payload")
+
+    if payload[0] == BINARY_MAGIC:
+        try:
+            return _decode_binary(payload)
+        except (IndexError, OverflowError, struct.error) as exc:
+            raise EventFormatError(f"Malformed binary event: {exc}") from exc
+
+    try:
+        event = json.loads(payload)
+    except ValueError as exc:
+        raise EventFormatError(f"Invalid JSON event: {exc}") from exc
+
+    if not isinstance(event, dict):
+        raise EventFormatError("JSON event is not an object")
+
+    return upgrade_event(event)
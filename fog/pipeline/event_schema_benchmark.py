@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+event_schema_benchmark.py
+
+Verificación y microbenchmark del códec de eventos
+(fog/pipeline/event_schema.py).
+
+Responsabilidades:
+- Comprobar el round-trip exacto (encode -> decode) de eventos
+  sintéticos con cada códec, incluidos los que caen a JSON
+  (campos extra, timestamp con zona horaria, ids largos) y los
+  eventos v1 sin event_version
+- Medir el tamaño por evento y el throughput de encode / decode
+  (eventos por segundo) de los códecs binario y JSON
+
+NO realiza:
+- Agregación ni envío a Kinesis
+
+Uso:
+    python -m fog.pipeline.event_schema_benchmark --events 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from fog.pipeline.event_builder import build_window_event
+from fog.pipeline.event_schema import CODECS, EVENT_VERSION, decode_event, encode_event
+
+
+def build_events(n_events: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Synthetic events as built by event_builder.py, consecutive windows
+    of a few sessions.
+    """
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    sessions = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(4)]
+
+    events: List[Dict[str, Any]] = []
+    for i in range(n_events):
+        score = rng.random()
+        event = build_window_event(
+            room_id=f"room_{i % 3}",
+            patient_id=f"patient_{i % 4:03d}",
+            session_id=sessions[i % 4],
+            window_index=i // 4,
+            score=score,
+            suspected=score > 0.8,
+            smoothed_score=rng.random() if i % 2 else None,
+        )
+        event["timestamp_utc"] = (start + timedelta(seconds=i, microseconds=rng.randrange(10**6))).isoformat()
+        events.append(event)
+
+    return events
+
+
+def build_edge_events() -> List[Dict[str, Any]]:
+    """
+    Events outside the binary layout (JSON fallback) and legacy v1 events.
+    """
+    base = build_events(1, seed=1)[0]
+    legacy = {k: v for k, v in base.items() if k != "event_version"}
+
+    return [
+        {**base, "extra_field": [1, 2, 3]},
+        {**base, "timestamp_utc": datetime.now(timezone.utc).isoformat()},
+        {**base, "timestamp_utc": "2026-01-01T00:00:00"},
+        {**base, "session_id": "s" * 300},
+        {**base, "session_id": "session-not-a-uuid"},
+        {**base, "session_id": str(uuid.uuid4()).upper()},
+        {**base, "partition_key": "room_0"},
+        {**base, "window_index": 2**40},
+        {**base, "score": 1},
+        {**base, "patient_id": "paciente_ñ"},
+        legacy,
+    ]
+
+
+def check_round_trip(events: List[Dict[str, Any]]) -> int:
+    """
+    Assert decode(encode(event)) == event for every codec.
+
+    Returns
+    -------
+    int
+        Number of checked (event, codec) pairs.
+    """
+    checked = 0
+    for event in events:
+        expected = {"event_version": EVENT_VERSION, **event}
+        expected.setdefault("partition_key", event["patient_id"])
+
+        for codec in CODECS:
+            decoded = decode_event(encode_event(event, codec))
+            decoded.setdefault("partition_key", decoded["patient_id"])
+            if decoded != expected:
+                raise AssertionError(f"Round trip mismatch ({codec}): {event} -> {decoded}")
+            checked += 1
+
+    return checked
+
+
+def time_codec(events: List[Dict[str, Any]], codec: str, repeats: int) -> Dict[str, float]:
+    """
+    Best-of-`repeats` encode and decode throughput plus mean size.
+    """
+    payloads = [encode_event(event, codec) for event in events]
+    encode_s = decode_s = float("inf")
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for event in events:
+            encode_event(event, codec)
+        encode_s = min(encode_s, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for payload in payloads:
+            decode_event(payload)
+        decode_s = min(decode_s, time.perf_counter() - start)
+
+    return {
+        "bytes": sum(map(len, payloads)) / len(payloads),
+        "encode_eps": len(events) / encode_s,
+        "decode_eps": len(events) / decode_s,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Round-trip check and throughput of the event codecs"
+    )
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    events = build_events(args.events)
+    checked = check_round_trip(events + build_edge_events())
+
+    results = {codec: time_codec(events, codec, args.repeats) for codec in CODECS}
+    json_bytes = results["json"]["bytes"]
+
+    print(
+        "\n"
+        "================ EVENT CODEC BENCHMARK ================\n"
+        f" Events             : {args.events}\n"
+        f" Round trips OK     : {checked}\n"
+        f" {'codec':<8}{'bytes/event':>12}{'vs json':>9}{'encode ev/s':>13}{'decode ev/s':>13}"
+    )
+    for codec, r in results.items():
+        print(
+            f" {codec:<8}{r['bytes']:>12.1f}{r['bytes'] / json_bytes:>8.0%}"
+            f"{r['encode_eps']:>13,.0f}{r['decode_eps']:>13,.0f}"
+        )
+    print("=======================================================\n")
+
+    # Raw json.dumps of the pre-codec publisher, for reference
+    start = time.perf_counter()
+    for event in events:
+        json.dumps(event).encode("utf-8")
+    print(f" (legacy json.dumps encode: {len(events) / (time.perf_counter() - start):,.0f} ev/s)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""
+features.py
+
+Extracción vectorizada de características EEG para detección de crisis.
+
+Responsabilidades:
+- Recibir un lote de ventanas EEG (B, C, T)
+- Calcular en una sola pasada, por ventana y canal:
+    - Potencia por bandas (Welch): delta, theta, alpha, beta, gamma
+    - Line length
+    - Parámetros de Hjorth (actividad, movilidad, complejidad)
+    - Curtosis
+    - Entropía espectral
+- Compartir una única FFT (PSD de Welch) entre todas las
+  características espectrales
+- Ventanas solapadas (p. ej. 4 s con salto de 1 s): calcular cada
+  segmento de Welch una sola vez por sesión (también entre lotes
+  sucesivos, OverlappingFeatureStream) y las sumas temporales con
+  sumas prefijas, combinándolos por ventana (coste ~ ventanas sin
+  solape)
+
+Salida estándar:
+- features : np.ndarray con shape (B, C, n_features)
+  (n_windows en lugar de B para extract_features_overlapping)
+- FEATURE_NAMES : nombres en el mismo orden del último eje
+
+NO realiza:
+- Filtrado
+- Inferencia
+- Decisiones
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Final, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from fog.pipeline.windowing import window_view
+
+
+# ============================================================
+# Configuration constants
+# ============================================================
+
+BANDS: Final[Dict[str, Tuple[float, float]]] = {
+    "delta": (0.5, 4.0),
+    "theta": (4.0, 8.0),
+    "alpha": (8.0, 13.0),
+    "beta": (13.0, 30.0),
+    "gamma": (30.0, 70.0),
+}
+
+WELCH_SEGMENT_SECONDS: Final[float] = 2.0
+WELCH_OVERLAP: Final[float] = 0.5
+
+FEATURE_NAMES: Final[Tuple[str, ...]] = (
+    *(f"band_power_{band}" for band in BANDS),
+    "line_length",
+    "hjorth_activity",
+    "hjorth_mobility",
+    "hjorth_complexity",
+    "kurtosis",
+    "spectral_entropy",
+)
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _safe_divide(
+    num: np.ndarray,
+    den: np.ndarray,
+) -> np.ndarray:
+    """
+    num / den, with 0 where den == 0 (flat channels).
+
+    EEG amplitudes are in volts, so an additive epsilon would bias
+    the ratios; zero denominators are masked instead.
+    """
+    out = np.zeros(np.broadcast(num, den).shape)
+    return np.divide(num, den, out=out, where=den > 0)
+
+
+def welch_psd(
+    windows: np.ndarray,
+    sfreq: int,
+    segment_seconds: float = WELCH_SEGMENT_SECONDS,
+    overlap: float = WELCH_OVERLAP,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Welch PSD of every window and channel with a single batched FFT.
+
+    Equivalent to scipy.signal.welch(windows, sfreq, nperseg=...,
+    noverlap=..., window="hann") along the last axis.
+
+    Parameters
+    ----------
+    windows : np.ndarray
+        EEG windows with shape (B, C, T).
+    sfreq : int
+        Sampling frequency in Hz.
+
+    Returns
+    -------
+    freqs : np.ndarray
+        Shape (n_freqs,).
+    psd : np.ndarray
+        Shape (B, C, n_freqs), in V**2/Hz.
+    """
+
+    nperseg, step = _welch_segments(windows.shape[-1], sfreq, segment_seconds, overlap)
+
+    periodograms = _segment_periodograms(windows, nperseg, step)
+    return _welch_finalize(periodograms.mean(axis=-2), nperseg, sfreq)
+
+
+def _welch_segments(
+    n_samples: int,
+    sfreq: int,
+    segment_seconds: float = WELCH_SEGMENT_SECONDS,
+    overlap: float = WELCH_OVERLAP,
+) -> Tuple[int, int]:
+    """
+    Welch segment length and step (in samples) for a window length.
+    """
+    nperseg: int = min(n_samples, int(segment_seconds * sfreq))
+    step: int = max(1, nperseg - int(nperseg * overlap))
+    return nperseg, step
+
+
+def _segment_periodograms(
+    x: np.ndarray,
+    nperseg: int,
+    step: int,
+) -> np.ndarray:
+    """
+    |rfft|**2 of every detrended, Hann-tapered segment along the last
+    axis: shape (..., n_segments, nperseg // 2 + 1), unscaled.
+    """
+    taper = np.hanning(nperseg + 1)[:-1]  # periodic Hann, as scipy
+
+    # (..., n_segments, nperseg) view -> detrend, taper, one rfft
+    segments = sliding_window_view(x, nperseg, axis=-1)[..., ::step, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    spectrum = np.fft.rfft(segments * taper, axis=-1)
+
+    return spectrum.real ** 2 + spectrum.imag ** 2
+
+
+def _welch_finalize(
+    mean_periodogram: np.ndarray,
+    nperseg: int,
+    sfreq: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scale averaged periodograms to a one-sided PSD in V**2/Hz.
+    """
+    taper = np.hanning(nperseg + 1)[:-1]
+    psd = mean_periodogram * (1.0 / (sfreq * np.sum(taper ** 2)))
+
+    if nperseg % 2 == 0:
+        psd[..., 1:-1] *= 2.0
+    else:
+        psd[..., 1:] *= 2.0
+
+    freqs = np.fft.rfftfreq(nperseg, d=1.0 / sfreq)
+    return freqs, psd
+
+
+def _spectral_features(
+    freqs: np.ndarray,
+    psd: np.ndarray,
+    sfreq: int,
+) -> List[np.ndarray]:
+    """
+    Band powers and spectral entropy from a Welch PSD (..., n_freqs).
+    """
+    df: float = float(freqs[1] - freqs[0])
+
+    band_powers = [
+        psd[..., (freqs >= low) & (freqs < high)].sum(axis=-1) * df
+        for low, high in BANDS.values()
+    ]
+
+    in_range = (freqs >= BANDS["delta"][0]) & (freqs <= sfreq / 2.0)
+    p = psd[..., in_range]
+    p = _safe_divide(p, p.sum(axis=-1, keepdims=True))
+    plogp = p * np.log(np.where(p > 0, p, 1.0))
+    spectral_entropy = -plogp.sum(axis=-1) / np.log(p.shape[-1])
+
+    return [*band_powers, spectral_entropy]
+
+
+def _time_features(
+    n: int,
+    sum_x: np.ndarray,
+    sum_x2: np.ndarray,
+    sum_x3: np.ndarray,
+    sum_x4: np.ndarray,
+    sum_abs_dx: np.ndarray,
+    sum_dx: np.ndarray,
+    sum_dx2: np.ndarray,
+    sum_ddx: np.ndarray,
+    sum_ddx2: np.ndarray,
+) -> List[np.ndarray]:
+    """
+    Line length, Hjorth parameters and kurtosis from per-window power
+    sums of x, dx and ddx (n samples per window).
+    """
+    mean = sum_x / n
+    var_x = np.maximum(sum_x2 / n - mean ** 2, 0.0)
+    var_dx = np.maximum(sum_dx2 / (n - 1) - (sum_dx / (n - 1)) ** 2, 0.0)
+    var_ddx = np.maximum(sum_ddx2 / (n - 2) - (sum_ddx / (n - 2)) ** 2, 0.0)
+
+    mobility = np.sqrt(_safe_divide(var_dx, var_x))
+    mobility_dx = np.sqrt(_safe_divide(var_ddx, var_dx))
+    complexity = _safe_divide(mobility_dx, mobility)
+
+    # Central 4th moment from raw moments
+    m4 = (
+        sum_x4 / n
+        - 4.0 * mean * sum_x3 / n
+        + 6.0 * mean ** 2 * sum_x2 / n
+        - 3.0 * mean ** 4
+    )
+    kurtosis = np.where(var_x > 0, _safe_divide(m4, var_x ** 2) - 3.0, 0.0)
+
+    return [sum_abs_dx, var_x, mobility, complexity, kurtosis]
+
+
+# ============================================================
+# Public API
+# ============================================================
+
+def extract_features(
+    windows: np.ndarray,
+    sfreq: int,
+) -> np.ndarray:
+    """
+    Compute seizure-detection features for a batch of EEG windows.
+
+    Parameters
+    ----------
+    windows : np.ndarray
+        EEG windows with shape (B, C, T); a single (C, T) window is
+        also accepted and treated as a batch of one.
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+
+    Returns
+    -------
+    features : np.ndarray
+        Shape (B, C, len(FEATURE_NAMES)), ordered as FEATURE_NAMES.
+    """
+
+    if windows.ndim == 2:
+        windows = windows[np.newaxis]
+
+    if windows.ndim != 3:
+        raise ValueError("Windows must have shape (batch, n_channels, n_samples)")
+
+    x = np.asarray(windows, dtype=np.float64)
+
+    # --------------------------------------------------
+    # Spectral features (shared Welch PSD)
+    # --------------------------------------------------
+    freqs, psd = welch_psd(x, sfreq)
+    *band_powers, spectral_entropy = _spectral_features(freqs, psd, sfreq)
+
+    # --------------------------------------------------
+    # Time-domain features
+    # --------------------------------------------------
+    dx = np.diff(x, axis=-1)
+    ddx = np.diff(dx, axis=-1)
+
+    line_length = np.abs(dx).sum(axis=-1)
+
+    var_x = x.var(axis=-1)
+    var_dx = dx.var(axis=-1)
+    var_ddx = ddx.var(axis=-1)
+
+    mobility = np.sqrt(_safe_divide(var_dx, var_x))
+    mobility_dx = np.sqrt(_safe_divide(var_ddx, var_dx))
+    complexity = _safe_divide(mobility_dx, mobility)
+
+    centered = x - x.mean(axis=-1, keepdims=True)
+    m2 = var_x
+    m4 = (centered ** 4).mean(axis=-1)
+    kurtosis = np.where(m2 > 0, _safe_divide(m4, m2 ** 2) - 3.0, 0.0)
+
+    return np.stack(
+        [
+            *band_powers,
+            line_length,
+            var_x,
+            mobility,
+            complexity,
+            kurtosis,
+            spectral_entropy,
+        ],
+        axis=-1,
+    )
+
+
+# Quantities summed for the time-domain features, in _time_features
+# order, and the offset of their first element in a window (dx and
+# ddx elements are indexed by the last sample they use)
+_TIME_SUM_OFFSETS: Final[np.ndarray] = np.array([0, 0, 0, 0, 1, 1, 1, 2, 2])
+
+
+class OverlappingFeatureStream:
+    """
+    Features of the consecutive windows of one session, computing each
+    hop once.
+
+    Windows are pushed in order (window k + 1 starts one step after
+    window k), in batches of any size, and get the same features as
+    extract_features(windows, sfreq):
+
+    - Welch segment periodograms live on a session-wide grid and are
+      averaged per window, so adjacent windows share segments and each
+      segment is transformed once, also across pushes (e.g. a 1 s hop
+      with 2 s / 50 % segments computes one new segment per window).
+      This requires the window step to be a multiple of the Welch
+      step; otherwise each window's PSD is computed separately.
+    - Time-domain features come from session-wide prefix sums of x,
+      x**2, ..., dx, ddx (kept at the window starts still needed), so
+      each sample is visited once regardless of overlap.
+
+    Parameters
+    ----------
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+    window_seconds : float, optional
+        Window duration in seconds (default: 4.0).
+    overlap_seconds : float, optional
+        Overlap between consecutive windows (default: 3.0, i.e. 1 s hop).
+    """
+
+    def __init__(
+        self,
+        sfreq: int,
+        window_seconds: float = 4.0,
+        overlap_seconds: float = 3.0,
+    ) -> None:
+        self.sfreq = sfreq
+        self.window_samples: int = int(window_seconds * sfreq)
+        self.step_samples: int = self.window_samples - int(overlap_seconds * sfreq)
+
+        if self.step_samples <= 0:
+            raise ValueError("Overlap must be smaller than window duration")
+
+        self._nperseg, self._welch_step = _welch_segments(self.window_samples, sfreq)
+        self._n_segments: int = (
+            (self.window_samples - self._nperseg) // self._welch_step + 1
+        )
+        self._shared_grid: bool = self.step_samples % self._welch_step == 0
+        self._ratio: int = self.step_samples // self._welch_step
+
+        # Periodograms of grid segments [_grid_start, _grid_start + n)
+        # still needed by the next windows
+        self._grid: Optional[np.ndarray] = None
+        self._grid_start: int = 0
+
+        # Prefix sums (9, C) of the time-domain quantities after the
+        # first _consumed samples, the last two samples (dx, ddx) and
+        # the prefix sums at upcoming window starts
+        self._consumed: int = 0
+        self._running: Optional[np.ndarray] = None
+        self._context: Optional[np.ndarray] = None
+        self._marks: Dict[int, np.ndarray] = {}
+
+        self.windows: int = 0
+
+    def push(self, windows: np.ndarray) -> np.ndarray:
+        """
+        Features of the next (B, C, T) windows of the session.
+
+        Returns
+        -------
+        features : np.ndarray
+            Shape (B, C, len(FEATURE_NAMES)), ordered as FEATURE_NAMES.
+        """
+
+        if windows.ndim != 3 or windows.shape[-1] != self.window_samples:
+            raise ValueError(
+                f"Windows must have shape (batch, n_channels, {self.window_samples})"
+            )
+
+        n_windows, n_channels, _ = windows.shape
+        if n_windows == 0:
+            return np.empty((0, n_channels, len(FEATURE_NAMES)))
+
+        x = np.asarray(windows, dtype=np.float64)
+        step: int = self.step_samples
+        length: int = self.window_samples
+
+        # Samples spanned by the batch: first window + the new hop of each next one
+        span = np.concatenate(
+            [x[0], *x[1:, :, length - step:]], axis=-1
+        )
+        starts = (self.windows + np.arange(n_windows)) * step
+
+        # --------------------------------------------------
+        # Spectral features (segment periodograms shared across windows)
+        # --------------------------------------------------
+        if self._shared_grid:
+            mean_periodogram = self._grid_mean_periodogram(span, n_windows)
+        else:
+            mean_periodogram = _segment_periodograms(
+                x, self._nperseg, self._welch_step
+            ).mean(axis=-2)
+
+        freqs, psd = _welch_finalize(mean_periodogram, self._nperseg, self.sfreq)
+        *band_powers, spectral_entropy = _spectral_features(freqs, psd, self.sfreq)
+
+        # --------------------------------------------------
+        # Time-domain features (prefix sums)
+        # --------------------------------------------------
+        first: int = self._consumed
+        prefix = self._prefix_sums(span[:, first - starts[0]:])
+
+        # Window sums: prefix at the end minus prefix at the start
+        # (one sample later for dx, two for ddx)
+        begin = np.stack(
+            [self._prefix_at(prefix, first, starts + offset) for offset in range(3)]
+        )[_TIME_SUM_OFFSETS, :, np.arange(len(_TIME_SUM_OFFSETS))]
+        sums = self._prefix_at(prefix, first, starts + length) - begin.transpose(1, 0, 2)
+
+        line_length, var_x, mobility, complexity, kurtosis = _time_features(
+            length, *sums.transpose(1, 0, 2)
+        )
+
+        self._keep_marks(prefix, first, self.windows + n_windows)
+
+        self.windows += n_windows
+
+        return np.stack(
+            [
+                *band_powers,
+                line_length,
+                var_x,
+                mobility,
+                complexity,
+                kurtosis,
+                spectral_entropy,
+            ],
+            axis=-1,
+        )
+
+    def _prefix_sums(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Prefix sums (9, C, n + 1) at positions _consumed .. _consumed + n
+        after appending n new samples (C, n).
+        """
+        n_channels, n_new = samples.shape
+        first: int = self._consumed
+
+        if self._running is None:
+            self._running = np.zeros((len(_TIME_SUM_OFFSETS), n_channels))
+            self._context = np.zeros((n_channels, 2))
+
+        extended = np.concatenate([self._context, samples], axis=-1)
+        dx = np.diff(extended, axis=-1)
+        ddx = np.diff(dx, axis=-1)
+        dx = dx[:, 1:]
+
+        # No dx / ddx element ends on the first samples of the session
+        dx[:, :max(0, 1 - first)] = 0.0
+        ddx[:, :max(0, 2 - first)] = 0.0
+
+        x2 = samples * samples  # explicit products: much faster than x ** 3, x ** 4
+        quantities = np.stack(
+            [samples, x2, x2 * samples, x2 * x2, np.abs(dx), dx, dx * dx, ddx, ddx * ddx]
+        )
+
+        prefix = np.empty(quantities.shape[:2] + (n_new + 1,))
+        prefix[..., 0] = self._running
+        np.cumsum(quantities, axis=-1, out=prefix[..., 1:])
+        prefix[..., 1:] += self._running[..., np.newaxis]
+
+        self._running = prefix[..., -1].copy()
+        self._context = extended[:, -2:].copy()
+        self._consumed = first + n_new
+
+        return prefix
+
+    def _prefix_at(
+        self,
+        prefix: np.ndarray,
+        first: int,
+        positions: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Prefix sums (len(positions), 9, C) at absolute sample positions,
+        from this push or from the marks kept by earlier ones.
+        """
+        out = np.empty((len(positions),) + prefix.shape[:2])
+        inside = positions >= first
+        out[inside] = prefix[..., positions[inside] - first].transpose(2, 0, 1)
+
+        for i in np.flatnonzero(~inside):
+            out[i] = self._marks[int(positions[i])]
+
+        return out
+
+    def _keep_marks(
+        self,
+        prefix: np.ndarray,
+        first: int,
+        next_window: int,
+    ) -> None:
+        """
+        Keep the prefix sums at the starts (+0, +1, +2) of the windows
+        from `next_window` on whose samples have started to arrive.
+        """
+        next_start: int = next_window * self.step_samples
+        marks: Dict[int, np.ndarray] = {
+            position: sums
+            for position, sums in self._marks.items()
+            if position >= next_start
+        }
+
+        for start in range(next_start, self._consumed + 1, self.step_samples):
+            for position in range(max(start, first), min(start + 3, self._consumed + 1)):
+                marks[position] = prefix[..., position - first].copy()
+
+        self._marks = marks
+
+    def _grid_mean_periodogram(
+        self,
+        span: np.ndarray,
+        n_windows: int,
+    ) -> np.ndarray:
+        """
+        Mean segment periodogram of each window, shape (B, C, n_freqs).
+
+        Window k uses grid segments k * ratio + [0, n_segments); only
+        the segments not cached by the previous push are computed.
+        """
+        first: int = self.windows * self._ratio
+        end: int = (self.windows + n_windows - 1) * self._ratio + self._n_segments
+
+        cached = 0
+        if self._grid is not None:
+            cached = max(0, self._grid_start + self._grid.shape[1] - first)
+
+        new = _segment_periodograms(
+            span[:, cached * self._welch_step:
+                 (end - first - 1) * self._welch_step + self._nperseg],
+            self._nperseg,
+            self._welch_step,
+        )
+        if cached:
+            new = np.concatenate(
+                [self._grid[:, first - self._grid_start:], new], axis=1
+            )
+
+        total = sum(
+            new[:, j::self._ratio][:, :n_windows] for j in range(self._n_segments)
+        )
+
+        # Keep the segments the next window starts with
+        self._grid = new[:, n_windows * self._ratio:]
+        self._grid_start = first + n_windows * self._ratio
+
+        return (total / self._n_segments).transpose(1, 0, 2)
+
+
+def extract_features_overlapping(
+    signal: np.ndarray,
+    sfreq: int,
+    window_seconds: float = 4.0,
+    overlap_seconds: float = 3.0,
+) -> np.ndarray:
+    """
+    Features of every overlapping window of a signal, computing each
+    hop once (see OverlappingFeatureStream).
+
+    Gives the same result as
+    extract_features(window_view(signal, sfreq, window_seconds,
+    overlap_seconds), sfreq).
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        EEG signal of shape (n_channels, n_samples).
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+    window_seconds : float, optional
+        Window duration in seconds (default: 4.0).
+    overlap_seconds : float, optional
+        Overlap between consecutive windows (default: 3.0, i.e. 1 s hop).
+
+    Returns
+    -------
+    features : np.ndarray
+        Shape (n_windows, C, len(FEATURE_NAMES)), ordered as FEATURE_NAMES.
+    """
+
+    if signal.ndim != 2:
+        raise ValueError("Signal must have shape (n_channels, n_samples)")
+
+    stream = OverlappingFeatureStream(sfreq, window_seconds, overlap_seconds)
+    return stream.push(
+        window_view(signal, sfreq, window_seconds, overlap_seconds)
+    )
@@ -1,30 +1,245 @@
 """
 inference.py
 
-Inferencia (mock) sobre ventanas EEG.
+Inferencia sobre ventanas EEG.
 
 Responsabilidades:
-- Recibir una ventana EEG (C, T)
-- Devolver un score probabilístico en [0, 1]
+- Recibir una ventana EEG (C, T) o un lote de ventanas (B, C, T)
+- Devolver scores probabilísticos en [0, 1]
+- Delegar el cálculo en un modelo intercambiable (EEGModel)
+- Modelos sobre características (FeatureModel) con ventanas solapadas:
+  puntuar las características calculadas una vez por salto
+  (OverlappingFeatureStream) en lugar de las ventanas crudas
 
 Notas:
-- Este módulo NO implementa un modelo real.
-- El objetivo es simular el comportamiento de un modelo
-  hasta integrar uno entrenado más adelante.
+- Por defecto se usa MockModel (fog/models/mock_model.py), que NO
+  implementa un modelo real.
+- Un modelo real solo necesita implementar `predict_batch` y
+  registrarse con `set_model`.
+- Los modelos sobre ventanas crudas (p. ej. ONNX) no pueden reutilizar
+  trabajo entre ventanas solapadas: cada ventana se puntúa completa.
 """
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Final, Optional, Protocol, runtime_checkable
+
 import numpy as np
 
+from fog.models.mock_model import MockModel
+from fog.pipeline.features import OverlappingFeatureStream
+
+
+# ============================================================
+# Model interface
+# ============================================================
+
+class EEGModel(Protocol):
+    """
+    Interface for models that score batches of EEG windows.
+    """
+
+    name: str
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """
+        Return one score in [0, 1] per window of a (B, C, T) batch.
+
+        `rng` is only relevant for stochastic models; deterministic
+        models can ignore it.
+        """
+        ...
+
+
+@runtime_checkable
+class FeatureModel(Protocol):
+    """
+    Interface for models that score per-channel feature vectors
+    (fog/pipeline/features.py) instead of raw samples.
+
+    Feature models also implement `predict_batch` (extracting the
+    features themselves), so they remain valid EEGModels.
+    """
+
+    name: str
+    sfreq: int
+
+    def predict_batch(
+        self,
+        windows: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        ...
+
+    def predict_features(
+        self,
+        features: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """
+        Return one score in [0, 1] per window of a (B, C, n_features)
+        batch, ordered as FEATURE_NAMES.
+        """
+        ...
+
+
+_MODEL: EEGModel = MockModel()
+
+# Windows per run_inference_batch call when the runtime is not paced
+# (replay as fast as possible); paced runtimes batch what is due at once
+INFERENCE_BATCH_SIZE: Final[int] = 64
+
+
+def set_model(model: EEGModel) -> None:
+    """
+    Register the model used by run_inference / run_inference_batch.
+    """
+    global _MODEL
+    _MODEL = model
+
+
+def get_model() -> EEGModel:
+    """
+    Return the currently registered model.
+    """
+    return _MODEL
+
+
+# ============================================================
+# Public API
+# ============================================================
+
+def run_inference_batch(
+    windows: np.ndarray,
+    seed: Optional[int] = None,
+    model: Optional[EEGModel] = None,
+) -> np.ndarray:
+    """
+    Run inference on a batch of EEG windows.
+
+    Parameters
+    ----------
+    windows : np.ndarray
+        EEG windows with shape (batch, n_channels, n_samples).
+    seed : Optional[int], optional
+        Seed for the per-call random generator (default: None).
+        The global NumPy RNG is never touched.
+    model : Optional[EEGModel], optional
+        Model to use (default: the registered model).
+
+    Returns
+    -------
+    scores : np.ndarray
+        Shape (batch,), probabilistic scores in the range [0, 1].
+    """
+
+    if windows.ndim != 3:
+        raise ValueError(
+            "Windows must have shape (batch, n_channels, n_samples)"
+        )
+
+    if model is None:
+        model = _MODEL
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    scores = np.asarray(model.predict_batch(windows, rng), dtype=np.float64)
+
+    if scores.shape != (windows.shape[0],):
+        raise ValueError(
+            f"Model '{model.name}' returned shape {scores.shape}, "
+            f"expected ({windows.shape[0]},)"
+        )
+
+    return np.clip(scores, 0.0, 1.0)
+
+
+def run_inference_features(
+    features: np.ndarray,
+    seed: Optional[int] = None,
+    model: Optional[FeatureModel] = None,
+) -> np.ndarray:
+    """
+    Run inference on a batch of window features.
+
+    Parameters
+    ----------
+    features : np.ndarray
+        Features with shape (batch, n_channels, n_features).
+    seed : Optional[int], optional
+        Seed for the per-call random generator (default: None).
+    model : Optional[FeatureModel], optional
+        Model to use (default: the registered model).
+
+    Returns
+    -------
+    scores : np.ndarray
+        Shape (batch,), probabilistic scores in the range [0, 1].
+    """
+
+    if features.ndim != 3:
+        raise ValueError(
+            "Features must have shape (batch, n_channels, n_features)"
+        )
+
+    if model is None:
+        model = _MODEL
+
+    if not isinstance(model, FeatureModel):
+        raise TypeError(f"Model '{model.name}' does not score features")
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    scores = np.asarray(model.predict_features(features, rng), dtype=np.float64)
+
+    if scores.shape != (features.shape[0],):
+        raise ValueError(
+            f"Model '{model.name}' returned shape {scores.shape}, "
+            f"expected ({features.shape[0]},)"
+        )
+
+    return np.clip(scores, 0.0, 1.0)
+
+
+def feature_stream(
+    sfreq: int,
+    window_seconds: float,
+    overlap_seconds: float,
+    model: Optional[EEGModel] = None,
+) -> Optional[OverlappingFeatureStream]:
+    """
+    Per-session feature stream when per-hop reuse applies, else None.
+
+    Reuse applies to overlapping windows scored by a FeatureModel:
+    the caller pushes each batch of consecutive windows into the
+    stream and scores the result with run_inference_features. With
+    None, windows are scored with run_inference_batch.
+    """
+
+    if model is None:
+        model = _MODEL
+
+    if overlap_seconds <= 0 or not isinstance(model, FeatureModel):
+        return None
+
+    if model.sfreq != sfreq:
+        raise ValueError(
+            f"Model '{model.name}' expects {model.sfreq} Hz, signal is {sfreq} Hz"
+        )
+
+    return OverlappingFeatureStream(sfreq, window_seconds, overlap_seconds)
+
 
 def run_inference(
     window: np.ndarray,
     seed: Optional[int] = None,
 ) -> float:
     """
-    Run mock inference on a single EEG window.
+    Run inference on a single EEG window.
 
     Parameters
     ----------
@@ -42,28 +257,4 @@ def run_inference(
     if window.ndim != 2:
         raise ValueError("Window must have shape (n_channels, n_samples)")
 
-    if seed is not None:
-        np.random.seed(seed)
-
-    # --------------------------------------------------
-    # Mock behavior:
-    # - Use simple statistics to make the score depend
-    #   on the signal (not purely random)
-    # --------------------------------------------------
-
-    # Energy-based heuristic (very rough)
-    # energy: float = float(np.mean(window ** 2)) # C1
-
-    # Normalize energy to a pseudo-probability
-    # (these constants are arbitrary for simulation)
-    # normalized_energy: float = min(energy / 100.0, 1.0) # C2
-
-    # Add controlled randomness
-    # noise: float = float(np.random.uniform(0.0, 0.1)) # C3
-    # score: float = min(max(normalized_energy + noise, 0.0), 1.0) # C4
-
-
-    # generación de un numero aleatorio entre 0 y 1
-    score = float(np.random.uniform(0.0, 1.0))
-
-    return score
+    return float(run_inference_batch(window[np.newaxis], seed=seed)[0])
@@ -5,10 +5,11 @@ Carga y preprocesamiento de señales EEG desde archivos EDF.
 
 Responsabilidades:
 - Cargar archivo EDF con MNE
-- Extraer canales derivados mediante montajes predefinidos
+- Extraer canales derivados mediante un montaje bipolar (BIPOLAR_MONTAGE)
 - Aplicar filtrado bandpass + notch
 - Remuestrear la señal a una frecuencia objetivo
 - Devolver la señal completa lista para windowing
+- (Modo streaming) devolver la señal por bloques con memoria acotada
 
 Salida estándar:
 - X : np.ndarray con shape (n_channels, n_samples)
@@ -17,12 +18,22 @@ Salida estándar:
 
 from __future__ import annotations
 
+from functools import lru_cache
+from math import gcd
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Literal, Optional, Tuple
 
 import numpy as np
 import mne
-from scipy.signal import butter, filtfilt, resample, iirnotch, lfilter
+from scipy.signal import (
+    butter,
+    iirnotch,
+    resample,
+    resample_poly,
+    sosfilt,
+    sosfiltfilt,
+    tf2sos,
+)
 
 
 # ============================================================
@@ -34,6 +45,83 @@ HIGHCUT: float = 120.0
 FILTER_ORDER: int = 3
 TARGET_FS: int = 250
 
+NOTCH_FREQS: Tuple[float, ...] = (1.0, 60.0)
+NOTCH_Q: float = 30.0
+
+ResampleMethod = Literal["fft", "polyphase"]
+# "polyphase" is much faster but its output differs from "fft" by
+# ~0.1-0.2 % relative RMS (see resampling_check.py): opt-in until the
+# models are validated on it. The signal cache key includes the method.
+RESAMPLE_METHOD: ResampleMethod = "fft"
+
+STREAM_CHUNK_SECONDS: float = 4.0
+STREAM_CONTEXT_SECONDS: float = 10.0
+
+
+# ============================================================
+# Montage (bipolar derivations, TCP-style)
+# ============================================================
+
+# Each derived channel is (anode, cathode): signal = anode - cathode.
+BIPOLAR_MONTAGE: Tuple[Tuple[str, str], ...] = (
+    ("EEG FP1-REF", "EEG F7-REF"),
+    ("EEG F7-REF", "EEG T3-REF"),
+    ("EEG T3-REF", "EEG T5-REF"),
+    ("EEG T5-REF", "EEG O1-REF"),
+    ("EEG FP2-REF", "EEG F8-REF"),
+    ("EEG F8-REF", "EEG T4-REF"),
+    ("EEG T4-REF", "EEG T6-REF"),
+    ("EEG T6-REF", "EEG O2-REF"),
+    ("EEG A1-REF", "EEG T3-REF"),
+    ("EEG T3-REF", "EEG C3-REF"),
+    ("EEG C3-REF", "EEG CZ-REF"),
+    ("EEG CZ-REF", "EEG C4-REF"),
+    ("EEG C4-REF", "EEG T4-REF"),
+    ("EEG T4-REF", "EEG A2-REF"),
+    ("EEG FP1-REF", "EEG F3-REF"),
+    ("EEG F3-REF", "EEG C3-REF"),
+    ("EEG C3-REF", "EEG P3-REF"),
+    ("EEG P3-REF", "EEG O1-REF"),
+    ("EEG FP2-REF", "EEG F4-REF"),
+    ("EEG F4-REF", "EEG C4-REF"),
+    ("EEG C4-REF", "EEG P4-REF"),
+    ("EEG P4-REF", "EEG O2-REF"),
+)
+
+
+@lru_cache(maxsize=None)
+def montage_matrix(
+    montage: Tuple[Tuple[str, str], ...] = BIPOLAR_MONTAGE,
+) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Precompute the referential channels and derivation matrix of a montage.
+
+    Parameters
+    ----------
+    montage : Tuple[Tuple[str, str], ...]
+        (anode, cathode) pairs.
+
+    Returns
+    -------
+    channels : Tuple[str, ...]
+        Unique referential channels, in order of first appearance.
+    matrix : np.ndarray
+        Shape (n_derivations, n_channels) with +1 / -1 entries, so that
+        derived = matrix @ referential.
+    """
+    channels: Tuple[str, ...] = tuple(
+        dict.fromkeys(ch for pair in montage for ch in pair)
+    )
+    position = {ch: i for i, ch in enumerate(channels)}
+
+    matrix = np.zeros((len(montage), len(channels)))
+    for row, (anode, cathode) in enumerate(montage):
+        matrix[row, position[anode]] += 1.0
+        matrix[row, position[cathode]] -= 1.0
+
+    matrix.setflags(write=False)
+    return channels, matrix
+
 
 # ============================================================
 # Channel extraction
@@ -41,9 +129,25 @@ TARGET_FS: int = 250
 
 def get_channels_from_raw(
     raw: mne.io.BaseRaw,
+    start: int = 0,
+    stop: Optional[int] = None,
+    montage: Tuple[Tuple[str, str], ...] = BIPOLAR_MONTAGE,
 ) -> Tuple[bool, np.ndarray]:
     """
-    Extract derived EEG channels by subtracting two predefined montages.
+    Extract derived EEG channels from a bipolar montage.
+
+    Only the referential channels used by the montage are read, each
+    one once; all derivations are then computed with a single matrix
+    product.
+
+    Parameters
+    ----------
+    raw : mne.io.BaseRaw
+        EDF recording (preloaded or not).
+    start, stop : int, optional
+        Sample range to read (default: the whole recording).
+    montage : Tuple[Tuple[str, str], ...], optional
+        (anode, cathode) pairs (default: BIPOLAR_MONTAGE).
 
     Returns
     -------
@@ -53,35 +157,16 @@ def get_channels_from_raw(
         Shape (n_channels, n_samples)
     """
 
-    montage_list_1 = [
-        "EEG FP1-REF", "EEG F7-REF", "EEG T3-REF", "EEG T5-REF",
-        "EEG FP2-REF", "EEG F8-REF", "EEG T4-REF", "EEG T6-REF",
-        "EEG A1-REF", "EEG T3-REF", "EEG C3-REF", "EEG CZ-REF",
-        "EEG C4-REF", "EEG T4-REF", "EEG FP1-REF", "EEG F3-REF",
-        "EEG C3-REF", "EEG P3-REF", "EEG FP2-REF", "EEG F4-REF",
-        "EEG C4-REF", "EEG P4-REF",
-    ]
-
-    montage_list_2 = [
-        "EEG F7-REF", "EEG T3-REF", "EEG T5-REF", "EEG O1-REF",
-        "EEG F8-REF", "EEG T4-REF", "EEG T6-REF", "EEG O2-REF",
-        "EEG T3-REF", "EEG C3-REF", "EEG CZ-REF", "EEG C4-REF",
-        "EEG T4-REF", "EEG A2-REF", "EEG F3-REF", "EEG C3-REF",
-        "EEG P3-REF", "EEG O1-REF", "EEG F4-REF", "EEG C4-REF",
-        "EEG P4-REF", "EEG O2-REF",
-    ]
+    channels, matrix = montage_matrix(montage)
 
     try:
-        idx1 = [raw.ch_names.index(ch) for ch in montage_list_1]
-        idx2 = [raw.ch_names.index(ch) for ch in montage_list_2]
-
-        sig1 = raw.get_data(picks=idx1)
-        sig2 = raw.get_data(picks=idx2)
+        picks = [raw.ch_names.index(ch) for ch in channels]
+        referential = raw.get_data(picks=picks, start=start, stop=stop)
 
     except Exception:
         return True, np.empty((0, 0))
 
-    signals = sig1 - sig2
+    signals = matrix @ referential
     return False, signals
 
 
@@ -89,6 +174,34 @@ def get_channels_from_raw(
 # Filtering helpers
 # ============================================================
 
+@lru_cache(maxsize=None)
+def _bandpass_sos(
+    fs: float,
+    band: Tuple[float, float],
+    order: int,
+) -> np.ndarray:
+    """
+    Second-order sections of the Butterworth bandpass, cached per
+    (fs, band, order) so they are designed only once per process.
+    """
+    nyq = 0.5 * fs
+    low, high = band
+    return butter(order, [low / nyq, high / nyq], btype="band", output="sos")
+
+
+@lru_cache(maxsize=None)
+def _notch_sos(
+    fs: float,
+    freqs: Tuple[float, ...],
+    q: float,
+) -> np.ndarray:
+    """
+    Cascade of IIR notches as a single SOS array, cached per (fs, freqs, q).
+    """
+    sections = [tf2sos(*iirnotch(freq, Q=q, fs=fs)) for freq in freqs]
+    return np.concatenate(sections, axis=0)
+
+
 def butter_bandpass(
     lowcut: float,
     highcut: float,
@@ -105,26 +218,241 @@ def butter_bandpass_filter(
     data: np.ndarray,
     fs: float,
 ) -> np.ndarray:
-    b, a = butter_bandpass(LOWCUT, HIGHCUT, fs, FILTER_ORDER)
-    return filtfilt(b, a, data)
+    sos = _bandpass_sos(float(fs), (LOWCUT, HIGHCUT), FILTER_ORDER)
+    return sosfiltfilt(sos, data, axis=-1)
+
+
+def filter_signals(
+    signals: np.ndarray,
+    fs: float,
+) -> np.ndarray:
+    """
+    Apply bandpass (zero-phase) + notch filtering to all channels at once.
+
+    Parameters
+    ----------
+    signals : np.ndarray
+        Signal with shape (n_channels, n_samples).
+    fs : float
+        Sampling frequency of `signals`.
+
+    Returns
+    -------
+    np.ndarray
+        Filtered signal with the same shape.
+
+    Notes
+    -----
+    Notch filters are designed at TARGET_FS.
+    """
+    band = butter_bandpass_filter(signals, fs)
+    notch = _notch_sos(float(TARGET_FS), NOTCH_FREQS, NOTCH_Q)
+    return sosfilt(notch, band, axis=-1)
 
 
 # ============================================================
 # Resampling
 # ============================================================
 
+def resample_signals(
+    signals: np.ndarray,
+    original_fs: int,
+    target_fs: int,
+    method: ResampleMethod = RESAMPLE_METHOD,
+) -> np.ndarray:
+    """
+    Resample all channels at once along the last axis.
+
+    Parameters
+    ----------
+    signals : np.ndarray
+        Signal with shape (n_channels, n_samples).
+    original_fs : int
+        Sampling frequency of `signals`.
+    target_fs : int
+        Desired sampling frequency.
+    method : {"fft", "polyphase"}
+        "fft" uses scipy.signal.resample over the full recording.
+        "polyphase" uses scipy.signal.resample_poly with the reduced
+        rational factor target_fs / original_fs (e.g. 400 -> 250 is 5/8),
+        which is much cheaper for long recordings.
+
+    Returns
+    -------
+    np.ndarray
+        Resampled signal with shape (n_channels, n_out), where
+        n_out = int(n_samples / original_fs * target_fs) for both methods.
+    """
+    n_out = int(signals.shape[-1] / original_fs * target_fs)
+
+    if method == "fft":
+        return resample(signals, n_out, axis=-1)
+
+    if method == "polyphase":
+        factor = gcd(int(target_fs), int(original_fs))
+        up = int(target_fs) // factor
+        down = int(original_fs) // factor
+        return resample_poly(signals, up, down, axis=-1)[..., :n_out]
+
+    raise ValueError(f"Unknown resampling method: {method}")
+
+
 def resample_data_in_each_channel(
     signals: List[np.ndarray],
     original_fs: int,
     target_fs: int,
 ) -> List[np.ndarray]:
-    resampled: List[np.ndarray] = []
+    return list(
+        resample_signals(np.stack(signals), original_fs, target_fs, method="fft")
+    )
 
-    for sig in signals:
-        n_samples = int(len(sig) / original_fs * target_fs)
-        resampled.append(resample(sig, n_samples))
 
-    return resampled
+class PolyphaseStreamResampler:
+    """
+    Incremental polyphase resampler for a (n_channels, n_samples) stream.
+
+    Blocks are pushed in order; each call returns the output samples that
+    no longer depend on future input. The concatenation of all outputs
+    equals resample_signals(..., method="polyphase") on the full signal.
+    """
+
+    def __init__(
+        self,
+        original_fs: int,
+        target_fs: int,
+    ) -> None:
+        factor = gcd(int(target_fs), int(original_fs))
+        self.up: int = int(target_fs) // factor
+        self.down: int = int(original_fs) // factor
+
+        # FIR half-length used by resample_poly, in input samples,
+        # rounded up to a multiple of `down` so segments stay aligned.
+        half_len_in = (10 * max(self.up, self.down)) // self.up + 2
+        self.context: int = -(-half_len_in // self.down) * self.down
+
+        self._buffer: Optional[np.ndarray] = None
+        self._buffer_start: int = 0
+        self._n_in: int = 0
+        self._n_out: int = 0
+        self._original_fs = original_fs
+        self._target_fs = target_fs
+
+    def push(
+        self,
+        block: np.ndarray,
+        final: bool = False,
+    ) -> np.ndarray:
+        """
+        Append an input block and return the newly available output.
+        """
+        if self._buffer is None:
+            self._buffer = block
+        else:
+            self._buffer = np.concatenate([self._buffer, block], axis=-1)
+        self._n_in += block.shape[-1]
+
+        if final:
+            out_end = int(self._n_in / self._original_fs * self._target_fs)
+        else:
+            safe_in = self._n_in - self.context
+            out_end = max(self._n_out, (safe_in * self.up) // self.down)
+
+        if out_end <= self._n_out:
+            return self._buffer[..., :0]
+
+        y = resample_poly(self._buffer, self.up, self.down, axis=-1)
+        offset = (self._buffer_start * self.up) // self.down
+        out = y[..., self._n_out - offset:out_end - offset]
+        self._n_out = out_end
+
+        # Keep only the input still needed for future outputs.
+        keep_from = (self._n_out * self.down) // self.up - self.context
+        keep_from = max(0, (keep_from // self.down) * self.down)
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[..., keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+
+        return out
+
+
+def stream_edf_signal(
+    edf_path: Path,
+    chunk_seconds: float = STREAM_CHUNK_SECONDS,
+    context_seconds: float = STREAM_CONTEXT_SECONDS,
+) -> Iterator[np.ndarray]:
+    """
+    Load and preprocess an EDF file block by block.
+
+    Only `chunk_seconds` (+ 2 * `context_seconds` of overlap) of the
+    recording is held in memory at a time, so the first block is
+    available shortly after the session starts.
+
+    Processing per chunk:
+    - Bandpass: zero-phase, computed over the chunk extended with
+      `context_seconds` on each side; the overlap is discarded.
+    - Notch: causal, with the filter state (zi) carried across chunks.
+    - Resampling: polyphase, incremental (PolyphaseStreamResampler).
+
+    Parameters
+    ----------
+    edf_path : Path
+        Path to EDF file.
+    chunk_seconds : float, optional
+        Duration of each chunk read from the EDF.
+    context_seconds : float, optional
+        Overlap used on each side of a chunk for the bandpass.
+
+    Yields
+    ------
+    block : np.ndarray
+        EEG block with shape (n_channels, n_block_samples) at TARGET_FS.
+        Block lengths may vary.
+    """
+
+    raw = mne.io.read_raw_edf(
+        edf_path,
+        preload=False,
+        verbose="warning",
+    )
+
+    original_fs: int = int(raw.info["sfreq"])
+    n_times: int = raw.n_times
+
+    chunk: int = max(1, int(chunk_seconds * original_fs))
+    context: int = int(context_seconds * original_fs)
+
+    band_sos = _bandpass_sos(float(original_fs), (LOWCUT, HIGHCUT), FILTER_ORDER)
+    notch_sos = _notch_sos(float(TARGET_FS), NOTCH_FREQS, NOTCH_Q)
+    notch_zi: Optional[np.ndarray] = None
+
+    resampler: Optional[PolyphaseStreamResampler] = None
+    if original_fs != TARGET_FS:
+        resampler = PolyphaseStreamResampler(original_fs, TARGET_FS)
+
+    for start in range(0, n_times, chunk):
+        stop = min(start + chunk, n_times)
+        read_start = max(0, start - context)
+        read_stop = min(n_times, stop + context)
+
+        flag_wrong, signals = get_channels_from_raw(raw, read_start, read_stop)
+        if flag_wrong:
+            raise RuntimeError("Channel extraction failed")
+
+        band = sosfiltfilt(band_sos, signals, axis=-1)
+        band = band[:, start - read_start:stop - read_start]
+
+        if notch_zi is None:
+            notch_zi = np.zeros(
+                (notch_sos.shape[0], band.shape[0], 2),
+                dtype=band.dtype,
+            )
+        block, notch_zi = sosfilt(notch_sos, band, axis=-1, zi=notch_zi)
+
+        if resampler is not None:
+            block = resampler.push(block, final=stop == n_times)
+
+        if block.shape[-1] > 0:
+            yield block
 
 
 # ============================================================
@@ -133,6 +461,7 @@ def resample_data_in_each_channel(
 
 def load_edf_signal(
     edf_path: Path,
+    resample_method: ResampleMethod = RESAMPLE_METHOD,
 ) -> Tuple[np.ndarray, int]:
     """
     Load and preprocess an EDF file.
@@ -141,6 +470,8 @@ def load_edf_signal(
     ----------
     edf_path : Path
         Path to EDF file.
+    resample_method : {"fft", "polyphase"}, optional
+        Resampling backend (default: RESAMPLE_METHOD).
 
     Returns
     -------
@@ -152,7 +483,7 @@ def load_edf_signal(
 
     raw = mne.io.read_raw_edf(
         edf_path,
-        preload=True,
+        preload=False,
         verbose="warning",
     )
 
@@ -162,25 +493,16 @@ def load_edf_signal(
     if flag_wrong:
         raise RuntimeError("Channel extraction failed")
 
-    # Bandpass + notch filtering (signal-wise)
-    notch_1_b, notch_1_a = iirnotch(1.0, Q=30.0, fs=TARGET_FS)
-    notch_60_b, notch_60_a = iirnotch(60.0, Q=30.0, fs=TARGET_FS)
-
-    filtered: List[np.ndarray] = []
-
-    for ch in signals:
-        band = butter_bandpass_filter(ch, original_fs)
-        notch1 = lfilter(notch_1_b, notch_1_a, band)
-        notch60 = lfilter(notch_60_b, notch_60_a, notch1)
-        filtered.append(notch60)
+    # Bandpass + notch filtering (all channels in one pass)
+    X: np.ndarray = filter_signals(signals, original_fs)
 
     # Resampling
     if original_fs != TARGET_FS:
-        filtered = resample_data_in_each_channel(
-            filtered,
+        X = resample_signals(
+            X,
             original_fs,
             TARGET_FS,
+            method=resample_method,
         )
 
-    X = np.stack(filtered)
     return X, TARGET_FS
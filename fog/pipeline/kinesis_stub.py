@@ -0,0 +1,107 @@
+"""
+kinesis_stub.py
+
+Cliente Kinesis local (stub) para pruebas y simulaciones sin AWS.
+
+Responsabilidades:
+- Imitar put_record / put_records de boto3 (mismas firmas y respuestas)
+- Guardar en memoria los registros aceptados
+- Inyectar fallos parciales (ProvisionedThroughputExceededException)
+  y latencia de red para ejercitar reintentos y batching
+
+NO realiza:
+- Llamadas de red
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class LocalKinesisStub:
+    """
+    In-memory stand-in for a boto3 Kinesis client.
+
+    Parameters
+    ----------
+    failure_rate : float
+        Probability that each record in put_records is rejected.
+    latency_seconds : float
+        Simulated round-trip time per call.
+    seed : Optional[int]
+        Seed for failure injection.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.0,
+        latency_seconds: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.latency_seconds = latency_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.records: List[Dict[str, Any]] = []
+        self.calls: int = 0
+
+    def put_record(
+        self,
+        StreamName: str,
+        Data: bytes,
+        PartitionKey: str,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        response = self.put_records(
+            StreamName=StreamName,
+            Records=[{"Data": Data, "PartitionKey": PartitionKey}],
+        )
+        return response["Records"][0]
+
+    def put_records(
+        self,
+        StreamName: str,
+        Records: List[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+        results: List[Dict[str, Any]] = []
+        failed: int = 0
+
+        with self._lock:
+            self.calls += 1
+
+            for record in Records:
+                if self._rng.random() < self.failure_rate:
+                    failed += 1
+                    results.append(
+                        {
+                            "ErrorCode": "ProvisionedThroughputExceededException",
+                            "ErrorMessage": "Rate exceeded for shard (stub)",
+                        }
+                    )
+                    continue
+
+                sequence_number = str(len(self.records))
+                self.records.append(
+                    {
+                        "StreamName": StreamName,
+                        "Data": record["Data"],
+                        "PartitionKey": record["PartitionKey"],
+                        "SequenceNumber": sequence_number,
+                    }
+                )
+                results.append(
+                    {
+                        "SequenceNumber": sequence_number,
+                        "ShardId": "shardId-000000000000",
+                    }
+                )
+
+        return {"FailedRecordCount": failed, "Records": results}
@@ -42,7 +42,8 @@ def trigger_local_alert(
     window_index : int
         Index of the window within the session.
     score : float
-        Probabilistic score that triggered the alert.
+        Probabilistic score that triggered the alert (the stride-smoothed
+        score when smoothing is enabled, otherwise the window score).
     """
 
     timestamp: str = datetime.utcnow().isoformat()
@@ -0,0 +1,581 @@
+"""
+outbox.py
+
+Outbox durable en disco para eventos con destino a Kinesis.
+
+Responsabilidades:
+- Escribir primero cada evento en un log local append-only, segmentado
+- Agrupar fsync (cada N eventos o cada T segundos)
+- Drenar el log hacia Kinesis en segundo plano (PutRecords + agregación)
+- Guardar un checkpoint (segmento, offset) tras cada lote entregado
+- Acotar el uso de disco y exponer métricas de backpressure
+- Bloquear su directorio (flock) para que un solo proceso lo use
+
+Garantías:
+- El bucle de la sala nunca espera a la red (solo escribe a disco)
+- Una caída del enlace WAN no pierde eventos mientras haya disco
+- Entrega al menos una vez (tras una caída pueden repetirse eventos
+  entre el último envío y el último checkpoint)
+
+Formato de segmento (segment-<seq>.log), frames consecutivos:
+- header ">IIH": longitud de data, crc32(key + data), longitud de key
+- key (utf-8) + data
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from struct import Struct
+from typing import IO, Any, Dict, Final, List, Literal, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process per directory
+    fcntl = None
+
+from fog.pipeline.cloud_publisher import (
+    AGGREGATION_ENABLED,
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    KINESIS_STREAM_NAME,
+    MAX_BATCH_BYTES,
+    MAX_BATCH_RECORDS,
+    Entry,
+    _get_kinesis_client,
+    pack_records,
+    send_records,
+)
+
+
+# ============================================================
+# Constants
+# ============================================================
+
+OUTBOX_DIR: Final[Path] = Path("fog/output/outbox")
+SEGMENT_MAX_BYTES: Final[int] = 8 * 1024 * 1024
+OUTBOX_MAX_BYTES: Final[int] = 512 * 1024 * 1024
+
+FSYNC_EVERY_EVENTS: Final[int] = 64
+FSYNC_INTERVAL_SECONDS: Final[float] = 0.2
+
+DRAIN_IDLE_SECONDS: Final[float] = 0.2
+DRAIN_SEND_RETRIES: Final[int] = 2
+
+OverflowPolicy = Literal["drop_oldest", "reject"]
+OVERFLOW_POLICY: Final[OverflowPolicy] = "drop_oldest"
+
+_FRAME_HEADER = Struct(">IIH")
+_CHECKPOINT_FILE: Final[str] = "checkpoint.json"
+_LOCK_FILE: Final[str] = "outbox.lock"
+
+
+class OutboxFullError(RuntimeError):
+    """
+    Raised by append() when the outbox is full and the policy is "reject".
+    """
+
+
+class OutboxLockedError(RuntimeError):
+    """
+    Raised when the outbox directory is already in use by another process.
+    """
+
+
+def _segment_name(seq: int) -> str:
+    return f"segment-{seq:012d}.log"
+
+
+def _segment_seq(path: Path) -> int:
+    return int(path.stem.split("-", 1)[1])
+
+
+# ============================================================
+# Durable outbox
+# ============================================================
+
+class DurableOutbox:
+    """
+    Segmented append-only event log drained asynchronously to Kinesis.
+
+    The directory is locked for the lifetime of the outbox: segments
+    and checkpoint are owned by a single process (one directory per
+    room process, see cloud_publisher.configure_outbox).
+
+    Parameters
+    ----------
+    directory : Path
+        Directory holding segments and the checkpoint.
+    client : Optional[Any]
+        boto3-compatible Kinesis client (default: lazily created).
+    segment_max_bytes : int
+        Size at which the active segment is rolled over.
+    max_total_bytes : int
+        Disk budget for all segments.
+    overflow_policy : {"drop_oldest", "reject"}
+        What to do when the budget is exceeded: delete the oldest
+        undelivered segment, or raise OutboxFullError from append().
+    """
+
+    def __init__(
+        self,
+        directory: Path = OUTBOX_DIR,
+        client: Optional[Any] = None,
+        stream_name: str = KINESIS_STREAM_NAME,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        max_total_bytes: int = OUTBOX_MAX_BYTES,
+        overflow_policy: OverflowPolicy = OVERFLOW_POLICY,
+        fsync_every_events: int = FSYNC_EVERY_EVENTS,
+        fsync_interval_seconds: float = FSYNC_INTERVAL_SECONDS,
+        aggregate: bool = AGGREGATION_ENABLED,
+    ) -> None:
+        self.directory = directory
+        self._client = client
+        self.stream_name = stream_name
+        self.segment_max_bytes = segment_max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.overflow_policy: OverflowPolicy = overflow_policy
+        self.fsync_every_events = fsync_every_events
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.aggregate = aggregate
+
+        self._lock = threading.Condition()
+        self._closed: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+        # seq -> [size_bytes, n_events]
+        self._segments: Dict[int, List[int]] = {}
+        self._unsynced: int = 0
+        self._last_sync: float = time.monotonic()
+
+        self.metrics: Dict[str, int] = {
+            "appended": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "rejected": 0,
+            "corrupted": 0,
+            "fsyncs": 0,
+            "send_errors": 0,
+            "sent": 0,
+            "records": 0,
+            "batches": 0,
+            "retried": 0,
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file: Optional[IO[str]] = self._acquire_directory()
+        self._checkpoint: Tuple[int, int] = self._load_checkpoint()
+        self._recover_segments()
+
+        self._active_seq: int = max(self._segments, default=self._checkpoint[0]) + 1
+        self._active = self._open_segment(self._active_seq)
+
+    # --------------------------------------------------------
+    # Directory lock
+    # --------------------------------------------------------
+
+    def _acquire_directory(self) -> Optional[IO[str]]:
+        if fcntl is None:
+            return None
+
+        lock_file = (self.directory / _LOCK_FILE).open("a+", encoding="utf-8")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.seek(0)
+            owner: str = lock_file.read().strip() or "?"
+            lock_file.close()
+            raise OutboxLockedError(
+                f"Outbox {self.directory} is in use by another process "
+                f"(pid {owner}); use a separate outbox directory"
+            ) from None
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        return lock_file
+
+    def _release_directory(self) -> None:
+        if self._lock_file is not None:
+            # Closing the descriptor releases the flock
+            self._lock_file.close()
+            self._lock_file = None
+
+    # --------------------------------------------------------
+    # Recovery
+    # --------------------------------------------------------
+
+    def _load_checkpoint(self) -> Tuple[int, int]:
+        path = self.directory / _CHECKPOINT_FILE
+        if not path.exists():
+            return (0, 0)
+
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        return (int(data["segment"]), int(data["offset"]))
+
+    def _recover_segments(self) -> None:
+        for path in sorted(self.directory.glob("segment-*.log")):
+            seq = _segment_seq(path)
+
+            if seq < self._checkpoint[0]:
+                path.unlink(missing_ok=True)
+                continue
+
+            n_events, valid_bytes = 0, 0
+            for _, end in self._iter_frames(path, 0):
+                n_events += 1
+                valid_bytes = end
+
+            if valid_bytes < path.stat().st_size:
+                # Torn write at the tail (crash during append)
+                self.metrics["corrupted"] += 1
+                with path.open("r+b") as f:
+                    f.truncate(valid_bytes)
+
+            self._segments[seq] = [valid_bytes, n_events]
+
+    @staticmethod
+    def _iter_frames(
+        path: Path,
+        offset: int,
+        limit: Optional[int] = None,
+    ):
+        """
+        Yield ((data, key), end_offset) for each valid frame after offset.
+        """
+        with path.open("rb") as f:
+            f.seek(offset)
+            position = offset
+
+            while limit is None or position < limit:
+                header = f.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    return
+
+                data_len, crc, key_len = _FRAME_HEADER.unpack(header)
+                body = f.read(key_len + data_len)
+                if len(body) < key_len + data_len or zlib.crc32(body) != crc:
+                    return
+
+                position += _FRAME_HEADER.size + key_len + data_len
+                key = body[:key_len].decode("utf-8")
+                yield (body[key_len:], key), position
+
+    # --------------------------------------------------------
+    # Writer side
+    # --------------------------------------------------------
+
+    def _open_segment(self, seq: int):
+        self._segments.setdefault(seq, [0, 0])
+        return (self.directory / _segment_name(seq)).open("ab")
+
+    def _total_bytes(self) -> int:
+        return sum(size for size, _ in self._segments.values())
+
+    def append(
+        self,
+        data: bytes,
+        partition_key: str,
+    ) -> None:
+        """
+        Durably queue one event (local disk only, never the network).
+        """
+        key_bytes: bytes = partition_key.encode("utf-8")
+        body: bytes = key_bytes + data
+        frame: bytes = (
+            _FRAME_HEADER.pack(len(data), zlib.crc32(body), len(key_bytes)) + body
+        )
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Outbox is closed")
+
+            self._enforce_budget(len(frame))
+
+            if self._segments[self._active_seq][0] >= self.segment_max_bytes:
+                self._roll_segment()
+
+            self._active.write(frame)
+            self._active.flush()
+            self._segments[self._active_seq][0] += len(frame)
+            self._segments[self._active_seq][1] += 1
+            self.metrics["appended"] += 1
+            self._unsynced += 1
+
+            if (
+                self._unsynced >= self.fsync_every_events
+                or time.monotonic() - self._last_sync >= self.fsync_interval_seconds
+            ):
+                self._sync_locked()
+
+            self._ensure_thread()
+            self._lock.notify_all()
+
+    def _roll_segment(self) -> None:
+        self._sync_locked()
+        self._active.close()
+        self._active_seq += 1
+        self._active = self._open_segment(self._active_seq)
+
+    def _sync_locked(self) -> None:
+        if self._unsynced == 0:
+            return
+        os.fsync(self._active.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.metrics["fsyncs"] += 1
+
+    def _enforce_budget(self, incoming: int) -> None:
+        while self._total_bytes() + incoming > self.max_total_bytes:
+            oldest = min(self._segments)
+
+            if self.overflow_policy == "reject" or oldest == self._active_seq:
+                self.metrics["rejected"] += 1
+                raise OutboxFullError(
+                    f"Outbox full ({self._total_bytes()} bytes in {self.directory})"
+                )
+
+            # Events of the segment not yet delivered are lost
+            _, n_events = self._segments.pop(oldest)
+            if oldest == self._checkpoint[0]:
+                n_events -= sum(
+                    1 for _ in self._iter_frames_safe(oldest, 0, self._checkpoint[1])
+                )
+            (self.directory / _segment_name(oldest)).unlink(missing_ok=True)
+
+            self.metrics["dropped"] += n_events
+            print(
+                f"[OUTBOX][WARN] Disk budget exceeded, dropped {n_events} "
+                f"undelivered events (segment {oldest})"
+            )
+
+    def _iter_frames_safe(self, seq: int, offset: int, limit: Optional[int]):
+        path = self.directory / _segment_name(seq)
+        if not path.exists():
+            return iter(())
+        return self._iter_frames(path, offset, limit)
+
+    def sync(self) -> None:
+        """
+        fsync pending writes of the active segment.
+        """
+        with self._lock:
+            self._sync_locked()
+
+    # --------------------------------------------------------
+    # Drainer (background thread)
+    # --------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._drain_loop,
+                name="outbox-drainer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def start(self) -> None:
+        """
+        Start draining (also starts automatically on the first append).
+        """
+        with self._lock:
+            self._ensure_thread()
+
+    def _next_batch(self) -> Tuple[List[Entry], Tuple[int, int]]:
+        """
+        Read undelivered entries from the checkpoint, up to one
+        PutRecords batch worth. Returns (entries, position after them).
+        """
+        with self._lock:
+            segments = sorted(
+                (seq, size) for seq, (size, _) in self._segments.items()
+                if seq >= self._checkpoint[0]
+            )
+            seq, offset = self._checkpoint
+
+        entries: List[Entry] = []
+        entries_bytes: int = 0
+        position: Tuple[int, int] = (seq, offset)
+
+        for seg_seq, seg_size in segments:
+            start = offset if seg_seq == seq else 0
+            if start >= seg_size:
+                position = (seg_seq, start)
+                continue
+
+            for entry, end in self._iter_frames_safe(seg_seq, start, seg_size):
+                entries.append(entry)
+                entries_bytes += len(entry[0]) + len(entry[1])
+                position = (seg_seq, end)
+                if entries_bytes >= MAX_BATCH_BYTES or (
+                    not self.aggregate and len(entries) >= MAX_BATCH_RECORDS
+                ):
+                    return entries, position
+
+            if position[0] != seg_seq:
+                # Segment vanished (dropped) or unreadable: skip it
+                position = (seg_seq, seg_size)
+
+        return entries, position
+
+    def _commit(self, position: Tuple[int, int], n_events: int) -> None:
+        tmp = self.directory / f"{_CHECKPOINT_FILE}.tmp"
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"segment": position[0], "offset": position[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / _CHECKPOINT_FILE)
+
+        with self._lock:
+            self._checkpoint = position
+            self.metrics["delivered"] += n_events
+
+            # Delete segments fully delivered (never the active one)
+            for seq in [s for s in self._segments if s < position[0]]:
+                if seq != self._active_seq:
+                    self._segments.pop(seq)
+                    (self.directory / _segment_name(seq)).unlink(missing_ok=True)
+
+            self._lock.notify_all()
+
+    def _drain_loop(self) -> None:
+        failures: int = 0
+
+        while True:
+            with self._lock:
+                if (
+                    self._unsynced
+                    and time.monotonic() - self._last_sync >= self.fsync_interval_seconds
+                ):
+                    self._sync_locked()
+
+            entries, position = self._next_batch()
+
+            if not entries:
+                with self._lock:
+                    if position != self._checkpoint and position[0] in self._segments:
+                        self._checkpoint = position
+                    if self._closed:
+                        return
+                    self._lock.wait(timeout=DRAIN_IDLE_SECONDS)
+                continue
+
+            client = self._client if self._client is not None else _get_kinesis_client()
+
+            consumed_total: int = 0
+            delivered_all: bool = True
+            while consumed_total < len(entries):
+                records, consumed, _ = pack_records(
+                    entries[consumed_total:], aggregate=self.aggregate
+                )
+                undelivered = send_records(
+                    client,
+                    self.stream_name,
+                    records,
+                    max_retries=DRAIN_SEND_RETRIES,
+                    metrics=self.metrics,
+                )
+                if undelivered:
+                    delivered_all = False
+                    break
+                consumed_total += consumed
+
+            if delivered_all:
+                failures = 0
+                self._commit(position, len(entries))
+                continue
+
+            # Not delivered: keep the checkpoint, back off and retry.
+            # Records accepted in this round will be re-sent (at least once).
+            failures += 1
+            self.metrics["send_errors"] += 1
+            with self._lock:
+                if self._closed:
+                    return
+                self._lock.wait(
+                    timeout=min(
+                        BACKOFF_MAX_SECONDS,
+                        BACKOFF_BASE_SECONDS * (2 ** (failures - 1)),
+                    )
+                )
+
+    # --------------------------------------------------------
+    # Lifecycle / observability
+    # --------------------------------------------------------
+
+    def backlog(self) -> Dict[str, int]:
+        """
+        Backpressure metrics: undelivered bytes / events / segments.
+        """
+        with self._lock:
+            seq, offset = self._checkpoint
+            pending_bytes = 0
+            pending_events = 0
+            for s, (size, n_events) in self._segments.items():
+                if s > seq:
+                    pending_bytes += size
+                    pending_events += n_events
+                elif s == seq:
+                    pending_bytes += max(0, size - offset)
+
+            if seq in self._segments and offset > 0:
+                pending_events += sum(
+                    1 for _ in self._iter_frames_safe(seq, offset, self._segments[seq][0])
+                )
+            elif seq in self._segments:
+                pending_events += self._segments[seq][1]
+
+            return {
+                "backlog_bytes": pending_bytes,
+                "backlog_events": pending_events,
+                "segments": len(self._segments),
+                "disk_bytes": self._total_bytes(),
+            }
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every appended event has been delivered.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._sync_locked()
+            self._ensure_thread()
+            self._lock.notify_all()
+            while True:
+                end = (self._active_seq, self._segments[self._active_seq][0])
+                if self._checkpoint >= end:
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(timeout=remaining if remaining is not None else 0.5)
+
+    def close(self, drain_timeout: Optional[float] = 5.0) -> None:
+        """
+        fsync, try to drain for `drain_timeout` seconds, then stop.
+
+        Undelivered events stay on disk and are sent on the next start.
+        """
+        if self._thread is not None and drain_timeout:
+            self.wait_drained(timeout=drain_timeout)
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sync_locked()
+            self._active.close()
+            self._lock.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=BACKOFF_MAX_SECONDS)
+
+        self._release_directory()
@@ -0,0 +1,208 @@
+"""
+preload.py
+
+Precarga en paralelo (multiproceso) de las señales EDF de los
+siguientes pacientes de un cuarto.
+
+Responsabilidades:
+- Leer y preprocesar EDFs en un ProcessPoolExecutor mientras la sesión
+  actual se procesa ventana a ventana
+- Devolver cada señal a través de memoria compartida
+  (multiprocessing.shared_memory): solo viajan por pickle el nombre
+  del bloque, el shape y el dtype
+- Liberar (unlink) cada bloque cuando la sesión termina
+
+NO realiza:
+- Ventaneo
+- Inferencia
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
+import numpy as np
+
+from fog.pipeline.ingestion import load_edf_signal
+from fog.pipeline.signal_cache import CACHE_DIR, load_edf_signal_cached
+
+
+# ============================================================
+# Constants
+# ============================================================
+
+PRELOAD_WORKERS: Final[int] = 2
+
+# How many sessions ahead of the current one are preprocessed
+PRELOAD_AHEAD: Final[int] = 2
+
+# (shm name, shape, dtype, sfreq)
+SharedSignal = Tuple[str, Tuple[int, ...], str, int]
+
+
+# ============================================================
+# Worker side
+# ============================================================
+
+def _load_into_shared_memory(
+    edf_path: Path,
+    use_cache: bool = True,
+    cache_dir: Path = CACHE_DIR,
+) -> SharedSignal:
+    """
+    Load and preprocess an EDF in a worker process and copy the
+    result into a new shared memory block.
+
+    The block is not unlinked here; ownership passes to the parent.
+    """
+    if use_cache:
+        signal, sfreq = load_edf_signal_cached(edf_path, cache_dir=cache_dir)
+    else:
+        signal, sfreq = load_edf_signal(edf_path)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, signal.nbytes))
+    try:
+        target = np.ndarray(signal.shape, dtype=signal.dtype, buffer=shm.buf)
+        target[...] = signal
+
+        # The parent unlinks the block; stop this process's resource
+        # tracker from reporting it as leaked (and unlinking it) on exit.
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+        return shm.name, tuple(signal.shape), signal.dtype.str, int(sfreq)
+    finally:
+        shm.close()
+
+
+# ============================================================
+# Parent side
+# ============================================================
+
+class PreloadedSignal:
+    """
+    Preprocessed signal backed by a shared memory block.
+
+    Use as a context manager; the block is unlinked on exit, so the
+    array must not be used afterwards.
+    """
+
+    def __init__(self, shared: SharedSignal) -> None:
+        name, shape, dtype, sfreq = shared
+
+        self._shm: Optional[shared_memory.SharedMemory] = (
+            shared_memory.SharedMemory(name=name)
+        )
+        self.signal: np.ndarray = np.ndarray(
+            shape, dtype=np.dtype(dtype), buffer=self._shm.buf
+        )
+        self.sfreq: int = sfreq
+
+    def release(self) -> None:
+        if self._shm is None:
+            return
+
+        # Unlink first: the name is freed even if a view is still alive
+        del self.signal
+        self._shm.unlink()
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views still exported (e.g. kept by a traceback); the mapping
+            # is released when they are garbage collected.
+            pass
+        self._shm = None
+
+    def __enter__(self) -> "PreloadedSignal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+class SignalPreloader:
+    """
+    Preprocess a queue of EDF files ahead of use in a process pool.
+
+    Parameters
+    ----------
+    edf_paths : List[Path]
+        EDF files in the order they will be consumed.
+    max_workers : int
+        Worker processes.
+    ahead : int
+        Number of files kept in flight beyond the one being consumed.
+    use_cache : bool
+        If True, workers go through the on-disk signal cache.
+    cache_dir : Path
+        Signal cache directory.
+    """
+
+    def __init__(
+        self,
+        edf_paths: List[Path],
+        max_workers: int = PRELOAD_WORKERS,
+        ahead: int = PRELOAD_AHEAD,
+        use_cache: bool = True,
+        cache_dir: Path = CACHE_DIR,
+    ) -> None:
+        self.edf_paths = list(edf_paths)
+        self.ahead = max(1, ahead)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._futures: Dict[int, Future] = {}
+        self._next_submit: int = 0
+
+        self._fill(0)
+
+    def _fill(self, current: int) -> None:
+        limit: int = min(len(self.edf_paths), current + 1 + self.ahead)
+
+        while self._next_submit < limit:
+            index = self._next_submit
+            self._futures[index] = self._executor.submit(
+                _load_into_shared_memory,
+                self.edf_paths[index],
+                self.use_cache,
+                self.cache_dir,
+            )
+            self._next_submit += 1
+
+    def get(self, index: int) -> PreloadedSignal:
+        """
+        Wait for file `index` and schedule the following ones.
+
+        Raises whatever the worker raised while loading the file.
+        """
+        future: Optional[Future] = self._futures.pop(index, None)
+        if future is None:
+            raise KeyError(f"File {index} was not scheduled or already taken")
+
+        self._fill(index)
+        return PreloadedSignal(future.result())
+
+    def close(self) -> None:
+        """
+        Shut down the pool and free blocks that were never consumed.
+        """
+        for future in self._futures.values():
+            future.cancel()
+
+        self._executor.shutdown(wait=True)
+
+        for future in self._futures.values():
+            if future.cancelled() or future.exception() is not None:
+                continue
+            PreloadedSignal(future.result()).release()
+
+        self._futures.clear()
+
+    def __enter__(self) -> "SignalPreloader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
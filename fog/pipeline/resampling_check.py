@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+resampling_check.py
+
+Verificación de equivalencia entre los dos métodos de remuestreo de
+ingestion.py (polyphase, opcional, frente al FFT por defecto).
+
+Responsabilidades:
+- Remuestrear una señal sintética multitono desde varias frecuencias
+  de origen, y los EDF de fog/data/patients tras el preprocesamiento
+  completo (load_edf_signal)
+- Comprobar que ambos métodos devuelven la misma longitud
+  (int(n_samples / original_fs * TARGET_FS))
+- Comprobar que el error RMS relativo entre ambos, fuera de los bordes
+  (EDGE_SECONDS), no supera RMS_BOUND
+
+NO realiza:
+- Medición de tiempos (ver fog/models/benchmark.py para inferencia)
+
+Uso:
+    python -m fog.pipeline.resampling_check
+    python -m fog.pipeline.resampling_check --edf fog/data/patients/patient_aaaaadsz/aaaaadsz_s002_t002.edf
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Final, List, Sequence, Tuple
+
+import numpy as np
+
+from fog.pipeline.ingestion import TARGET_FS, load_edf_signal, resample_signals
+
+# Relative RMS difference allowed between polyphase and FFT
+RMS_BOUND: Final[float] = 0.01
+
+# FFT resampling assumes a periodic signal and polyphase has a filter
+# transient: both differ near the ends by design
+EDGE_SECONDS: Final[float] = 1.0
+
+SOURCE_FS: Final[Tuple[int, ...]] = (256, 400, 500, 512)
+TONES_HZ: Final[Tuple[float, ...]] = (1.5, 10.0, 33.0, 60.5, 100.0)
+
+DEFAULT_EDF_DIR: Final[Path] = Path(__file__).resolve().parents[1] / "data" / "patients"
+
+
+def relative_rms(reference: np.ndarray, candidate: np.ndarray, fs: int) -> float:
+    """
+    RMS of (candidate - reference) over RMS of reference, without the
+    first and last EDGE_SECONDS.
+    """
+    edge = int(EDGE_SECONDS * fs)
+    ref = reference[..., edge:-edge]
+    diff = candidate[..., edge:-edge] - ref
+    return float(np.sqrt(np.mean(diff ** 2)) / np.sqrt(np.mean(ref ** 2)))
+
+
+def multitone(fs: int, seconds: float, n_channels: int = 4) -> np.ndarray:
+    """
+    Sum of TONES_HZ with a different phase per channel.
+    """
+    t = np.arange(int(fs * seconds)) / fs
+    return np.stack(
+        [
+            sum(np.sin(2 * np.pi * f * t + ch + k) for k, f in enumerate(TONES_HZ))
+            for ch in range(n_channels)
+        ]
+    )
+
+
+def check_synthetic(seconds: float) -> List[str]:
+    """
+    Compare both methods on the multitone signal for each SOURCE_FS.
+    """
+    lines: List[str] = []
+    for fs in SOURCE_FS:
+        x = multitone(fs, seconds)
+        fft = resample_signals(x, fs, TARGET_FS, method="fft")
+        poly = resample_signals(x, fs, TARGET_FS, method="polyphase")
+
+        n_out = int(x.shape[-1] / fs * TARGET_FS)
+        assert fft.shape == poly.shape == (x.shape[0], n_out), (fft.shape, poly.shape, n_out)
+
+        err = relative_rms(fft, poly, TARGET_FS)
+        assert err <= RMS_BOUND, f"multitone @ {fs} Hz: relative RMS {err:.4f} > {RMS_BOUND}"
+        lines.append(f" multitone {fs:>4} Hz -> {TARGET_FS} : rms={err:.5f} n={n_out}")
+
+    return lines
+
+
+def check_edf(paths: Sequence[Path]) -> List[str]:
+    """
+    Compare both methods through the full preprocessing of each EDF.
+    """
+    lines: List[str] = []
+    for path in paths:
+        fft, fs = load_edf_signal(path, resample_method="fft")
+        poly, _ = load_edf_signal(path, resample_method="polyphase")
+
+        assert fft.shape == poly.shape, (path, fft.shape, poly.shape)
+
+        err = relative_rms(fft, poly, fs)
+        assert err <= RMS_BOUND, f"{path.name}: relative RMS {err:.4f} > {RMS_BOUND}"
+        lines.append(f" {path.name:<28}: rms={err:.5f} shape={poly.shape}")
+
+    return lines
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check polyphase resampling against the FFT method"
+    )
+    parser.add_argument("--edf", type=Path, nargs="*", default=None,
+                        help="EDF files (default: every EDF under fog/data/patients)")
+    parser.add_argument("--seconds", type=float, default=60.0,
+                        help="Length of the synthetic signal")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    edf_paths = args.edf if args.edf is not None else sorted(DEFAULT_EDF_DIR.rglob("*.edf"))
+
+    lines = check_synthetic(args.seconds) + check_edf(edf_paths)
+
+    print(
+        "\n"
+        "================ RESAMPLING CHECK ================\n"
+        f" Bound (relative RMS, {EDGE_SECONDS:g} s edges excluded): {RMS_BOUND}"
+    )
+    print("\n".join(lines))
+    print(" OK\n==================================================\n")
+
+
+if __name__ == "__main__":
+    main()
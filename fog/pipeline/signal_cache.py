@@ -0,0 +1,241 @@
+"""
+signal_cache.py
+
+Caché en disco de señales EEG preprocesadas.
+
+Responsabilidades:
+- Calcular una clave a partir del contenido del EDF (sha256) y de los
+  parámetros de preprocesamiento (filtros, notch, remuestreo, montaje)
+- Guardar la salida de load_edf_signal como .npy float32
+- Devolver los aciertos como np.memmap (sin copiar a RAM)
+- Desalojar entradas por tamaño total (LRU por fecha de último uso)
+  y ficheros temporales huérfanos de escrituras interrumpidas
+
+NO realiza:
+- Filtrado
+- Remuestreo
+- Windowing
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Final, List, Optional, Tuple
+
+import numpy as np
+
+from fog.pipeline import ingestion
+from fog.pipeline.ingestion import ResampleMethod, load_edf_signal
+
+
+# ============================================================
+# Constants
+# ============================================================
+
+CACHE_DIR: Final[Path] = Path("fog/output/cache/signals")
+CACHE_MAX_BYTES: Final[int] = 2 * 1024 ** 3  # 2 GiB
+CACHE_DTYPE: Final[type] = np.float32
+
+# Temporary files older than this belong to an interrupted write
+# (a live one is renamed into place within seconds)
+CACHE_TMP_MAX_AGE_SECONDS: Final[float] = 3600.0
+CACHE_TMP_SUFFIX: Final[str] = ".tmp"
+
+_HASH_BLOCK_BYTES: Final[int] = 1024 * 1024
+
+
+# ============================================================
+# Cache key
+# ============================================================
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def cache_key(
+    edf_path: Path,
+    resample_method: ResampleMethod = ingestion.RESAMPLE_METHOD,
+) -> str:
+    """
+    Build the cache key for an EDF file and the current preprocessing
+    parameters.
+
+    Any change in the file content or in LOWCUT, HIGHCUT, FILTER_ORDER,
+    TARGET_FS, notch settings, montage or resampling method yields a
+    different key.
+    """
+    params = {
+        "lowcut": ingestion.LOWCUT,
+        "highcut": ingestion.HIGHCUT,
+        "filter_order": ingestion.FILTER_ORDER,
+        "target_fs": ingestion.TARGET_FS,
+        "notch_freqs": list(ingestion.NOTCH_FREQS),
+        "notch_q": ingestion.NOTCH_Q,
+        "montage": [list(pair) for pair in ingestion.BIPOLAR_MONTAGE],
+        "resample_method": resample_method,
+        "dtype": np.dtype(CACHE_DTYPE).name,
+    }
+    params_digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    return f"{_file_sha256(edf_path)[:32]}-{params_digest[:16]}"
+
+
+# ============================================================
+# Eviction
+# ============================================================
+
+def evict(
+    cache_dir: Path = CACHE_DIR,
+    max_bytes: int = CACHE_MAX_BYTES,
+    keep: Optional[Path] = None,
+) -> List[Path]:
+    """
+    Remove least recently used entries until the cache fits in max_bytes.
+
+    Temporary files left behind by interrupted writes (older than
+    CACHE_TMP_MAX_AGE_SECONDS) are removed as well.
+
+    Parameters
+    ----------
+    keep : Optional[Path]
+        Entry never removed (the one just stored), even if it alone
+        exceeds max_bytes.
+
+    Returns
+    -------
+    List[Path]
+        Removed files.
+    """
+    if not cache_dir.exists():
+        return []
+
+    removed: List[Path] = []
+
+    stale_before: float = time.time() - CACHE_TMP_MAX_AGE_SECONDS
+    for path in cache_dir.glob(f"*{CACHE_TMP_SUFFIX}"):
+        try:
+            if path.stat().st_mtime >= stale_before:
+                continue
+        except FileNotFoundError:
+            continue
+        path.unlink(missing_ok=True)
+        removed.append(path)
+
+    entries: List[Tuple[float, int, Path]] = []
+    for path in cache_dir.glob("*.npy"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            # Evicted concurrently by another process
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+
+    total: int = sum(size for _, size, _ in entries)
+
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed.append(path)
+
+    return removed
+
+
+# ============================================================
+# Public API
+# ============================================================
+
+def load_edf_signal_cached(
+    edf_path: Path,
+    cache_dir: Path = CACHE_DIR,
+    max_bytes: int = CACHE_MAX_BYTES,
+    resample_method: ResampleMethod = ingestion.RESAMPLE_METHOD,
+) -> Tuple[np.ndarray, int]:
+    """
+    Cached version of load_edf_signal.
+
+    Parameters
+    ----------
+    edf_path : Path
+        Path to EDF file.
+    cache_dir : Path, optional
+        Directory holding cached .npy files.
+    max_bytes : int, optional
+        Maximum total size of the cache directory.
+    resample_method : {"fft", "polyphase"}, optional
+        Resampling backend used on a cache miss.
+
+    Returns
+    -------
+    X : np.memmap
+        Read-only float32 EEG signal with shape (n_channels, n_samples)
+        (an in-memory array if the entry was evicted concurrently).
+    sfreq : int
+        Final sampling frequency (TARGET_FS)
+    """
+
+    if not edf_path.exists():
+        raise FileNotFoundError(f"EDF file not found: {edf_path}")
+
+    cache_path: Path = cache_dir / f"{cache_key(edf_path, resample_method)}.npy"
+
+    if cache_path.exists():
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(cache_path)
+            X = np.load(cache_path, mmap_mode="r")
+            print(f"[CACHE] Hit: {cache_path}")
+            return X, ingestion.TARGET_FS
+        except FileNotFoundError:
+            # Evicted by another process since exists(): rebuild
+            pass
+
+    signal, _ = load_edf_signal(edf_path, resample_method=resample_method)
+    signal = signal.astype(CACHE_DTYPE, copy=False)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Unique per writer: threads and processes may store the same key
+    with tempfile.NamedTemporaryFile(
+        dir=cache_dir,
+        prefix=f"{cache_path.stem}.",
+        suffix=CACHE_TMP_SUFFIX,
+        delete=False,
+    ) as f:
+        tmp_path = Path(f.name)
+        try:
+            np.save(f, signal)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    os.replace(tmp_path, cache_path)
+    print(f"[CACHE] Stored: {cache_path}")
+
+    evict(cache_dir, max_bytes, keep=cache_path)
+
+    try:
+        X = np.load(cache_path, mmap_mode="r")
+    except FileNotFoundError:
+        # Removed by a concurrent preloader's eviction: serve from memory
+        print(f"[CACHE] Entry evicted concurrently, using in-memory signal: {cache_path}")
+        signal.setflags(write=False)
+        return signal, ingestion.TARGET_FS
+
+    return X, ingestion.TARGET_FS
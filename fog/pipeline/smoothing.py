@@ -0,0 +1,144 @@
+"""
+smoothing.py
+
+Suavizado de scores por stride (salto) para ventanas solapadas.
+
+Con ventanas de duración W y salto H, cada stride de H segundos queda
+cubierto por K = W / H ventanas. Al puntuar la ventana j, el stride que
+termina con ella (su último salto) ya tiene todas sus ventanas: su
+score suavizado combina las K últimas ventanas.
+
+Responsabilidades:
+- Media móvil de los K últimos scores (método "mean")
+- Voto por mayoría de las K últimas decisiones (método "vote")
+- Versión por lote (serie completa) y versión en línea (ventana a ventana)
+
+NO realiza:
+- Inferencia
+- Alertas
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Final, Literal, Tuple
+
+import numpy as np
+
+
+SmoothingMethod = Literal["none", "mean", "vote"]
+SMOOTHING_METHODS: Final[Tuple[str, ...]] = ("none", "mean", "vote")
+
+
+def windows_per_stride(
+    window_seconds: float,
+    overlap_seconds: float,
+) -> int:
+    """
+    Number of overlapping windows covering each stride (K = W / H).
+    """
+    step: float = window_seconds - overlap_seconds
+    if step <= 0:
+        raise ValueError("Overlap must be smaller than window duration")
+
+    return max(1, int(round(window_seconds / step)))
+
+
+def smooth_stride_scores(
+    window_scores: np.ndarray,
+    n_windows: int,
+    threshold: float,
+    method: SmoothingMethod = "mean",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-stride smoothed scores and decisions for a series of windows.
+
+    Stride j is the last hop of window j; it is combined with the
+    previous n_windows - 1 windows (fewer at the start).
+
+    Parameters
+    ----------
+    window_scores : np.ndarray
+        Scores of consecutive overlapping windows, shape (n,).
+    n_windows : int
+        Windows combined per stride (see windows_per_stride).
+    threshold : float
+        Suspicious threshold applied to raw (vote) or smoothed (mean)
+        scores.
+    method : {"none", "mean", "vote"}
+        "mean": moving average of scores, suspected if >= threshold.
+        "vote": fraction of suspected windows, suspected if > 0.5.
+
+    Returns
+    -------
+    scores : np.ndarray
+        Smoothed score per stride (vote: fraction of votes), shape (n,).
+    suspected : np.ndarray
+        Boolean decision per stride, shape (n,).
+    """
+    scores = np.asarray(window_scores, dtype=np.float64)
+
+    if method == "none":
+        return scores, scores >= threshold
+
+    if method == "mean":
+        values = scores
+    elif method == "vote":
+        values = (scores >= threshold).astype(np.float64)
+    else:
+        raise ValueError(f"Unknown smoothing method: {method}")
+
+    # Trailing moving average via one prefix sum
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(0, ends - n_windows)
+    smoothed = (prefix[ends] - prefix[starts]) / (ends - starts)
+
+    if method == "mean":
+        return smoothed, smoothed >= threshold
+    return smoothed, smoothed > 0.5
+
+
+class StrideScoreSmoother:
+    """
+    Online version of smooth_stride_scores (one window at a time).
+
+    Parameters
+    ----------
+    n_windows : int
+        Windows combined per stride (see windows_per_stride).
+    method : {"none", "mean", "vote"}
+        Smoothing method.
+    """
+
+    def __init__(
+        self,
+        n_windows: int,
+        method: SmoothingMethod = "mean",
+    ) -> None:
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Unknown smoothing method: {method}")
+
+        self.n_windows = max(1, n_windows)
+        self.method: SmoothingMethod = method
+        self._values: Deque[float] = deque(maxlen=self.n_windows)
+
+    def push(
+        self,
+        score: float,
+        threshold: float,
+    ) -> Tuple[float, bool]:
+        """
+        Add the next window score; return the stride (score, suspected).
+        """
+        if self.method == "none":
+            return score, score >= threshold
+
+        if self.method == "mean":
+            self._values.append(score)
+            smoothed = sum(self._values) / len(self._values)
+            return smoothed, smoothed >= threshold
+
+        self._values.append(1.0 if score >= threshold else 0.0)
+        fraction = sum(self._values) / len(self._values)
+        return fraction, fraction > 0.5
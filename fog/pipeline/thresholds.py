@@ -5,7 +5,9 @@ Lógica de decisión para determinar si una ventana EEG es sospechosa.
 
 Responsabilidades:
 - Cargar umbrales desde configuración (thresholds.yaml)
-- Evaluar scores probabilísticos
+- Mantener la configuración en memoria (se parsea una sola vez)
+- Recargarla en caliente si cambia el mtime del archivo
+- Evaluar scores probabilísticos (uno a uno o en lote)
 - Devolver una decisión booleana (True / False)
 
 NO realiza:
@@ -16,18 +18,27 @@ NO realiza:
 
 from __future__ import annotations
 
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Final, Optional, Tuple
 
+import numpy as np
 import yaml
 
 
+DEFAULT_THRESHOLDS_PATH: Final[Path] = Path("fog/config/thresholds.yaml")
+
+# Minimum time between two mtime checks of the same file.
+RELOAD_CHECK_INTERVAL_SECONDS: Final[float] = 1.0
+
+
 # ============================================================
 # Configuration loader
 # ============================================================
 
 def load_thresholds(
-    config_path: Path = Path("fog/config/thresholds.yaml"),
+    config_path: Path = DEFAULT_THRESHOLDS_PATH,
 ) -> Dict[str, Any]:
     """
     Load threshold configuration from YAML file.
@@ -54,6 +65,81 @@ def load_thresholds(
     return cfg
 
 
+# ============================================================
+# Cached configuration (hot reload)
+# ============================================================
+
+# path -> (mtime_ns, last_check_monotonic, cfg)
+_THRESHOLDS_CACHE: Dict[Path, Tuple[int, float, Dict[str, Any]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def get_thresholds(
+    config_path: Path = DEFAULT_THRESHOLDS_PATH,
+    check_interval: float = RELOAD_CHECK_INTERVAL_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Return the threshold configuration, parsing the YAML only when needed.
+
+    The file is parsed on first use and re-parsed only when its mtime
+    changes. The mtime is checked at most once every `check_interval`
+    seconds. If a reload fails (file missing or invalid), the last
+    valid configuration is kept.
+
+    Parameters
+    ----------
+    config_path : Path
+        Path to thresholds.yaml.
+    check_interval : float
+        Minimum seconds between mtime checks.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Parsed threshold configuration.
+    """
+    now: float = time.monotonic()
+
+    with _CACHE_LOCK:
+        cached = _THRESHOLDS_CACHE.get(config_path)
+
+    if cached is not None and now - cached[1] < check_interval:
+        return cached[2]
+
+    # stat() and the YAML parse run without the lock, so a slow disk
+    # does not stall the other rooms' decisions
+    try:
+        mtime_ns: int = config_path.stat().st_mtime_ns
+        if cached is not None and mtime_ns == cached[0]:
+            cfg = cached[2]
+        else:
+            cfg = load_thresholds(config_path)
+            if cached is not None:
+                print(f"[THRESHOLDS] Reloaded {config_path}")
+    except (OSError, TypeError, ValueError, yaml.YAMLError) as exc:
+        if cached is None:
+            raise
+        print(f"[THRESHOLDS][WARN] Keeping previous config: {exc}")
+        mtime_ns, cfg = cached[0], cached[2]
+
+    with _CACHE_LOCK:
+        current = _THRESHOLDS_CACHE.get(config_path)
+        # A concurrent caller checked the file more recently: keep its entry
+        if current is not None and current[1] > now:
+            return current[2]
+        _THRESHOLDS_CACHE[config_path] = (mtime_ns, now, cfg)
+
+    return cfg
+
+
+def clear_thresholds_cache() -> None:
+    """
+    Drop every cached configuration (next call re-reads from disk).
+    """
+    with _CACHE_LOCK:
+        _THRESHOLDS_CACHE.clear()
+
+
 # ============================================================
 # Decision logic
 # ============================================================
@@ -70,8 +156,8 @@ def is_suspected(
     score : float
         Probabilistic score returned by the inference module (0–1).
     thresholds_cfg : Dict[str, Any] | None, optional
-        Threshold configuration dictionary. If None, it is loaded
-        automatically from thresholds.yaml.
+        Threshold configuration dictionary. If None, the cached
+        configuration from thresholds.yaml is used (see get_thresholds).
 
     Returns
     -------
@@ -79,11 +165,39 @@ def is_suspected(
         True if the window is suspicious, False otherwise.
     """
 
-    if thresholds_cfg is None:
-        thresholds_cfg = load_thresholds()
+    return bool(score >= suspicious_threshold(thresholds_cfg))
+
 
-    threshold: float = float(
-        thresholds_cfg["inference"]["suspicious_threshold"]
-    )
+def is_suspected_batch(
+    scores: np.ndarray,
+    thresholds_cfg: Optional[Dict[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Vectorized version of is_suspected.
+
+    Parameters
+    ----------
+    scores : np.ndarray
+        Probabilistic scores, any shape (typically (B,)).
+    thresholds_cfg : Optional[Dict[str, Any]], optional
+        Threshold configuration dictionary (default: cached config).
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array with the same shape as `scores`.
+    """
+
+    return np.asarray(scores) >= suspicious_threshold(thresholds_cfg)
+
+
+def suspicious_threshold(
+    thresholds_cfg: Optional[Dict[str, Any]] = None,
+) -> float:
+    """
+    Suspicious-score threshold (default: cached thresholds.yaml).
+    """
+    if thresholds_cfg is None:
+        thresholds_cfg = get_thresholds()
 
-    return score >= threshold
+    return float(thresholds_cfg["inference"]["suspicious_threshold"])
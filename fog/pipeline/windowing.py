@@ -4,9 +4,13 @@ windowing.py
 Segmentación temporal de señales EEG en ventanas fijas.
 
 Responsabilidades:
-- Recibir señal EEG completa (C, N)
+- Recibir señal EEG completa (C, N) o un flujo de bloques (C, T)
 - Generar ventanas contiguas (o solapadas) de duración fija
-- (Opcional) simular tiempo real respetando la duración de la ventana
+- Exponer todas las ventanas como una vista (n_windows, C, T) sin copias
+- Agrupar ventanas consecutivas en lotes (B, C, T) para la inferencia
+- (Opcional) simular tiempo real con deadlines absolutos sobre
+  time.monotonic() (sin deriva), con factor de aceleración para replay
+  y métricas de retraso (lag) y deadlines perdidos
 
 NO realiza:
 - Filtrado
@@ -16,18 +20,137 @@ NO realiza:
 
 from __future__ import annotations
 
+import asyncio
+import math
 import time
-from typing import Iterator
+from typing import Dict, Final, Iterable, Iterator, List, Optional
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 
+# ============================================================
+# Real-time pacing
+# ============================================================
+
+# Replay speed: 1.0 = wall-clock, 10.0 = ten times faster,
+# math.inf = as fast as possible
+REALTIME_SPEED: Final[float] = 1.0
+
+
+class PacingClock:
+    """
+    Drift-free pacing on absolute time.monotonic() deadlines.
+
+    Tick i is due at t0 + i * period / speed, where t0 is the first
+    tick. Time spent by the caller between ticks (inference, publish)
+    is absorbed instead of accumulated; when the caller falls behind,
+    ticks are released immediately until it catches up.
+
+    Parameters
+    ----------
+    period_seconds : float
+        Signal time between ticks (the window step).
+    speed : float, optional
+        Replay speed factor (> 0; math.inf disables waiting).
+    """
+
+    def __init__(
+        self,
+        period_seconds: float,
+        speed: float = REALTIME_SPEED,
+    ) -> None:
+        if period_seconds <= 0:
+            raise ValueError("period_seconds must be positive")
+        if not speed > 0:
+            raise ValueError("speed must be positive (math.inf: no pacing)")
+
+        self.period_seconds = period_seconds
+        self.speed = speed
+        self.interval: float = 0.0 if math.isinf(speed) else period_seconds / speed
+
+        self._start: Optional[float] = None
+        self.ticks: int = 0
+        self.late_ticks: int = 0
+        self.skipped_deadlines: int = 0
+        self.max_lag_seconds: float = 0.0
+        self.total_lag_seconds: float = 0.0
+
+    def _next_delay(self) -> float:
+        now: float = time.monotonic()
+        if self._start is None:
+            self._start = now
+        return self._start + self.ticks * self.interval - now
+
+    def _record(self) -> None:
+        if self.interval > 0:
+            deadline: float = self._start + self.ticks * self.interval
+            lag: float = max(0.0, time.monotonic() - deadline)
+
+            self.total_lag_seconds += lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+            if lag >= self.interval:
+                # Later deadlines already passed while this tick was due
+                self.late_ticks += 1
+                self.skipped_deadlines += int(lag // self.interval)
+
+        self.ticks += 1
+
+    def wait(self) -> None:
+        """
+        Block until the next tick is due.
+        """
+        delay: float = self._next_delay()
+        if delay > 0:
+            time.sleep(delay)
+        self._record()
+
+    async def wait_async(self) -> None:
+        """
+        Wait for the next tick without blocking the event loop.
+        """
+        delay: float = self._next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._record()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Pacing metrics: ticks, late ticks, skipped deadlines and lag.
+        """
+        return {
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "skipped_deadlines": self.skipped_deadlines,
+            "max_lag_seconds": self.max_lag_seconds,
+            "mean_lag_seconds": self.total_lag_seconds / max(1, self.ticks),
+        }
+
+    def report(self, label: str = "") -> None:
+        stats = self.stats()
+        prefix: str = f"[PACING]{f' [{label}]' if label else ''}"
+        print(
+            f"{prefix} windows={stats['ticks']} speed={self.speed:g}x "
+            f"max_lag={stats['max_lag_seconds'] * 1000:.1f} ms "
+            f"mean_lag={stats['mean_lag_seconds'] * 1000:.1f} ms "
+            f"late={stats['late_ticks']} "
+            f"skipped_deadlines={stats['skipped_deadlines']}"
+        )
+
+
+# ============================================================
+# Window generators
+# ============================================================
+
 def generate_windows(
     signal: np.ndarray,
     sfreq: int,
     window_seconds: float = 4.0,
     overlap_seconds: float = 0.0,
     realtime: bool = True,
+    speed: float = REALTIME_SPEED,
+    clock: Optional[PacingClock] = None,
 ) -> Iterator[np.ndarray]:
     """
     Generate EEG windows from a full-length signal.
@@ -43,7 +166,12 @@ def generate_windows(
     overlap_seconds : float, optional
         Overlap between consecutive windows in seconds (default: 0.0).
     realtime : bool, optional
-        If True, sleeps to simulate real-time streaming.
+        If True, release one window per step on a PacingClock
+        (simulated real-time streaming).
+    speed : float, optional
+        Replay speed factor for real-time mode (math.inf: no waiting).
+    clock : Optional[PacingClock], optional
+        Clock to pace with (to read its stats); created if None.
 
     Yields
     ------
@@ -63,14 +191,221 @@ def generate_windows(
     if step_samples <= 0:
         raise ValueError("Overlap must be smaller than window duration")
 
+    if realtime and clock is None:
+        clock = PacingClock(step_samples / sfreq, speed)
+
     start: int = 0
 
     while start + window_samples <= n_samples:
+        if realtime:
+            clock.wait()
+
         window: np.ndarray = signal[:, start:start + window_samples]
 
         yield window
 
-        if realtime:
-            time.sleep(window_seconds)
-
         start += step_samples
+
+    if realtime:
+        clock.report()
+
+
+def generate_windows_from_stream(
+    blocks: Iterable[np.ndarray],
+    sfreq: int,
+    window_seconds: float = 4.0,
+    overlap_seconds: float = 0.0,
+    realtime: bool = True,
+    speed: float = REALTIME_SPEED,
+    clock: Optional[PacingClock] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Generate EEG windows from a stream of signal blocks.
+
+    Produces the same windows as `generate_windows` on the concatenated
+    signal, but only buffers the samples not yet covered by a window.
+
+    Parameters
+    ----------
+    blocks : Iterable[np.ndarray]
+        Consecutive EEG blocks of shape (n_channels, n_block_samples).
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+    window_seconds : float, optional
+        Duration of each window in seconds (default: 4.0).
+    overlap_seconds : float, optional
+        Overlap between consecutive windows in seconds (default: 0.0).
+    realtime : bool, optional
+        If True, release one window per step on a PacingClock
+        (simulated real-time streaming).
+    speed : float, optional
+        Replay speed factor for real-time mode (math.inf: no waiting).
+    clock : Optional[PacingClock], optional
+        Clock to pace with (to read its stats); created if None.
+
+    Yields
+    ------
+    window : np.ndarray
+        EEG window of shape (n_channels, window_samples).
+    """
+
+    window_samples: int = int(window_seconds * sfreq)
+    overlap_samples: int = int(overlap_seconds * sfreq)
+    step_samples: int = window_samples - overlap_samples
+
+    if step_samples <= 0:
+        raise ValueError("Overlap must be smaller than window duration")
+
+    if realtime and clock is None:
+        clock = PacingClock(step_samples / sfreq, speed)
+
+    buffer: Optional[np.ndarray] = None
+
+    for block in blocks:
+        if block.ndim != 2:
+            raise ValueError("Blocks must have shape (n_channels, n_samples)")
+
+        if buffer is None:
+            buffer = block
+        else:
+            buffer = np.concatenate([buffer, block], axis=-1)
+
+        start: int = 0
+
+        while start + window_samples <= buffer.shape[-1]:
+            if realtime:
+                clock.wait()
+
+            window: np.ndarray = buffer[:, start:start + window_samples]
+
+            yield window
+
+            start += step_samples
+
+        buffer = buffer[:, start:]
+
+    if realtime:
+        clock.report()
+
+
+def window_view(
+    signal: np.ndarray,
+    sfreq: int,
+    window_seconds: float = 4.0,
+    overlap_seconds: float = 0.0,
+) -> np.ndarray:
+    """
+    Return every window of a signal as a strided view (no copy).
+
+    The windows are the same ones yielded by `generate_windows`.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        EEG signal of shape (n_channels, n_samples).
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+    window_seconds : float, optional
+        Duration of each window in seconds (default: 4.0).
+    overlap_seconds : float, optional
+        Overlap between consecutive windows in seconds (default: 0.0).
+
+    Returns
+    -------
+    windows : np.ndarray
+        Read-only view of shape (n_windows, n_channels, window_samples).
+    """
+
+    if signal.ndim != 2:
+        raise ValueError("Signal must have shape (n_channels, n_samples)")
+
+    n_channels, n_samples = signal.shape
+
+    window_samples: int = int(window_seconds * sfreq)
+    overlap_samples: int = int(overlap_seconds * sfreq)
+    step_samples: int = window_samples - overlap_samples
+
+    if step_samples <= 0:
+        raise ValueError("Overlap must be smaller than window duration")
+
+    if n_samples < window_samples:
+        return np.empty((0, n_channels, window_samples), dtype=signal.dtype)
+
+    # (C, n_positions, W) -> keep one position every step -> (n_windows, C, W)
+    view = sliding_window_view(signal, window_samples, axis=-1)
+    return view[:, ::step_samples, :].transpose(1, 0, 2)
+
+
+def generate_window_batches(
+    signal: np.ndarray,
+    sfreq: int,
+    batch_size: int = 64,
+    window_seconds: float = 4.0,
+    overlap_seconds: float = 0.0,
+) -> Iterator[np.ndarray]:
+    """
+    Generate fixed-size batches of windows as views over the signal.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        EEG signal of shape (n_channels, n_samples).
+    sfreq : int
+        Sampling frequency in Hz (e.g., 250).
+    batch_size : int, optional
+        Number of windows per batch (the last batch may be smaller).
+    window_seconds : float, optional
+        Duration of each window in seconds (default: 4.0).
+    overlap_seconds : float, optional
+        Overlap between consecutive windows in seconds (default: 0.0).
+
+    Yields
+    ------
+    batch : np.ndarray
+        Read-only view of shape (batch, n_channels, window_samples).
+    """
+
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    windows = window_view(signal, sfreq, window_seconds, overlap_seconds)
+
+    for start in range(0, windows.shape[0], batch_size):
+        yield windows[start:start + batch_size]
+
+
+def batch_windows(
+    windows: Iterable[np.ndarray],
+    batch_size: int = 64,
+) -> Iterator[np.ndarray]:
+    """
+    Group consecutive windows of an iterator into (B, C, T) batches.
+
+    Each batch is released as soon as it is full (or the iterator ends),
+    so with batch_size=1 a paced generator keeps its timing.
+
+    Parameters
+    ----------
+    windows : Iterable[np.ndarray]
+        Windows of shape (n_channels, window_samples).
+    batch_size : int, optional
+        Number of windows per batch (the last batch may be smaller).
+
+    Yields
+    ------
+    batch : np.ndarray
+        Shape (batch, n_channels, window_samples).
+    """
+
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    pending: List[np.ndarray] = []
+    for window in windows:
+        pending.append(window)
+        if len(pending) == batch_size:
+            yield np.stack(pending)
+            pending = []
+
+    if pending:
+        yield np.stack(pending)
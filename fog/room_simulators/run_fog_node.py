@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+run_fog_node.py
+
+Entrypoint asyncio para simular un nodo Fog completo (todas las salas).
+
+Responsabilidades:
+- Leer la configuración del nodo (FogConfig, una sola vez al arrancar)
+- Ejecutar concurrentemente, en un solo proceso, todos los cuartos y
+  todos los pacientes asignados (una corrutina por paciente)
+- Mantener el ritmo de tiempo real con deadlines absolutos
+  (PacingClock, sin deriva acumulada) y factor de aceleración
+- Delegar las etapas pesadas en CPU (carga/filtrado EDF, inferencia)
+  a un ThreadPoolExecutor (NumPy/SciPy/ONNX liberan el GIL)
+- Puntuar en un solo lote las ventanas de todos los pacientes que
+  vencen en el mismo tick (InferenceBatcher); con ventanas solapadas y
+  un modelo sobre características, cada paciente calcula las suyas una
+  vez por salto y se agrupan las características
+- Delegar la publicación de eventos (outbox / Kinesis) a un executor
+  de un solo hilo (mantiene el orden), sin bloquear el event loop, y
+  contar/registrar las publicaciones fallidas
+- Cerrar sesiones y subir EDF en un executor propio, para que una
+  subida lenta no retrase la publicación de los demás pacientes
+
+Reutiliza los pasos por ventana y por sesión de run_room.py.
+
+NO realiza:
+- Paralelismo multiproceso
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import os
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Set, Tuple
+
+import numpy as np
+
+from fog.pipeline.config import (
+    FOG_CONFIG_PATH,
+    ROOM_ASSIGNMENTS_PATH,
+    SESSION_POLICY_PATH,
+    THRESHOLDS_PATH,
+    FogConfig,
+    PatientAssignment,
+    load_fog_config,
+)
+from fog.pipeline.ingestion import load_edf_signal
+from fog.pipeline.signal_cache import load_edf_signal_cached
+from fog.pipeline.windowing import PacingClock, window_view
+from fog.pipeline.batching import InferenceBatcher
+from fog.pipeline.inference import INFERENCE_BATCH_SIZE, feature_stream
+from fog.pipeline.session_manager import start_session
+from fog.pipeline.smoothing import StrideScoreSmoother, windows_per_stride
+from fog.pipeline.thresholds import get_thresholds
+from fog.pipeline.cloud_publisher import configure_outbox, publish_event
+from fog.models.runtime import INTRA_OP_THREADS, init_model_runtime
+from fog.room_simulators.run_room import finish_session, process_window_result
+
+# =========================
+# Constants
+# =========================
+
+# CPU stages (EDF preprocessing, inference)
+CPU_WORKERS: Final[int] = max(1, min(8, os.cpu_count() or 1))
+
+# Session teardown (flush, end_session, synchronous EDF upload to S3)
+SESSION_WORKERS: Final[int] = 4
+
+
+# =========================
+# Patient session
+# =========================
+
+async def run_patient(
+    room_id: str,
+    patient: PatientAssignment,
+    config: FogConfig,
+    cpu_executor: Executor,
+    io_executor: Executor,
+    session_executor: Executor,
+    batcher: InferenceBatcher,
+    use_cache: bool = True,
+) -> Dict[str, float]:
+    """
+    Run one patient session as a coroutine.
+
+    Window i is released at t0 + i * step / speed (PacingClock), so
+    the processing time of earlier windows never delays later ones.
+    Released windows are scored through `batcher`, together with the
+    other patients' windows due at the same time; without pacing,
+    INFERENCE_BATCH_SIZE consecutive windows are released at once.
+
+    Parameters
+    ----------
+    room_id : str
+        Room of the patient.
+    patient : PatientAssignment
+        Patient and EDF path.
+    config : FogConfig
+        Validated fog configuration (windowing, simulation, policy).
+    cpu_executor : Executor
+        Executor for preprocessing.
+    io_executor : Executor
+        Single-worker executor for publishing (keeps order).
+    session_executor : Executor
+        Executor for session teardown and EDF uploads.
+    batcher : InferenceBatcher
+        Shared cross-patient inference batcher.
+    use_cache : bool, optional
+        If True, reuse preprocessed signals cached on disk.
+
+    Returns
+    -------
+    Dict[str, float]
+        Session stats: windows, failed publishes (publish_errors) plus
+        PacingClock.stats() when paced.
+    """
+    loop = asyncio.get_running_loop()
+
+    patient_id: str = patient.patient_id
+    edf_path: Path = patient.edf_path
+    window = config.window
+    simulation = config.simulation
+
+    session_id: str = start_session(room_id=room_id, patient_id=patient_id)
+
+    if use_cache:
+        signal, sfreq = await loop.run_in_executor(
+            cpu_executor,
+            load_edf_signal_cached,
+            edf_path,
+            config.paths.signal_cache_dir,
+        )
+    else:
+        signal, sfreq = await loop.run_in_executor(
+            cpu_executor, load_edf_signal, edf_path
+        )
+    config.signal.check_sampling_rate(sfreq)
+    print(
+        f"[INFO] [{room_id}/{patient_id}] EDF signal loaded "
+        f"(sfreq={sfreq} Hz, shape={signal.shape})"
+    )
+
+    windows: np.ndarray = window_view(
+        signal,
+        sfreq,
+        window_seconds=window.duration_seconds,
+        overlap_seconds=window.overlap_seconds,
+    )
+    clock = PacingClock(window.step_seconds, simulation.speed)
+
+    smoother: Optional[StrideScoreSmoother] = None
+    if window.smoothing != "none":
+        smoother = StrideScoreSmoother(
+            windows_per_stride(window.duration_seconds, window.overlap_seconds),
+            window.smoothing,
+        )
+
+    # Overlapping windows + feature model: features once per hop
+    features = feature_stream(
+        sfreq, window.duration_seconds, window.overlap_seconds
+    )
+
+    batch_size: int = 1 if simulation.paced else INFERENCE_BATCH_SIZE
+
+    publishing: Set["asyncio.Future[None]"] = set()
+    publish_errors: List[int] = []
+
+    def published(window_index: int, future: "asyncio.Future[None]") -> None:
+        publishing.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            publish_errors.append(window_index)
+            print(
+                f"[ERROR] [{room_id}/{patient_id}] window {window_index} "
+                f"not published: {future.exception()}",
+                file=sys.stderr,
+            )
+
+    for start in range(0, len(windows), batch_size):
+        if simulation.paced:
+            await clock.wait_async()
+
+        block: np.ndarray = windows[start:start + batch_size]
+        if features is None:
+            probabilities: np.ndarray = await batcher.score(block)
+        else:
+            probabilities = await batcher.score_features(
+                await loop.run_in_executor(cpu_executor, features.push, block)
+            )
+
+        for window_index, probability in enumerate(probabilities.tolist(), start):
+            event: Dict[str, Any] = process_window_result(
+                room_id=room_id,
+                patient_id=patient_id,
+                session_id=session_id,
+                window_index=window_index,
+                probability=probability,
+                thresholds_cfg=get_thresholds(config.thresholds.path),
+                smoother=smoother,
+            )
+            print(
+                f"\t[INFO] [{room_id}/{patient_id}] window {window_index} "
+                f"probability={probability:.4f}"
+            )
+
+            # Not awaited: the single I/O worker keeps publish order and
+            # the callback reports failures
+            future = loop.run_in_executor(io_executor, publish_event, event)
+            publishing.add(future)
+            future.add_done_callback(functools.partial(published, window_index))
+
+        if simulation.artificial_delay_seconds > 0:
+            await asyncio.sleep(simulation.artificial_delay_seconds)
+
+    # Every event is in the outbox before the session is closed
+    if publishing:
+        await asyncio.wait(publishing)
+
+    await loop.run_in_executor(
+        session_executor,
+        finish_session,
+        room_id,
+        patient_id,
+        session_id,
+        edf_path,
+        config.session,
+    )
+
+    stats: Dict[str, float] = {
+        "windows": float(len(windows)),
+        "publish_errors": float(len(publish_errors)),
+    }
+    if simulation.paced:
+        stats.update(clock.stats())
+    return stats
+
+
+# =========================
+# Rooms
+# =========================
+
+async def run_room_async(
+    room_id: str,
+    config: FogConfig,
+    cpu_executor: Executor,
+    io_executor: Executor,
+    session_executor: Executor,
+    batcher: InferenceBatcher,
+    use_cache: bool = True,
+) -> None:
+    """
+    Run every patient of a room concurrently.
+    """
+    patients: Tuple[PatientAssignment, ...] = config.room(room_id).patients
+    print(f"\n[INFO] Starting room {room_id} ({len(patients)} patients)")
+
+    results = await asyncio.gather(
+        *(
+            run_patient(
+                room_id,
+                patient,
+                config,
+                cpu_executor,
+                io_executor,
+                session_executor,
+                batcher,
+                use_cache=use_cache,
+            )
+            for patient in patients
+        ),
+        return_exceptions=True,
+    )
+
+    for patient, result in zip(patients, results):
+        if isinstance(result, BaseException):
+            print(
+                f"[ERROR] [{room_id}/{patient.patient_id}] {result}",
+                file=sys.stderr,
+            )
+        else:
+            summary: str = f"{int(result['windows'])} windows"
+            if result["publish_errors"]:
+                summary += f", {int(result['publish_errors'])} not published"
+            if "max_lag_seconds" in result:
+                summary += (
+                    f", max lag {result['max_lag_seconds'] * 1000:.1f} ms"
+                    f", skipped deadlines {int(result['skipped_deadlines'])}"
+                )
+            print(f"[INFO] [{room_id}/{patient.patient_id}] {summary}")
+
+    print(f"[INFO] Room {room_id} finished")
+
+
+async def run_fog_node(
+    config: FogConfig,
+    room_ids: Optional[List[str]] = None,
+    use_cache: bool = True,
+    cpu_workers: int = CPU_WORKERS,
+) -> None:
+    """
+    Run all (or the selected) rooms of the fog node concurrently.
+
+    Parameters
+    ----------
+    config : FogConfig
+        Validated fog configuration.
+    room_ids : Optional[List[str]]
+        Rooms to run (default: every room in the configuration).
+    use_cache : bool, optional
+        If True, reuse preprocessed signals cached on disk.
+    cpu_workers : int, optional
+        Threads for preprocessing and inference.
+    """
+    selected: List[str] = room_ids or list(config.room_ids)
+
+    for room_id in selected:
+        config.room(room_id)
+
+    with ThreadPoolExecutor(cpu_workers, thread_name_prefix="fog-cpu") as cpu, \
+            ThreadPoolExecutor(1, thread_name_prefix="fog-io") as io, \
+            ThreadPoolExecutor(SESSION_WORKERS, thread_name_prefix="fog-session") as sessions:
+        batcher = InferenceBatcher(cpu)
+        await asyncio.gather(
+            *(
+                run_room_async(
+                    room_id, config, cpu, io, sessions, batcher, use_cache=use_cache
+                )
+                for room_id in selected
+            )
+        )
+
+    inference = batcher.stats()
+    print(
+        f"\n[INFO] Inference: {int(inference['windows'])} windows in "
+        f"{int(inference['calls'])} batches "
+        f"(mean batch size {inference['mean_batch_size']:.1f})"
+    )
+
+    print("\n[INFO] Fog node simulation finished")
+
+
+# =========================
+# CLI
+# =========================
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed CLI arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate a whole Fog node (all rooms, all patients)"
+    )
+
+    parser.add_argument(
+        "--rooms",
+        nargs="*",
+        default=None,
+        help="Rooms to simulate (default: all rooms in the config)",
+    )
+
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=ROOM_ASSIGNMENTS_PATH,
+        help="Path to room assignments YAML file",
+    )
+
+    parser.add_argument(
+        "--fog-config",
+        type=Path,
+        default=FOG_CONFIG_PATH,
+        help="Path to fog_config.yaml (windowing, simulation, paths)",
+    )
+
+    parser.add_argument(
+        "--session-policy",
+        type=Path,
+        default=SESSION_POLICY_PATH,
+        help="Path to session_policy.yaml",
+    )
+
+    parser.add_argument(
+        "--thresholds",
+        type=Path,
+        default=THRESHOLDS_PATH,
+        help="Path to thresholds.yaml",
+    )
+
+    parser.add_argument(
+        "--no-realtime",
+        action="store_true",
+        help="Override simulation.realtime: process windows as fast as possible",
+    )
+
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=None,
+        help="Override simulation.speed (1: real time, 10: 10x, inf: as fast as possible)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-read and re-filter EDF files (skip the signal cache)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CPU_WORKERS,
+        help="Threads for preprocessing and inference",
+    )
+
+    parser.add_argument(
+        "--model",
+        type=Path,
+        default=None,
+        help="Model artifact (.onnx / .npz); default: mock model",
+    )
+
+    parser.add_argument(
+        "--model-threads",
+        type=int,
+        default=INTRA_OP_THREADS,
+        help="Intra-op thread count for the model runtime",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Main entrypoint.
+    """
+    args = parse_args()
+
+    try:
+        init_model_runtime(args.model, intra_op_threads=args.model_threads)
+        config: FogConfig = load_fog_config(
+            fog_config_path=args.fog_config,
+            room_assignments_path=args.config,
+            session_policy_path=args.session_policy,
+            thresholds_path=args.thresholds,
+        ).with_simulation(
+            realtime=False if args.no_realtime else None,
+            speed=args.speed,
+        )
+        configure_outbox(config.paths.outbox_dir("fog_node"))
+        asyncio.run(
+            run_fog_node(
+                config,
+                room_ids=args.rooms,
+                use_cache=not args.no_cache,
+                cpu_workers=args.workers,
+            )
+        )
+    except Exception as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
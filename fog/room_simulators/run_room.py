@@ -5,14 +5,17 @@ run_room.py
 Entrypoint para simular un cuarto (room) dentro del nodo Fog.
 
 Responsabilidades:
-- Leer la configuración de asignación de pacientes a cuartos (YAML)
+- Leer la configuración del nodo (FogConfig: fog_config.yaml,
+  room_assignments.yaml, session_policy.yaml, thresholds.yaml)
 - Seleccionar un cuarto específico (room_A, room_B, etc.)
 - Procesar secuencialmente a los pacientes asignados a ese cuarto
 - Para cada paciente:
     - Iniciar una sesión
     - Leer su archivo EDF
     - Generar ventanas de EEG (delegado al pipeline)
-    - Ejecutar inferencia (mock)
+    - Ejecutar inferencia por lotes (run_inference_batch; con ventanas
+      solapadas y un modelo sobre características, estas se calculan
+      una vez por salto y se puntúan con run_inference_features)
     - Disparar alertas locales inmediatas si corresponde
     - Finalizar la sesión
 
@@ -23,18 +26,41 @@ from __future__ import annotations
 
 import argparse
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 
-import yaml
+import numpy as np
 
 # =========================
 # Pipeline imports
 # =========================
-from fog.pipeline.ingestion import load_edf_signal
-from fog.pipeline.windowing import generate_windows
-from fog.pipeline.inference import run_inference
-from fog.pipeline.thresholds import is_suspected
+from fog.pipeline.config import (
+    FOG_CONFIG_PATH,
+    ROOM_ASSIGNMENTS_PATH,
+    SESSION_POLICY_PATH,
+    THRESHOLDS_PATH,
+    FogConfig,
+    SessionPolicy,
+    load_fog_config,
+)
+from fog.pipeline.ingestion import TARGET_FS, load_edf_signal, stream_edf_signal
+from fog.pipeline.signal_cache import load_edf_signal_cached
+from fog.pipeline.preload import SignalPreloader
+from fog.pipeline.windowing import (
+    batch_windows,
+    generate_window_batches,
+    generate_windows,
+    generate_windows_from_stream,
+)
+from fog.pipeline.inference import (
+    INFERENCE_BATCH_SIZE,
+    feature_stream,
+    run_inference_batch,
+    run_inference_features,
+)
+from fog.pipeline.smoothing import StrideScoreSmoother, windows_per_stride
+from fog.pipeline.thresholds import get_thresholds, is_suspected, suspicious_threshold
 from fog.pipeline.local_alerts import trigger_local_alert
 from fog.pipeline.session_manager import (
     start_session,
@@ -45,67 +71,243 @@ from fog.pipeline.session_manager import (
 )
 from fog.pipeline.event_builder import build_window_event
 from fog.pipeline.edf_uploader import upload_edf
-from fog.pipeline.cloud_publisher import publish_event
-
-# =========================
-# Types
-# =========================
-
-RoomConfig = Dict[str, Any]
-PatientConfig = Dict[str, str]
-
+from fog.pipeline.cloud_publisher import (
+    configure_outbox,
+    flush_events,
+    publish_event,
+)
+from fog.models.runtime import INTRA_OP_THREADS, init_model_runtime
 
 # =========================
-# Configuration loader
+# Per-window / per-session steps
 # =========================
 
-def load_room_assignments(config_path: Path) -> RoomConfig:
+def process_window_result(
+    room_id: str,
+    patient_id: str,
+    session_id: str,
+    window_index: int,
+    probability: float,
+    thresholds_cfg: Optional[Dict[str, Any]] = None,
+    smoother: Optional[StrideScoreSmoother] = None,
+) -> Dict[str, Any]:
     """
-    Load room-to-patient assignments from a YAML configuration file.
+    Register a scored window, trigger the local alert if needed and
+    build its cloud event.
 
     Parameters
     ----------
-    config_path : Path
-        Path to the room_assignments.yaml file.
+    room_id, patient_id, session_id : str
+        Session context.
+    window_index : int
+        Index of the window within the session.
+    probability : float
+        Model score for the window.
+    thresholds_cfg : Optional[Dict[str, Any]], optional
+        Threshold configuration (default: cached thresholds.yaml).
+    smoother : Optional[StrideScoreSmoother], optional
+        If given, decide on the stride-smoothed score instead of the
+        raw window score.
 
     Returns
     -------
-    RoomConfig
-        Parsed YAML content as a dictionary.
+    Dict[str, Any]
+        Event ready for publish_event.
     """
-    if not config_path.exists():
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+    register_window(session_id)
+
+    # Decision logic
+    smoothed_score: Optional[float] = None
+    if smoother is not None:
+        smoothed_score, suspected = smoother.push(
+            probability, suspicious_threshold(thresholds_cfg)
+        )
+    else:
+        suspected = is_suspected(probability, thresholds_cfg)
+    if suspected:
+        register_suspicious_window(session_id)
+
+        trigger_local_alert(
+            room_id=room_id,
+            patient_id=patient_id,
+            session_id=session_id,
+            window_index=window_index,
+            # The score that crossed the threshold
+            score=probability if smoothed_score is None else smoothed_score,
+        )
+
+    return build_window_event(
+        room_id=room_id,
+        patient_id=patient_id,
+        session_id=session_id,
+        window_index=window_index,
+        score=probability,
+        suspected=suspected,
+        smoothed_score=smoothed_score,
+    )
 
-    with config_path.open("r", encoding="utf-8") as f:
-        config: RoomConfig = yaml.safe_load(f)
 
-    if "rooms" not in config:
-        raise ValueError("Invalid configuration: missing 'rooms' key")
+def finish_session(
+    room_id: str,
+    patient_id: str,
+    session_id: str,
+    edf_path: Path,
+    session_policy: SessionPolicy,
+) -> None:
+    """
+    Flush pending events, close the session and upload the EDF if
+    the session policy requires it.
+    """
+    flush_events()
+    end_session(
+        room_id=room_id,
+        patient_id=patient_id,
+        session_id=session_id,
+    )
+    min_suspicious_windows: int = session_policy.min_suspicious_windows
+    if should_upload_edf(session_id, min_suspicious_windows):
+        print(
+            f"[INFO] Session {session_id} qualifies for EDF upload "
+            f"(>= {min_suspicious_windows} suspicious windows)"
+        )
+        upload_edf(
+            edf_path=edf_path,
+            patient_id=patient_id,
+            session_id=session_id,
+        )
+    else:
+        print(
+            f"[INFO] Session {session_id} does NOT qualify for EDF upload"
+        )
+    print(f"[INFO] Session finished for patient {patient_id}")
 
-    return config
 
+def process_windows(
+    room_id: str,
+    patient_id: str,
+    session_id: str,
+    batches: Iterable[np.ndarray],
+    sfreq: int,
+    config: FogConfig,
+) -> None:
+    """
+    Score, register and publish every window of a session.
 
-def load_session_policy(config_path: Path) -> Dict[str, Any]:
+    Parameters
+    ----------
+    batches : Iterable[np.ndarray]
+        Consecutive windows in (B, C, T) batches, each scored with a
+        single inference call (see window_batches).
+    sfreq : int
+        Sampling frequency of the windows (feature extraction).
     """
-    Load session policy configuration from YAML.
+    delay: float = config.simulation.artificial_delay_seconds
+
+    # Overlapping windows + feature model: features once per hop
+    features = feature_stream(
+        sfreq, config.window.duration_seconds, config.window.overlap_seconds
+    )
+
+    smoother: Optional[StrideScoreSmoother] = None
+    if config.window.smoothing != "none":
+        smoother = StrideScoreSmoother(
+            windows_per_stride(
+                config.window.duration_seconds, config.window.overlap_seconds
+            ),
+            config.window.smoothing,
+        )
+
+    window_index: int = 0
+    for batch in batches:
+        print(
+            f"\n\t[INFO] Processing windows {window_index}-"
+            f"{window_index + len(batch) - 1} of shape {batch.shape[1:]}"
+        )
+
+        # Run inference (registered model, one call per batch)
+        if features is None:
+            probabilities: np.ndarray = run_inference_batch(batch)
+        else:
+            probabilities = run_inference_features(features.push(batch))
+
+        for probability in probabilities.tolist():
+            print(f"\t[INFO] Window {window_index} inference probability: {probability:.4f}")
+
+            event: Dict[str, Any] = process_window_result(
+                room_id=room_id,
+                patient_id=patient_id,
+                session_id=session_id,
+                window_index=window_index,
+                probability=probability,
+                thresholds_cfg=get_thresholds(config.thresholds.path),
+                smoother=smoother,
+            )
+            publish_event(event)
+            window_index += 1
+
+            if delay > 0:
+                time.sleep(delay)
+
+
+def window_batches(
+    source: Union[np.ndarray, Iterable[np.ndarray]],
+    sfreq: int,
+    config: FogConfig,
+) -> Iterator[np.ndarray]:
     """
-    if not config_path.exists():
-        raise FileNotFoundError(f"Session policy file not found: {config_path}")
+    Windows of a session grouped for batched inference.
 
-    with config_path.open("r", encoding="utf-8") as f:
-        policy: Dict[str, Any] = yaml.safe_load(f)
+    When paced (real time), each window is released alone at its
+    deadline: waiting for more would delay the decision. Otherwise
+    INFERENCE_BATCH_SIZE consecutive windows are scored per call.
 
-    if "session" not in policy or "min_suspicious_windows" not in policy["session"]:
-        raise ValueError("Invalid session_policy.yaml structure")
+    Parameters
+    ----------
+    source : np.ndarray or Iterable[np.ndarray]
+        Full signal (C, N), or a stream of preprocessed blocks (C, n).
+    sfreq : int
+        Sampling frequency in Hz.
+    config : FogConfig
+        Windowing and simulation settings.
+    """
+    window = config.window
+    simulation = config.simulation
+    batch_size: int = 1 if simulation.paced else INFERENCE_BATCH_SIZE
+
+    if isinstance(source, np.ndarray) and not simulation.paced:
+        # Strided views over the signal, no per-window copies
+        return generate_window_batches(
+            source,
+            sfreq,
+            batch_size=batch_size,
+            window_seconds=window.duration_seconds,
+            overlap_seconds=window.overlap_seconds,
+        )
 
-    return policy
+    generator = generate_windows if isinstance(source, np.ndarray) else generate_windows_from_stream
+    return batch_windows(
+        generator(
+            source,
+            sfreq,
+            window_seconds=window.duration_seconds,
+            overlap_seconds=window.overlap_seconds,
+            realtime=simulation.realtime,
+            speed=simulation.speed,
+        ),
+        batch_size,
+    )
 
 
 # =========================
 # Room simulation
 # =========================
-# MIN_SUSPICIOUS_WINDOWS: int = 5  # luego vendrá de YAML
-def run_room(room_id: str, config: RoomConfig, session_policy: Dict[str, Any],) -> None:
+def run_room(
+    room_id: str,
+    config: FogConfig,
+    streaming: bool = False,
+    use_cache: bool = True,
+    preload_workers: int = 0,
+) -> None:
     """
     Simulate a single room in the Fog node.
 
@@ -113,109 +315,111 @@ def run_room(room_id: str, config: RoomConfig, session_policy: Dict[str, Any],)
     ----------
     room_id : str
         Identifier of the room to simulate (e.g., 'room_A').
-    config : RoomConfig
-        Parsed configuration containing room assignments.
+    config : FogConfig
+        Validated fog configuration (rooms, windowing, simulation,
+        session policy, thresholds).
+    streaming : bool, optional
+        If True, read and preprocess each EDF in chunks instead of
+        loading the full recording before windowing.
+    use_cache : bool, optional
+        If True, reuse preprocessed signals cached on disk
+        (ignored in streaming mode).
+    preload_workers : int, optional
+        If > 0, preprocess the next patients' EDFs in that many worker
+        processes while the current session runs (ignored in
+        streaming mode).
     """
-    rooms: Dict[str, Any] = config["rooms"]
-
-    if room_id not in rooms:
-        raise ValueError(f"Room '{room_id}' not found in configuration")
-
-    patients: List[PatientConfig] = rooms[room_id]["patients"]
+    patients = config.room(room_id).patients
+    cache_dir: Path = config.paths.signal_cache_dir
 
     print(f"\n[INFO] Starting simulation for room: {room_id}")
     print(f"[INFO] Number of patients assigned: {len(patients)}")
 
-    for patient in patients:
-        patient_id: str = patient["patient_id"]
-        edf_path: Path = Path(patient["edf_path"])
-
-        print("\n" + "=" * 60)
-        print(f"[INFO] Starting session for patient {patient_id} in {room_id}")
-        print(f"[INFO] EDF file: {edf_path}")
-
-        # -------------------------
-        # Start session
-        # -------------------------
-        session_id: str = start_session(
-            room_id=room_id,
-            patient_id=patient_id
+    preloader: Optional[SignalPreloader] = None
+    if preload_workers > 0 and not streaming:
+        preloader = SignalPreloader(
+            [patient.edf_path for patient in patients],
+            max_workers=preload_workers,
+            use_cache=use_cache,
+            cache_dir=cache_dir,
         )
 
-        # -------------------------
-        # Load EEG signal from EDF
-        # -------------------------
-        signal, sfreq = load_edf_signal(edf_path)
-        print(f"[INFO] EDF signal loaded (sfreq={sfreq} Hz)")
-        print(f"[INFO] Signal shape: {signal.shape}")
-
-        # -------------------------
-        # Generate and process windows
-        # -------------------------
-        for window_index, window_data in enumerate(
-            generate_windows(signal, sfreq)
-        ):
-            # print("window_index:", window_index)
-            # print("window_data.shape:", window_data.shape)
-            print(f"\n\t[INFO] Processing window {window_index} of shape {window_data.shape}")
-            # 1️⃣ Registrar ventana procesada
-            register_window(session_id)
-
-            # Run inference (mock model)
-            probability: float = run_inference(window_data)
-            print(f"\t[INFO] Inference probability: {probability:.4f}")
-
-            # Decision logic
-            if is_suspected(probability):
-                # 1️⃣ Registrar ventana sospechosa
-                register_suspicious_window(session_id)
-
-                trigger_local_alert(
-                    room_id=room_id,
-                    patient_id=patient_id,
-                    session_id=session_id,
-                    window_index=window_index,
-                    score=probability,
+    try:
+        for patient_index, patient in enumerate(patients):
+            patient_id: str = patient.patient_id
+            edf_path: Path = patient.edf_path
+
+            print("\n" + "=" * 60)
+            print(f"[INFO] Starting session for patient {patient_id} in {room_id}")
+            print(f"[INFO] EDF file: {edf_path}")
+
+            # -------------------------
+            # Start session
+            # -------------------------
+            session_id: str = start_session(
+                room_id=room_id,
+                patient_id=patient_id
+            )
+
+            # -------------------------
+            # Load EEG signal and process windows
+            # -------------------------
+            if streaming:
+                sfreq = TARGET_FS
+                config.signal.check_sampling_rate(sfreq)
+                print(f"[INFO] EDF signal streaming (sfreq={sfreq} Hz)")
+                process_windows(
+                    room_id,
+                    patient_id,
+                    session_id,
+                    window_batches(stream_edf_signal(edf_path), sfreq, config),
+                    sfreq,
+                    config,
+                )
+            elif preloader is not None:
+                # Shared memory block is unlinked when the session ends
+                with preloader.get(patient_index) as loaded:
+                    config.signal.check_sampling_rate(loaded.sfreq)
+                    print(f"[INFO] EDF signal preloaded (sfreq={loaded.sfreq} Hz)")
+                    print(f"[INFO] Signal shape: {loaded.signal.shape}")
+                    process_windows(
+                        room_id,
+                        patient_id,
+                        session_id,
+                        window_batches(loaded.signal, loaded.sfreq, config),
+                        loaded.sfreq,
+                        config,
+                    )
+            else:
+                if use_cache:
+                    signal, sfreq = load_edf_signal_cached(edf_path, cache_dir=cache_dir)
+                else:
+                    signal, sfreq = load_edf_signal(edf_path)
+                config.signal.check_sampling_rate(sfreq)
+                print(f"[INFO] EDF signal loaded (sfreq={sfreq} Hz)")
+                print(f"[INFO] Signal shape: {signal.shape}")
+                process_windows(
+                    room_id,
+                    patient_id,
+                    session_id,
+                    window_batches(signal, sfreq, config),
+                    sfreq,
+                    config,
                 )
 
-            # 2) Construir evento estructurado
-            event: dict = build_window_event(
+            # -------------------------
+            # End session
+            # -------------------------
+            finish_session(
                 room_id=room_id,
                 patient_id=patient_id,
                 session_id=session_id,
-                window_index=window_index,
-                score=probability,
-                suspected=is_suspected(probability),
-            )
-            publish_event(event)
-
-        # -------------------------
-        # End session
-        # -------------------------
-        end_session(
-            room_id=room_id,
-            patient_id=patient_id,
-            session_id=session_id,
-        )
-        min_suspicious_windows: int = int(
-            session_policy["session"]["min_suspicious_windows"]
-        )
-        if should_upload_edf(session_id, min_suspicious_windows):
-            print(
-                f"[INFO] Session {session_id} qualifies for EDF upload "
-                f"(>= {min_suspicious_windows} suspicious windows)"
-            )
-            # upload_edf(edf_path)
-            upload_edf( 
                 edf_path=edf_path,
-                patient_id=patient_id,
-                session_id=session_id,
-            )
-        else:
-            print(
-                f"[INFO] Session {session_id} does NOT qualify for EDF upload"
+                session_policy=config.session,
             )
-        print(f"[INFO] Session finished for patient {patient_id}")
+    finally:
+        if preloader is not None:
+            preloader.close()
 
     print(f"\n[INFO] Simulation finished for room: {room_id}")
 
@@ -247,10 +451,77 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--config",
         type=Path,
-        default=Path("fog/config/room_assignments.yaml"),
+        default=ROOM_ASSIGNMENTS_PATH,
         help="Path to room assignments YAML file",
     )
 
+    parser.add_argument(
+        "--fog-config",
+        type=Path,
+        default=FOG_CONFIG_PATH,
+        help="Path to fog_config.yaml (windowing, simulation, paths)",
+    )
+
+    parser.add_argument(
+        "--session-policy",
+        type=Path,
+        default=SESSION_POLICY_PATH,
+        help="Path to session_policy.yaml",
+    )
+
+    parser.add_argument(
+        "--thresholds",
+        type=Path,
+        default=THRESHOLDS_PATH,
+        help="Path to thresholds.yaml",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read EDF files in chunks (bounded memory, faster first window)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-read and re-filter EDF files (skip the signal cache)",
+    )
+
+    parser.add_argument(
+        "--preload-workers",
+        type=int,
+        default=0,
+        help="Preprocess upcoming patients' EDFs in N worker processes (0: off)",
+    )
+
+    parser.add_argument(
+        "--no-realtime",
+        action="store_true",
+        help="Override simulation.realtime: process windows as fast as possible",
+    )
+
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=None,
+        help="Override simulation.speed (1: real time, 10: 10x, inf: as fast as possible)",
+    )
+
+    parser.add_argument(
+        "--model",
+        type=Path,
+        default=None,
+        help="Model artifact (.onnx / .npz); default: mock model",
+    )
+
+    parser.add_argument(
+        "--model-threads",
+        type=int,
+        default=INTRA_OP_THREADS,
+        help="Intra-op thread count for the model runtime",
+    )
+
     return parser.parse_args()
 
 
@@ -261,14 +532,23 @@ def main() -> None:
     args = parse_args()
 
     try:
-        config: RoomConfig = load_room_assignments(args.config)
-        session_policy: Dict[str, Any] = load_session_policy(
-            Path("fog/config/session_policy.yaml")
+        init_model_runtime(args.model, intra_op_threads=args.model_threads)
+        config: FogConfig = load_fog_config(
+            fog_config_path=args.fog_config,
+            room_assignments_path=args.config,
+            session_policy_path=args.session_policy,
+            thresholds_path=args.thresholds,
+        ).with_simulation(
+            realtime=False if args.no_realtime else None,
+            speed=args.speed,
         )
+        configure_outbox(config.paths.outbox_dir(args.room))
         run_room(
             room_id=args.room,
             config=config,
-            session_policy=session_policy,
+            streaming=args.stream,
+            use_cache=not args.no_cache,
+            preload_workers=args.preload_workers,
         )
     except Exception as exc:
         print(f"[ERROR] {exc}", file=sys.stderr)